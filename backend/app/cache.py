@@ -0,0 +1,211 @@
+from __future__ import annotations
+import hashlib
+import os
+import sqlite3
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+from .metrics import CACHE_LOOKUPS
+
+
+class Cache(ABC):
+    """
+    Content-addressed byte cache shared by the pipeline stages.
+    Keys come from the *_key helpers below; values are raw bytes.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, value: bytes) -> None:
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self._get(key)
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        CACHE_LOOKUPS.inc(kind=key.split(":", 1)[0], result="miss" if value is None else "hit")
+        return value
+
+    def get_text(self, key: str) -> Optional[str]:
+        value = self.get(key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set_text(self, key: str, value: str) -> None:
+        self.set(key, value.encode("utf-8"))
+
+    def stats(self) -> Dict[str, object]:
+        return {"backend": type(self).__name__, "hits": self.hits, "misses": self.misses}
+
+
+class NullCache(Cache):
+    def _get(self, key: str) -> Optional[bytes]:
+        return None
+
+    def set(self, key: str, value: bytes) -> None:
+        pass
+
+
+class MemoryCache(Cache):
+    """In-process LRU bounded by the total size of the stored values."""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._data[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self) -> Dict[str, object]:
+        res = super().stats()
+        res.update({"entries": len(self._data), "bytes": self.size, "max_bytes": self.max_bytes})
+        return res
+
+
+class SQLiteCache(Cache):
+    """On-disk blob store with a per-entry TTL; survives restarts and is shared by workers."""
+
+    _PURGE_EVERY = 256
+
+    def __init__(self, path: str, ttl_s: float = 7 * 24 * 3600):
+        super().__init__()
+        self.path = path
+        self.ttl_s = ttl_s
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return bytes(row[0])
+
+    def set(self, key: str, value: bytes) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, sqlite3.Binary(value), now + self.ttl_s),
+            )
+            self._writes += 1
+            if self._writes % self._PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM cache WHERE expires < ?", (now,))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, object]:
+        res = super().stats()
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM cache").fetchone()
+        res.update({"entries": row[0], "bytes": row[1], "ttl_s": self.ttl_s})
+        return res
+
+
+_cache: Optional[Cache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Cache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend = settings.cache_backend.lower()
+                if backend == "memory":
+                    _cache = MemoryCache(max_bytes=settings.cache_max_bytes)
+                elif backend == "sqlite":
+                    _cache = SQLiteCache(settings.cache_path, ttl_s=settings.cache_ttl_s)
+                elif backend in ("none", "off", ""):
+                    _cache = NullCache()
+                else:
+                    raise ValueError(f"Unknown cache backend: {settings.cache_backend}")
+    return _cache
+
+
+def _digest(*parts: bytes) -> str:
+    h = hashlib.sha256()
+    for p in parts:
+        # Length-prefix every part so different splits never collide
+        h.update(struct.pack("<Q", len(p)))
+        h.update(p)
+    return h.hexdigest()
+
+
+def transcript_key(pcm: np.ndarray, sr: int, provider: str, model: str, source_lang: Optional[str]) -> str:
+    data = np.ascontiguousarray(pcm, dtype=np.float32).tobytes()
+    return "asr:" + _digest(data, str(sr).encode(), provider.encode(), model.encode(), (source_lang or "").encode())
+
+
+def translation_key(text: str, target_lang: str, model: str) -> str:
+    return "mt:" + _digest(text.encode("utf-8"), target_lang.encode(), model.encode())
+
+
+_speaker_hashes: Dict[Tuple[str, float, int], str] = {}
+
+
+def speaker_wav_hash(path: Optional[str]) -> str:
+    if not path:
+        return ""
+    st = os.stat(path)
+    ident = (os.path.abspath(path), st.st_mtime, st.st_size)
+    cached = _speaker_hashes.get(ident)
+    if cached is None:
+        with open(path, "rb") as f:
+            cached = hashlib.sha256(f.read()).hexdigest()
+        _speaker_hashes[ident] = cached
+    return cached
+
+
+def tts_key(text: str, language: str, speaker_wav: Optional[str]) -> str:
+    return "tts:" + _digest(text.encode("utf-8"), language.encode(), speaker_wav_hash(speaker_wav).encode())
+
+
+def pack_audio(wav: np.ndarray, sr: int) -> bytes:
+    return struct.pack("<I", int(sr)) + np.ascontiguousarray(wav, dtype=np.float32).tobytes()
+
+
+def unpack_audio(data: bytes) -> Tuple[np.ndarray, int]:
+    (sr,) = struct.unpack_from("<I", data)
+    return np.frombuffer(data, dtype=np.float32, offset=4).copy(), sr
@@ -15,8 +15,128 @@ else:
 class Settings:
     gemini_api_key: str | None = os.getenv("GEMINI_API_KEY")
     openai_api_key: str | None = os.getenv("OPENAI_API_KEY")
+    # Extra comma-separated keys; calls are spread over all of a provider's keys to share rate limits
+    gemini_api_keys: str | None = os.getenv("GEMINI_API_KEYS")
+    openai_api_keys: str | None = os.getenv("OPENAI_API_KEYS")
+    # How a call picks its key: "least_loaded" (fewest calls in flight) or "round_robin"
+    provider_key_selection: str = os.getenv("PROVIDER_KEY_SELECTION", "least_loaded")
+    # Idle provider HTTP connections are kept open this long (seconds) for reuse
+    provider_keepalive_s: float = float(os.getenv("PROVIDER_KEEPALIVE_S", "60"))
     tts_model_name: str = os.getenv("TTS_MODEL_NAME", "tts_models/multilingual/multi-dataset/xtts_v2")
     cors_allow_origin: str = os.getenv("FRONTEND_ORIGIN", "http://localhost:5173")
+    # Cap on concurrent ASR/translation calls per provider API key (shared across requests)
+    gemini_max_concurrency: int = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+    openai_max_concurrency: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "4"))
+    local_max_concurrency: int = int(os.getenv("LOCAL_MAX_CONCURRENCY", "8"))
+    # Local offline provider: faster-whisper ASR plus a CTranslate2-converted NLLB/M2M100 MT model
+    local_asr_model: str = os.getenv("LOCAL_ASR_MODEL", "small")
+    local_mt_model: str = os.getenv("LOCAL_MT_MODEL", "")
+    local_mt_tokenizer: str = os.getenv("LOCAL_MT_TOKENIZER", "facebook/nllb-200-distilled-600M")
+    # Source language assumed for translation when the transcript's language wasn't detected locally
+    local_mt_source_lang: str = os.getenv("LOCAL_MT_SOURCE_LANG", "en")
+    local_device: str = os.getenv("LOCAL_DEVICE", "cpu")
+    local_compute_type: str = os.getenv("LOCAL_COMPUTE_TYPE", "int8")
+    # Threads per model call, and model calls run in parallel (each worker takes a batch of up to LOCAL_BATCH_SIZE)
+    local_asr_threads: int = int(os.getenv("LOCAL_ASR_THREADS", "4"))
+    local_asr_workers: int = int(os.getenv("LOCAL_ASR_WORKERS", "1"))
+    local_mt_threads: int = int(os.getenv("LOCAL_MT_THREADS", "4"))
+    local_mt_workers: int = int(os.getenv("LOCAL_MT_WORKERS", "1"))
+    local_batch_size: int = int(os.getenv("LOCAL_BATCH_SIZE", "8"))
+    local_beam_size: int = int(os.getenv("LOCAL_BEAM_SIZE", "1"))
+    # Retries and per-call timeout for each segment's provider calls
+    segment_max_retries: int = int(os.getenv("SEGMENT_MAX_RETRIES", "2"))
+    segment_timeout_s: float = float(os.getenv("SEGMENT_TIMEOUT_S", "60"))
+    # Backoff between retries of retryable errors: full jitter up to RETRY_BASE_S * 2**attempt, capped at RETRY_MAX_S
+    retry_base_s: float = float(os.getenv("RETRY_BASE_S", "0.5"))
+    retry_max_s: float = float(os.getenv("RETRY_MAX_S", "8"))
+    # Provider request rate per API key (requests/second, 0 = unlimited); halved on a 429, then recovered gradually
+    gemini_rate_limit_rps: float = float(os.getenv("GEMINI_RATE_LIMIT_RPS", "0"))
+    openai_rate_limit_rps: float = float(os.getenv("OPENAI_RATE_LIMIT_RPS", "0"))
+    rate_limit_burst: float = float(os.getenv("RATE_LIMIT_BURST", "4"))
+    # Deadline for a whole HTTP request's provider calls (seconds, 0 = none); clients can shorten it with X-Request-Timeout
+    request_timeout_s: float = float(os.getenv("REQUEST_TIMEOUT_S", "0"))
+    # Hedged requests: when a call runs past the HEDGE_QUANTILE of recent latencies, fire a backup call
+    provider_hedging: bool = os.getenv("PROVIDER_HEDGING", "false").lower() in ("1", "true", "yes")
+    hedge_quantile: float = float(os.getenv("HEDGE_QUANTILE", "0.95"))
+    hedge_min_samples: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    hedge_workers: int = int(os.getenv("HEDGE_WORKERS", "32"))
+    # Threads for CPU-bound stages (decode, VAD, TTS) offloaded from the event loop
+    cpu_workers: int = int(os.getenv("CPU_WORKERS", str(min(8, os.cpu_count() or 1))))
+    # Sample-rate conversion backend ("soxr", "scipy", "ffmpeg" or "librosa") and quality ("fast", "balanced", "high")
+    resample_backend: str = os.getenv("RESAMPLE_BACKEND", "soxr")
+    resample_quality: str = os.getenv("RESAMPLE_QUALITY", "high")
+    # Translations are packed into batched requests up to this many (estimated) tokens; 0 disables batching
+    translate_batch_max_tokens: int = int(os.getenv("TRANSLATE_BATCH_MAX_TOKENS", "2000"))
+    translate_batch_max_items: int = int(os.getenv("TRANSLATE_BATCH_MAX_ITEMS", "50"))
+    # Split voiced regions longer than this (seconds) so provider payloads stay bounded; 0 disables
+    vad_max_segment_s: float = float(os.getenv("VAD_MAX_SEGMENT_S", "0"))
+    # Inputs at least this long (seconds) are processed in bounded memory: decoded block by block and
+    # segmented with the streaming VAD, with at most window_max_pending_segments segments in flight (0 = never).
+    # A first decoding pass finds the VAD reference level, so segments match the in-memory path
+    windowed_min_duration_s: float = float(os.getenv("WINDOWED_MIN_DURATION_S", "1200"))
+    window_block_s: float = float(os.getenv("WINDOW_BLOCK_S", "30"))
+    window_max_pending_segments: int = int(os.getenv("WINDOW_MAX_PENDING_SEGMENTS", "32"))
+    # Most target languages one request may ask for (comma-separated target_lang); each adds translation and TTS work
+    max_target_langs: int = int(os.getenv("MAX_TARGET_LANGS", "8"))
+    # Max window length for the whole-file ("whole") transcription strategy
+    whole_file_window_s: float = float(os.getenv("WHOLE_FILE_WINDOW_S", "300"))
+    # Fit each synthesized segment to its source timing (time-stretch, borrow from pauses) so output stays in sync
+    # with the input; requests can override it with align=true/false. Stretch limits and method ("wsola", "phase_vocoder")
+    tts_align: bool = os.getenv("TTS_ALIGN", "false").lower() in ("1", "true", "yes")
+    align_tolerance: float = float(os.getenv("ALIGN_TOLERANCE", "0.1"))
+    align_max_stretch: float = float(os.getenv("ALIGN_MAX_STRETCH", "1.5"))
+    align_min_gap_s: float = float(os.getenv("ALIGN_MIN_GAP_S", "0.05"))
+    time_stretch_method: str = os.getenv("TIME_STRETCH_METHOD", "wsola")
+    # Bitrate for lossy output formats (ogg, opus, mp3) when a request doesn't set one; 0 = codec default
+    output_bitrate_kbps: float = float(os.getenv("OUTPUT_BITRATE_KBPS", "64"))
+    # TTS worker pool: number of model replicas, "thread" or "process" replicas, segments per batch
+    # (XTTS synthesizes segments one at a time, so batches only save per-call overhead in process mode)
+    tts_workers: int = int(os.getenv("TTS_WORKERS", "1"))
+    tts_worker_mode: str = os.getenv("TTS_WORKER_MODE", "thread")
+    tts_batch_size: int = int(os.getenv("TTS_BATCH_SIZE", "1"))
+    # Shared TTS model server (python -m app.tts.server): when set, synthesis goes to it over this Unix socket instead
+    # of loading models in this process, so API workers share one copy. The launcher (python -m app.launcher) sets both
+    tts_server_socket: str = os.getenv("TTS_SERVER_SOCKET", "")
+    tts_server_authkey: str = os.getenv("TTS_SERVER_AUTHKEY", "")
+    # Longest wait for the server's reply to a call (each queued segment included), shortened to the request's
+    # deadline; the call then fails with TimeoutError (0 = no limit)
+    tts_server_timeout_s: float = float(os.getenv("TTS_SERVER_TIMEOUT_S", "300"))
+    # Threads for the native pools of this process (torch, OpenMP/BLAS, numba); 0 leaves the library defaults
+    process_threads: int = int(os.getenv("PROCESS_THREADS", "0"))
+    # Admission control: while more than TTS_MAX_BACKLOG segments are queued or being synthesized, audio requests
+    # wait up to TTS_ADMISSION_WAIT_S for it to drain and are then refused with 503 (0 = no limit)
+    tts_max_backlog: int = int(os.getenv("TTS_MAX_BACKLOG", "0"))
+    tts_admission_wait_s: float = float(os.getenv("TTS_ADMISSION_WAIT_S", "10"))
+    # Opt-in warm-up at startup (JIT + model load); /api/ready reports 503 until it finishes
+    warmup_on_startup: bool = os.getenv("WARMUP_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+    warmup_tts: bool = os.getenv("WARMUP_TTS", "true").lower() in ("1", "true", "yes")
+    warmup_speaker_wav: str | None = os.getenv("WARMUP_SPEAKER_WAV") or None
+    # Transcript/translation/TTS cache: "memory" (LRU), "sqlite" (on disk, with TTL) or "none"
+    cache_backend: str = os.getenv("CACHE_BACKEND", "memory")
+    cache_max_bytes: int = int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    cache_path: str = os.getenv("CACHE_PATH") or str(Path(__file__).resolve().parents[1] / ".cache" / "cache.sqlite3")
+    cache_ttl_s: float = float(os.getenv("CACHE_TTL_S", str(7 * 24 * 3600)))
+    # Uploads larger than this are rejected with 413 before the body is read (0 = no limit)
+    max_upload_bytes: int = int(os.getenv("MAX_UPLOAD_BYTES", str(512 * 1024 * 1024)))
+    # Chunk size used when copying uploads to disk
+    upload_chunk_bytes: int = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+    # Always send the per-request X-Timing breakdown (otherwise only when the request has an X-Timing header)
+    timing_header: bool = os.getenv("TIMING_HEADER", "false").lower() in ("1", "true", "yes")
+    # Background jobs: SQLite queue and checkpoints, uploaded inputs and results stored in jobs_dir
+    jobs_db_path: str = os.getenv("JOBS_DB_PATH") or str(Path(__file__).resolve().parents[1] / ".cache" / "jobs.sqlite3")
+    jobs_dir: str = os.getenv("JOBS_DIR") or str(Path(__file__).resolve().parents[1] / ".cache" / "jobs")
+    # Jobs run concurrently per process; a running job whose heartbeat is older than the lease is resumed elsewhere
+    job_workers: int = int(os.getenv("JOB_WORKERS", "2"))
+    job_lease_s: float = float(os.getenv("JOB_LEASE_S", "60"))
+    job_max_attempts: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    # Finished jobs (and their result files) are purged after this long
+    job_retention_s: float = float(os.getenv("JOB_RETENTION_S", str(24 * 3600)))
+    # Voice profiles (reference clip + precomputed TTS conditioning latents), see POST /api/voices
+    voices_dir: str = os.getenv("VOICES_DIR") or str(Path(__file__).resolve().parents[1] / ".cache" / "voices")
+    # Seconds of clean speech kept as a voice reference; clone_voice looks for it in the first VOICE_SCAN_S of long
+    # (windowed) inputs
+    voice_reference_s: float = float(os.getenv("VOICE_REFERENCE_S", "12"))
+    voice_scan_s: float = float(os.getenv("VOICE_SCAN_S", "300"))
 
 
 settings = Settings()
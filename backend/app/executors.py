@@ -0,0 +1,31 @@
+from __future__ import annotations
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterator, TypeVar
+
+from .config import settings
+
+T = TypeVar("T")
+
+# Dedicated pool for CPU-bound stages so they never run on the event loop.
+# numpy/librosa/torch release the GIL for their heavy kernels, so threads are enough.
+cpu_executor = ThreadPoolExecutor(max_workers=max(1, settings.cpu_workers), thread_name_prefix="dovashi-cpu")
+
+
+async def run_cpu(fn: Callable[..., T], *args, **kwargs) -> T:
+    loop = asyncio.get_running_loop()
+    # Run in a copy of the caller's context so tracing spans reach the request's trace
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(cpu_executor, functools.partial(ctx.run, fn, *args, **kwargs))
+
+
+async def iterate_cpu(it: Iterator[T]) -> AsyncIterator[T]:
+    """Drive a blocking iterator on the CPU executor, yielding its items on the event loop."""
+    done = object()
+    while True:
+        item = await run_cpu(next, it, done)
+        if item is done:
+            return
+        yield item  # type: ignore[misc]
@@ -0,0 +1,379 @@
+from __future__ import annotations
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import BinaryIO, Dict, List, Literal, Optional, Tuple
+
+import numpy as np
+
+from .cache import pack_audio, unpack_audio
+from .config import settings
+from .metrics import trace
+from .pipeline import Checkpoint, convert_audio, convert_audio_to_table
+
+JobKind = Literal["audio", "text"]
+# Status: queued -> running -> done | failed | cancelled; a running job whose lease expires is claimed again
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobStore:
+    """
+    Persistent job queue plus per-segment checkpoints in one SQLite file.
+    Every method is safe to call from any thread, and several processes may share the file:
+    jobs are claimed inside an IMMEDIATE transaction and held by a heartbeat lease.
+    """
+
+    def __init__(self, path: str, data_dir: str):
+        self.path = path
+        self.data_dir = data_dir
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        os.makedirs(data_dir, exist_ok=True)
+        # Autocommit mode so claim() can open its own IMMEDIATE transaction
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, params TEXT NOT NULL, "
+            "input_path TEXT NOT NULL, result_path TEXT, result TEXT, error TEXT, total_segments INTEGER, "
+            "cancel_requested INTEGER NOT NULL DEFAULT 0, attempts INTEGER NOT NULL DEFAULT 0, "
+            "heartbeat REAL, created REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_segments ("
+            "job_id TEXT NOT NULL, idx INTEGER NOT NULL, transcript TEXT, translation TEXT, audio BLOB, "
+            "PRIMARY KEY (job_id, idx))"
+        )
+        self._lock = threading.Lock()
+
+    def _execute(self, sql: str, args: tuple = ()) -> List[tuple]:
+        # Rows are fetched under the lock since the connection is shared by all threads
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def _one(self, sql: str, args: tuple = ()) -> Optional[tuple]:
+        rows = self._execute(sql, args)
+        return rows[0] if rows else None
+
+    def create(self, kind: JobKind, source: BinaryIO, params: Dict[str, object]) -> str:
+        job_id = uuid.uuid4().hex
+        input_path = os.path.join(self.data_dir, f"{job_id}.input")
+        with open(input_path, "wb") as f:
+            shutil.copyfileobj(source, f, settings.upload_chunk_bytes)
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (id, kind, status, params, input_path, created, updated) VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(params), input_path, now, now),
+        )
+        return job_id
+
+    def claim(self, lease_s: float, max_attempts: int) -> Optional[Dict[str, object]]:
+        """Take the oldest queued job, or a running one whose lease expired (its worker died)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, kind, params, input_path, attempts FROM jobs "
+                    "WHERE status = 'queued' OR (status = 'running' AND heartbeat < ?) "
+                    "ORDER BY created LIMIT 1",
+                    (now - lease_s,),
+                ).fetchone()
+                if row is not None and row[4] < max_attempts:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, heartbeat = ?, updated = ? WHERE id = ?",
+                        (now, now, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job_id, kind, params, input_path, attempts = row
+        if attempts >= max_attempts:
+            # Keeps a job that repeatedly takes its worker down from looping forever
+            self.fail(job_id, f"gave up after {attempts} attempts")
+            return None
+        return {"id": job_id, "kind": kind, "params": json.loads(params), "input_path": input_path}
+
+    def heartbeat(self, job_ids: List[str]) -> None:
+        now = time.time()
+        for job_id in job_ids:
+            self._execute("UPDATE jobs SET heartbeat = ? WHERE id = ? AND status = 'running'", (now, job_id))
+
+    def set_total(self, job_id: str, total: int) -> None:
+        self._execute("UPDATE jobs SET total_segments = ?, updated = ? WHERE id = ?", (total, time.time(), job_id))
+
+    def cancel_requested(self, job_id: str) -> bool:
+        row = self._one("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,))
+        return row is None or bool(row[0])
+
+    def _finish(self, job_id: str, status: str, **fields: object) -> None:
+        assignments = "".join(f", {name} = ?" for name in fields)
+        self._execute(
+            f"UPDATE jobs SET status = ?, updated = ?{assignments} WHERE id = ?",
+            (status, time.time(), *fields.values(), job_id),
+        )
+        # Checkpoints only matter while the job can still resume; the input is no longer needed
+        self._execute("DELETE FROM job_segments WHERE job_id = ?", (job_id,))
+        row = self._one("SELECT input_path FROM jobs WHERE id = ?", (job_id,))
+        if row:
+            _remove(row[0])
+
+    def complete(self, job_id: str, result_path: Optional[str] = None, result: Optional[Dict[str, object]] = None) -> None:
+        self._finish(job_id, "done", result_path=result_path, result=json.dumps(result) if result is not None else None)
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._finish(job_id, "failed", error=error)
+
+    def cancelled(self, job_id: str) -> None:
+        self._finish(job_id, "cancelled")
+
+    def request_cancel(self, job_id: str) -> Optional[str]:
+        """Cancel a queued job at once, or flag a running one to stop at its next checkpoint."""
+        self._execute(
+            "UPDATE jobs SET cancel_requested = 1, updated = ? WHERE id = ? AND status IN ('queued', 'running')",
+            (time.time(), job_id),
+        )
+        row = self._one("SELECT status FROM jobs WHERE id = ?", (job_id,))
+        if row is None:
+            return None
+        if row[0] == "queued":
+            self.cancelled(job_id)
+            return "cancelled"
+        return row[0]
+
+    def delete(self, job_id: str) -> bool:
+        row = self._one("SELECT input_path, result_path FROM jobs WHERE id = ?", (job_id,))
+        if row is None:
+            return False
+        self._execute("DELETE FROM job_segments WHERE job_id = ?", (job_id,))
+        self._execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        for path in row:
+            _remove(path)
+        return True
+
+    def purge(self, older_than_s: float) -> None:
+        cutoff = time.time() - older_than_s
+        rows = self._execute(
+            "SELECT id FROM jobs WHERE status NOT IN ('queued', 'running') AND updated < ?", (cutoff,)
+        )
+        for (job_id,) in rows:
+            self.delete(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, object]]:
+        row = self._one(
+            "SELECT kind, status, params, result_path, result, error, total_segments, attempts, created, updated "
+            "FROM jobs WHERE id = ?",
+            (job_id,),
+        )
+        if row is None:
+            return None
+        kind, status, params, result_path, result, error, total, attempts, created, updated = row
+        counts = self._one(
+            "SELECT COUNT(transcript), COUNT(translation), COUNT(audio) FROM job_segments WHERE job_id = ?",
+            (job_id,),
+        )
+        if status == "done":
+            counts = (total or 0,) * 3
+        progress: Dict[str, object] = {"total": total, "transcribed": counts[0], "translated": counts[1]}
+        if kind == "audio":
+            progress["synthesized"] = counts[2]
+        return {
+            "id": job_id,
+            "kind": kind,
+            "status": status,
+            "params": json.loads(params),
+            "progress": progress,
+            "error": error,
+            "attempts": attempts,
+            "created": created,
+            "updated": updated,
+            "result_path": result_path,
+            "result": json.loads(result) if result else None,
+        }
+
+    def get_texts(self, job_id: str, index: int) -> Tuple[Optional[str], Optional[str]]:
+        row = self._one(
+            "SELECT transcript, translation FROM job_segments WHERE job_id = ? AND idx = ?", (job_id, index)
+        )
+        return (row[0], row[1]) if row else (None, None)
+
+    def put_texts(self, job_id: str, index: int, transcript: str, translation: Optional[str]) -> None:
+        self._execute(
+            "INSERT INTO job_segments (job_id, idx, transcript, translation) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (job_id, idx) DO UPDATE SET transcript = excluded.transcript, "
+            "translation = COALESCE(excluded.translation, job_segments.translation)",
+            (job_id, index, transcript, translation),
+        )
+
+    def get_audio(self, job_id: str, index: int) -> Optional[Tuple[np.ndarray, int]]:
+        row = self._one("SELECT audio FROM job_segments WHERE job_id = ? AND idx = ?", (job_id, index))
+        return unpack_audio(bytes(row[0])) if row and row[0] is not None else None
+
+    def put_audio(self, job_id: str, index: int, wav: np.ndarray, sr: int) -> None:
+        self._execute(
+            "INSERT INTO job_segments (job_id, idx, audio) VALUES (?, ?, ?) "
+            "ON CONFLICT (job_id, idx) DO UPDATE SET audio = excluded.audio",
+            (job_id, index, sqlite3.Binary(pack_audio(wav, sr))),
+        )
+
+
+def _remove(path: Optional[str]) -> None:
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class JobCheckpoint(Checkpoint):
+    """Pipeline checkpoint backed by the job store; check() raises JobCancelled once cancel is requested."""
+
+    def __init__(self, store: JobStore, job_id: str):
+        self.store = store
+        self.job_id = job_id
+
+    def start(self, total_segments: int) -> None:
+        self.store.set_total(self.job_id, total_segments)
+
+    def check(self) -> None:
+        if self.store.cancel_requested(self.job_id):
+            raise JobCancelled(self.job_id)
+
+    def get_texts(self, index: int) -> Tuple[Optional[str], Optional[str]]:
+        return self.store.get_texts(self.job_id, index)
+
+    def put_texts(self, index: int, transcript: str, translation: Optional[str] = None) -> None:
+        self.store.put_texts(self.job_id, index, transcript, translation)
+
+    def get_audio(self, index: int) -> Optional[Tuple[np.ndarray, int]]:
+        return self.store.get_audio(self.job_id, index)
+
+    def put_audio(self, index: int, wav: np.ndarray, sr: int) -> None:
+        self.store.put_audio(self.job_id, index, wav, sr)
+
+
+class JobQueue:
+    """
+    Background workers draining a JobStore. Each worker runs one job at a time through the
+    regular pipeline (so provider and TTS limits are shared with the HTTP endpoints), with a
+    JobCheckpoint so a job picked up again after a crash skips its finished segments.
+    """
+
+    def __init__(self, store: JobStore, workers: int = 2, lease_s: float = 60.0, max_attempts: int = 3, retention_s: float = 24 * 3600):
+        self.store = store
+        self.workers = max(1, workers)
+        self.lease_s = lease_s
+        self.max_attempts = max(1, max_attempts)
+        self.retention_s = retention_s
+        self._wake = threading.Event()
+        self._active: Dict[str, float] = {}
+        self._active_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+            self._threads = [
+                threading.Thread(target=self._run, name=f"dovashi-job-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            self._threads.append(threading.Thread(target=self._heartbeat, name="dovashi-job-heartbeat", daemon=True))
+            for t in self._threads:
+                t.start()
+
+    def submit(self, kind: JobKind, source: BinaryIO, params: Dict[str, object]) -> str:
+        job_id = self.store.create(kind, source, params)
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, object]]:
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        return self.store.request_cancel(job_id)
+
+    def _heartbeat(self) -> None:
+        # Renew leases well before they expire, independently of how long a segment takes
+        while True:
+            time.sleep(max(1.0, self.lease_s / 3))
+            with self._active_lock:
+                job_ids = list(self._active)
+            if job_ids:
+                self.store.heartbeat(job_ids)
+
+    def _run(self) -> None:
+        last_purge = 0.0
+        while True:
+            job = self.store.claim(self.lease_s, self.max_attempts)
+            if job is None:
+                if time.time() - last_purge > 60:
+                    last_purge = time.time()
+                    self.store.purge(self.retention_s)
+                self._wake.wait(timeout=1.0)
+                self._wake.clear()
+                continue
+            self._execute(job)
+
+    def _execute(self, job: Dict[str, object]) -> None:
+        job_id: str = job["id"]  # type: ignore[assignment]
+        with self._active_lock:
+            self._active[job_id] = time.time()
+        try:
+            with trace(f"job_{job['kind']}"):
+                self._run_job(job)
+        except JobCancelled:
+            self.store.cancelled(job_id)
+        except Exception as e:
+            self.store.fail(job_id, str(e))
+        finally:
+            with self._active_lock:
+                self._active.pop(job_id, None)
+
+    def _run_job(self, job: Dict[str, object]) -> None:
+        job_id: str = job["id"]  # type: ignore[assignment]
+        params: Dict[str, object] = job["params"]  # type: ignore[assignment]
+        checkpoint = JobCheckpoint(self.store, job_id)
+        checkpoint.check()
+        if job["kind"] == "text":
+            table = convert_audio_to_table(input_path=job["input_path"], checkpoint=checkpoint, **params)  # type: ignore[arg-type]
+            # Stored column-oriented; /api/jobs/{id}/result expands it with pipeline.text_result
+            self.store.complete(job_id, result=table.to_dict())
+        else:
+            tmp_path = convert_audio(input_path=job["input_path"], checkpoint=checkpoint, **params)  # type: ignore[arg-type]
+            out_path = os.path.join(self.store.data_dir, job_id + os.path.splitext(tmp_path)[1])
+            shutil.move(tmp_path, out_path)
+            self.store.complete(job_id, result_path=out_path)
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue(
+                    JobStore(settings.jobs_db_path, settings.jobs_dir),
+                    workers=settings.job_workers,
+                    lease_s=settings.job_lease_s,
+                    max_attempts=settings.job_max_attempts,
+                    retention_s=settings.job_retention_s,
+                )
+    return _queue
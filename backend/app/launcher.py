@@ -0,0 +1,110 @@
+from __future__ import annotations
+import argparse
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing.connection import Client
+from pathlib import Path
+from typing import Dict, List
+
+from .config import settings
+from .threads import thread_env
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _wait_for_server(proc: subprocess.Popen, address: str, authkey: str, timeout_s: float) -> None:
+    # The server binds its socket only once the models are loaded (with --warmup)
+    give_up = time.monotonic() + timeout_s
+    while time.monotonic() < give_up:
+        if proc.poll() is not None:
+            raise SystemExit(f"TTS server exited with code {proc.returncode}")
+        if os.path.exists(address):
+            try:
+                Client(address, family="AF_UNIX", authkey=authkey.encode()).close()
+                return
+            except OSError:
+                pass
+        time.sleep(0.2)
+    raise SystemExit(f"TTS server did not come up within {timeout_s:.0f}s")
+
+
+def _process_env(base: Dict[str, str], threads: int) -> Dict[str, str]:
+    env = dict(base, PROCESS_THREADS=str(threads))
+    env.update(thread_env(threads))
+    return env
+
+
+def main(argv: List[str] | None = None) -> int:
+    """
+    Production launcher: one TTS model server process plus `--workers` uvicorn API workers
+    that send their synthesis to it, with the host's cores split between them. Every API
+    worker gets --api-threads native threads (torch, OpenMP/BLAS, numba) and the model server
+    gets the rest, so N workers don't each start a pool per core and oversubscribe the host.
+    """
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Run the API workers and a shared TTS model server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=max(1, min(4, cores // 2)), help="uvicorn API worker processes")
+    parser.add_argument("--api-threads", type=int, default=1, help="native threads per API worker")
+    parser.add_argument("--tts-threads", type=int, default=0, help="native threads for the TTS server (default: the remaining cores)")
+    parser.add_argument("--socket", default=settings.tts_server_socket, help="TTS server socket path (default: a temporary one)")
+    parser.add_argument("--startup-timeout", type=float, default=600.0, help="seconds to wait for the TTS models to load")
+    args = parser.parse_args(argv)
+
+    workers = max(1, args.workers)
+    api_threads = max(1, args.api_threads)
+    tts_threads = args.tts_threads or max(1, cores - workers * api_threads)
+    address = args.socket or os.path.join(tempfile.gettempdir(), f"dovashi-tts-{os.getpid()}.sock")
+    authkey = settings.tts_server_authkey or secrets.token_hex(16)
+    base = dict(os.environ, TTS_SERVER_SOCKET=address, TTS_SERVER_AUTHKEY=authkey)
+    # Decode/VAD/encode threads per API worker: its share of the cores
+    base.setdefault("CPU_WORKERS", str(max(2, cores // workers)))
+
+    procs: List[subprocess.Popen] = []
+
+    def stop(*_) -> None:
+        for proc in reversed(procs):
+            if proc.poll() is None:
+                proc.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        tts = subprocess.Popen(
+            [sys.executable, "-m", "app.tts.server", "--socket", address, "--warmup"],
+            cwd=BACKEND_DIR,
+            env=_process_env(base, tts_threads),
+        )
+        procs.append(tts)
+        _wait_for_server(tts, address, authkey, args.startup_timeout)
+        api = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--host", args.host, "--port", str(args.port), "--workers", str(workers),
+            ],
+            cwd=BACKEND_DIR,
+            env=_process_env(base, api_threads),
+        )
+        procs.append(api)
+        print(f"dovashi: {workers} API workers x {api_threads} threads, TTS server {tts_threads} threads on {address}", flush=True)
+        # Either process exiting takes the other down with it
+        while all(proc.poll() is None for proc in procs):
+            time.sleep(0.5)
+        return next(proc.returncode for proc in procs if proc.returncode is not None)
+    finally:
+        stop()
+        for proc in procs:
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
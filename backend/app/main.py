@@ -1,15 +1,42 @@
 from __future__ import annotations
+import asyncio
+import json
+import math
 import os
+import re
 import tempfile
-from typing import Optional
+import time
+import zipfile
+from typing import Dict, List, Optional
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from starlette.background import BackgroundTask
+from starlette.datastructures import Headers
 
+from .cache import get_cache
 from .config import settings
-from .pipeline import convert_audio, convert_audio_to_text
+from .executors import run_cpu
+from .jobs import get_job_queue
+from .providers.registry import provider_names, provider_stats
+from .metrics import ADMISSION_REJECTIONS, TTS_IN_FLIGHT, TTS_QUEUE_DEPTH, current_trace, render, trace
+from .providers.base import ProviderError
+from .resilience import DeadlineExceeded, deadline
+from .pipeline import (
+    aconvert_audio,
+    aconvert_audio_multi,
+    aconvert_audio_stream,
+    aconvert_audio_to_text,
+    aconvert_audio_to_text_multi,
+    text_result,
+)
+from .utils.encode import OutputFormat, check_output_format
+from .voices import create_voice, get_voice_store
+from .streaming import StreamingSession, decode_pcm_chunk
+from .threads import limit_threads
+from .tts.scheduler import get_tts_scheduler
+from .warmup import mark_ready, readiness, start_background_warmup
 
 app = FastAPI(title="Dovashi Speech-to-Speech", version="0.1.0")
 
@@ -23,14 +50,233 @@ app.add_middleware(
 )
 
 
+class UploadLimitMiddleware:
+    """
+    Refuses request bodies over MAX_UPLOAD_BYTES with 413. A declared Content-Length is checked
+    before the body is parsed; bodies without one (chunked uploads) are counted as they arrive
+    and cut off at the limit, so an oversized upload is never spooled to disk in full.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        limit = settings.max_upload_bytes
+        if scope["type"] != "http" or not limit:
+            return await self.app(scope, receive, send)
+        length = Headers(scope=scope).get("content-length", "")
+        if length.isdigit() and int(length) > limit:
+            return await _too_large(scope, receive, send)
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside the body parser; FastAPI passes HTTPExceptions on as responses
+                    raise HTTPException(status_code=413, detail="Upload too large")
+            return message
+
+        async def tracked_send(message):
+            nonlocal started
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except HTTPException as e:
+            if e.status_code != 413 or started:
+                raise
+            await _too_large(scope, receive, send)
+
+
+async def _too_large(scope, receive, send) -> None:
+    await JSONResponse({"detail": "Upload too large"}, status_code=413)(scope, receive, send)
+
+
+app.add_middleware(UploadLimitMiddleware)
+
+
+_PROVIDER_ERROR = "provider must be one of " + ", ".join(f"'{p}'" for p in provider_names())
+
+
+def _timing_requested(request: Request) -> bool:
+    return settings.timing_header or bool(request.headers.get("x-timing"))
+
+
+def _request_timeout(request: Request) -> Optional[float]:
+    """REQUEST_TIMEOUT_S, shortened by the client's X-Request-Timeout header (seconds) if given."""
+    timeouts = [settings.request_timeout_s] if settings.request_timeout_s > 0 else []
+    try:
+        timeouts.append(float(request.headers.get("x-request-timeout", "")))
+    except ValueError:
+        pass
+    timeouts = [t for t in timeouts if t > 0]
+    return min(timeouts) if timeouts else None
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Collect a per-request stage breakdown and bound the request's provider calls by its deadline.
+    The breakdown is returned in the X-Timing response header when the client sends an X-Timing
+    request header (or TIMING_HEADER is on); for streamed responses it covers the work done
+    before streaming started.
+    """
+    with trace("http") as t, deadline(_request_timeout(request)):
+        response = await call_next(request)
+        route = request.scope.get("route")
+        t.name = getattr(route, "path", "unmatched")
+    if _timing_requested(request):
+        response.headers["X-Timing"] = t.header()
+    return response
+
+
+def _conversion_error(e: Exception) -> HTTPException:
+    """504 once the request's deadline has passed, 503 for transient provider failures, else 500."""
+    if isinstance(e, DeadlineExceeded):
+        return HTTPException(status_code=504, detail=str(e))
+    if isinstance(e, ProviderError) and e.retryable:
+        headers = {"Retry-After": str(math.ceil(e.retry_after))} if e.retry_after else None
+        return HTTPException(status_code=503, detail=str(e), headers=headers)
+    return HTTPException(status_code=500, detail=str(e))
+
+
+def _upload_source(file: UploadFile):
+    """
+    The upload as a file object for the decoder. The multipart parser has already spooled it
+    to a temporary file in chunks, so it is never read into memory as a whole here.
+    """
+    if settings.max_upload_bytes and (file.size or 0) > settings.max_upload_bytes:
+        raise HTTPException(status_code=413, detail="Upload too large")
+    file.file.seek(0)
+    return file.file
+
+
+def _target_langs(target_lang: str) -> List[str]:
+    """target_lang is one language or a comma-separated list (transcribed once, translated into each)."""
+    langs = list(dict.fromkeys(lang.strip() for lang in target_lang.split(",") if lang.strip()))
+    if not langs:
+        raise HTTPException(status_code=400, detail="target_lang is required")
+    if len(langs) > settings.max_target_langs:
+        raise HTTPException(status_code=400, detail=f"at most {settings.max_target_langs} target languages per request")
+    return langs
+
+
+async def _admit_tts() -> None:
+    """
+    Admission control for requests that synthesize speech. While the TTS backlog (segments
+    queued or being synthesized, host-wide when workers share a model server) is above
+    TTS_MAX_BACKLOG, wait up to TTS_ADMISSION_WAIT_S for it to drain, then refuse with 503.
+    """
+    if settings.tts_max_backlog <= 0:
+        return
+    scheduler = get_tts_scheduler()
+    give_up = time.monotonic() + settings.tts_admission_wait_s
+    while await asyncio.to_thread(scheduler.backlog) > settings.tts_max_backlog:
+        if time.monotonic() >= give_up:
+            ADMISSION_REJECTIONS.inc()
+            retry_after = str(max(1, math.ceil(settings.tts_admission_wait_s)))
+            raise HTTPException(status_code=503, detail="TTS backlog is full, retry later", headers={"Retry-After": retry_after})
+        await asyncio.sleep(0.25)
+
+
+def _speaker_wav(voice_id: Optional[str], clone_voice: bool = False) -> Optional[str]:
+    """The reference clip of voice profile voice_id (404 if unknown), or None for the default voice."""
+    if not voice_id:
+        return None
+    if clone_voice:
+        raise HTTPException(status_code=400, detail="voice_id and clone_voice are mutually exclusive")
+    path = get_voice_store().reference_path(voice_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="voice not found")
+    return path
+
+
+def _output_format(output_format: str, bitrate: Optional[int]) -> OutputFormat:
+    try:
+        fmt = check_output_format(output_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if bitrate is not None and not 6 <= bitrate <= 320:
+        raise HTTPException(status_code=400, detail="bitrate must be between 6 and 320 kbps")
+    return fmt
+
+
+def _zip_outputs(paths: Dict[str, str]) -> str:
+    """Bundle per-language outputs into one archive as converted-<lang>.<ext>; the outputs are removed."""
+    fd, zip_path = tempfile.mkstemp(suffix=".zip")
+    os.close(fd)
+    try:
+        # Audio barely compresses further, so the files are stored as they are
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as archive:
+            for lang, path in paths.items():
+                ext = os.path.splitext(path)[1]
+                archive.write(path, f"converted-{re.sub(r'[^A-Za-z0-9_-]', '_', lang)}{ext}")
+    except Exception:
+        os.remove(zip_path)
+        raise
+    finally:
+        for path in paths.values():
+            os.remove(path)
+    return zip_path
+
+
+@app.on_event("startup")
+def startup():
+    limit_threads(settings.process_threads)
+    if settings.warmup_on_startup:
+        start_background_warmup()
+    else:
+        mark_ready()
+    get_job_queue().start()
+
+
 @app.get("/api/health")
 def health():
     return {"status": "ok"}
 
 
+@app.get("/api/ready")
+def ready():
+    """Readiness for load balancers: 200 only once the optional warm-up has finished."""
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["status"] == "ready" else 503)
+
+
+@app.get("/api/cache/stats")
+def cache_stats():
+    return get_cache().stats()
+
+
+@app.get("/api/tts/stats")
+def tts_stats():
+    return get_tts_scheduler().stats()
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics: stage and provider latency, errors/retries, cache lookups, audio processed."""
+    try:
+        stats = get_tts_scheduler().stats()
+        TTS_QUEUE_DEPTH.set(stats["queue_depth"])  # type: ignore[arg-type]
+        TTS_IN_FLIGHT.set(stats["in_flight"])  # type: ignore[arg-type]
+    except Exception:
+        pass  # TTS server unreachable; the other metrics are still served
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/providers")
 def providers():
-    return {"providers": ["gemini", "openai"]}
+    return {"providers": provider_names()}
+
+
+@app.get("/api/providers/stats")
+def providers_stats():
+    return provider_stats()
 
 
 @app.post("/api/convert")
@@ -39,81 +285,349 @@ async def api_convert(
     target_lang: str = Form(...),
     provider: str = Form("gemini"),
     source_lang: Optional[str] = Form(None),
+    strategy: str = Form("segment"),
+    stream: bool = Form(False),
+    align: Optional[bool] = Form(None),
+    output_format: str = Form("wav"),
+    bitrate: Optional[int] = Form(None),
+    voice_id: Optional[str] = Form(None),
+    clone_voice: bool = Form(False),
 ):
-    if provider not in ("gemini", "openai"):
-        raise HTTPException(status_code=400, detail="provider must be 'gemini' or 'openai'")
+    if provider not in provider_names():
+        raise HTTPException(status_code=400, detail=_PROVIDER_ERROR)
+    if strategy not in ("segment", "whole"):
+        raise HTTPException(status_code=400, detail="strategy must be 'segment' or 'whole'")
+    langs = _target_langs(target_lang)
+    if stream and len(langs) > 1:
+        raise HTTPException(status_code=400, detail="stream supports a single target language")
+    fmt = _output_format(output_format, bitrate)
+    speaker_wav = _speaker_wav(voice_id, clone_voice)
+    await _admit_tts()
 
-    # Save uploaded file to temp
-    try:
-        fd, tmp_in = tempfile.mkstemp(suffix=os.path.splitext(file.filename or "uploaded")[1] or ".wav")
-        with os.fdopen(fd, "wb") as f:
-            f.write(await file.read())
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save upload: {e}")
+    # Decoded straight from the spooled upload; nothing else is written to disk for the input
+    source = _upload_source(file)
+    headers = {
+        "Content-Disposition": f"attachment; filename=converted{fmt.extension}"
+    }
+
+    # Delete the output once sent
+    def cleanup(path: str):
+        try:
+            os.remove(path)
+        except Exception:
+            pass
+
+    if len(langs) > 1:
+        # One file per language, returned together as a zip archive
+        try:
+            paths = await aconvert_audio_multi(
+                input_path=source,
+                target_langs=langs,
+                provider=provider,  # type: ignore
+                source_lang=source_lang,
+                strategy=strategy,  # type: ignore
+                align=align,
+                output_format=output_format,
+                bitrate_kbps=bitrate,
+                tts_speaker_wav=speaker_wav,
+                clone_voice=clone_voice,
+            )
+        except Exception as e:
+            raise _conversion_error(e)
+        zip_path = await run_cpu(_zip_outputs, paths)
+        headers = {
+            "Content-Disposition": "attachment; filename=converted.zip"
+        }
+        return FileResponse(zip_path, media_type="application/zip", headers=headers, background=BackgroundTask(cleanup, zip_path))
+
+    if stream:
+        # Chunked: each segment's audio is encoded and sent as soon as it is synthesized (WAV: header first)
+        try:
+            chunks = await aconvert_audio_stream(
+                input_path=source,
+                target_lang=langs[0],
+                provider=provider,  # type: ignore
+                source_lang=source_lang,
+                strategy=strategy,  # type: ignore
+                align=align,
+                output_format=output_format,
+                bitrate_kbps=bitrate,
+                tts_speaker_wav=speaker_wav,
+                clone_voice=clone_voice,
+            )
+        except Exception as e:
+            raise _conversion_error(e)
+        return StreamingResponse(chunks, media_type=fmt.media_type, headers=headers)
 
     try:
-        out_path = convert_audio(
-            input_path=tmp_in,
-            target_lang=target_lang,
+        out_path = await aconvert_audio(
+            input_path=source,
+            target_lang=langs[0],
             provider=provider,  # type: ignore
             source_lang=source_lang,
+            strategy=strategy,  # type: ignore
+            align=align,
+            output_format=output_format,
+            bitrate_kbps=bitrate,
+            tts_speaker_wav=speaker_wav,
+            clone_voice=clone_voice,
         )
     except Exception as e:
-        # Clean input tmp
-        try:
-            os.remove(tmp_in)
-        except Exception:
-            pass
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _conversion_error(e)
 
-    # Delete both input and output once sent
-    def cleanup():
-        for p in (tmp_in, out_path):
-            try:
-                os.remove(p)
-            except Exception:
-                pass
-
-    headers = {
-        "Content-Disposition": f"attachment; filename=converted.wav"
-    }
-    return FileResponse(out_path, media_type="audio/wav", headers=headers, background=BackgroundTask(cleanup))
+    return FileResponse(out_path, media_type=fmt.media_type, headers=headers, background=BackgroundTask(cleanup, out_path))
 
 
 @app.post("/api/convert-text")
 async def api_convert_text(
+    request: Request,
+    file: UploadFile = File(...),
+    target_lang: str = Form(...),
+    provider: str = Form("gemini"),
+    source_lang: Optional[str] = Form(None),
+    strategy: str = Form("segment"),
+):
+    if provider not in provider_names():
+        raise HTTPException(status_code=400, detail=_PROVIDER_ERROR)
+    if strategy not in ("segment", "whole"):
+        raise HTTPException(status_code=400, detail="strategy must be 'segment' or 'whole'")
+
+    langs = _target_langs(target_lang)
+
+    source = _upload_source(file)
+
+    try:
+        if len(langs) > 1:
+            # Transcribed once; {"results": {lang: {translation, transcript, segments}}}
+            result: Dict[str, object] = {
+                "results": await aconvert_audio_to_text_multi(
+                    input_path=source,
+                    target_langs=langs,
+                    provider=provider,  # type: ignore
+                    source_lang=source_lang,
+                    strategy=strategy,  # type: ignore
+                )
+            }
+        else:
+            result = await aconvert_audio_to_text(
+                input_path=source,
+                target_lang=langs[0],
+                provider=provider,  # type: ignore
+                source_lang=source_lang,
+                strategy=strategy,  # type: ignore
+            )
+    except Exception as e:
+        raise _conversion_error(e)
+
+    t = current_trace()
+    if t is not None and _timing_requested(request):
+        # Full breakdown including the per-segment spans
+        result["timing"] = t.summary(spans=True)
+    return result
+
+
+@app.post("/api/jobs", status_code=202)
+async def api_create_job(
     file: UploadFile = File(...),
     target_lang: str = Form(...),
     provider: str = Form("gemini"),
     source_lang: Optional[str] = Form(None),
+    strategy: str = Form("segment"),
+    output: str = Form("audio"),
+    align: Optional[bool] = Form(None),
+    output_format: str = Form("wav"),
+    bitrate: Optional[int] = Form(None),
+    voice_id: Optional[str] = Form(None),
+    clone_voice: bool = Form(False),
 ):
-    if provider not in ("gemini", "openai"):
-        raise HTTPException(status_code=400, detail="provider must be 'gemini' or 'openai'")
+    """Queue a conversion in the background; poll GET /api/jobs/{id} and fetch /api/jobs/{id}/result."""
+    if provider not in provider_names():
+        raise HTTPException(status_code=400, detail=_PROVIDER_ERROR)
+    if strategy not in ("segment", "whole"):
+        raise HTTPException(status_code=400, detail="strategy must be 'segment' or 'whole'")
+    if output not in ("audio", "text"):
+        raise HTTPException(status_code=400, detail="output must be 'audio' or 'text'")
+    if len(_target_langs(target_lang)) > 1:
+        # Checkpoints hold one translation per segment, so jobs are single-language
+        raise HTTPException(status_code=400, detail="jobs take a single target language")
+    _output_format(output_format, bitrate)
+    speaker_wav = _speaker_wav(voice_id, clone_voice) if output == "audio" else None
+
+    source = _upload_source(file)
+    params = {"target_lang": target_lang, "provider": provider, "source_lang": source_lang, "strategy": strategy}
+    if output == "audio":
+        if align is not None:
+            params["align"] = align
+        if output_format != "wav":
+            params["output_format"] = output_format
+        if bitrate is not None:
+            params["bitrate_kbps"] = bitrate
+        if speaker_wav is not None:
+            params["tts_speaker_wav"] = speaker_wav
+        if clone_voice:
+            params["clone_voice"] = True
+    job_id = await run_cpu(get_job_queue().submit, output, source, params)
+    return {"id": job_id, "status": "queued"}
+
+
+def _job_or_404(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+
+@app.get("/api/jobs/{job_id}")
+def api_get_job(job_id: str):
+    job = _job_or_404(job_id)
+    job.pop("result_path", None)
+    job.pop("result", None)
+    return job
 
+
+@app.get("/api/jobs/{job_id}/result")
+def api_job_result(job_id: str):
+    job = _job_or_404(job_id)
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"job is {job['status']}")
+    if job["kind"] == "text":
+        result = job["result"]
+        # Results stored before they were kept column-oriented are already in the API's shape
+        return result if "segments" in result else text_result(result)
+    fmt = check_output_format(job["params"].get("output_format", "wav"))
+    headers = {
+        "Content-Disposition": f"attachment; filename=converted{fmt.extension}"
+    }
+    return FileResponse(job["result_path"], media_type=fmt.media_type, headers=headers)
+
+
+@app.delete("/api/jobs/{job_id}")
+def api_delete_job(job_id: str):
+    """Cancel a queued or running job; a finished job is deleted together with its result."""
+    queue = get_job_queue()
+    job = _job_or_404(job_id)
+    if job["status"] in ("queued", "running"):
+        return {"id": job_id, "status": queue.cancel(job_id)}
+    queue.store.delete(job_id)
+    return {"id": job_id, "status": "deleted"}
+
+
+@app.post("/api/voices", status_code=201)
+async def api_create_voice(file: UploadFile = File(...), name: Optional[str] = Form(None)):
+    """
+    Create a voice profile from a reference recording. Silence, clipped and noisy parts are
+    dropped and up to VOICE_REFERENCE_S of the cleanest speech is kept; the TTS conditioning
+    latents are computed once and stored with it. Use the returned id as voice_id.
+    """
+    source = _upload_source(file)
     try:
-        fd, tmp_in = tempfile.mkstemp(suffix=os.path.splitext(file.filename or "uploaded")[1] or ".wav")
-        with os.fdopen(fd, "wb") as f:
-            f.write(await file.read())
+        return await run_cpu(create_voice, source, name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save upload: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/voices")
+def api_list_voices():
+    return {"voices": get_voice_store().list()}
+
+
+@app.get("/api/voices/{voice_id}")
+def api_get_voice(voice_id: str):
+    voice = get_voice_store().get(voice_id)
+    if voice is None:
+        raise HTTPException(status_code=404, detail="voice not found")
+    return voice
+
+
+@app.delete("/api/voices/{voice_id}")
+def api_delete_voice(voice_id: str):
+    if not get_voice_store().delete(voice_id):
+        raise HTTPException(status_code=404, detail="voice not found")
+    return {"id": voice_id, "status": "deleted"}
+
 
+@app.websocket("/ws/convert")
+async def ws_convert(ws: WebSocket):
+    """
+    Streaming speech-to-speech.
+    1. Client sends a JSON config: {"target_lang", "provider", "source_lang", "sample_rate", "encoding"}
+       (encoding is "pcm_s16le" (default) or "f32le", mono).
+    2. Client sends binary audio chunks as they are recorded, then {"type": "end"}.
+    3. Server sends, per finalized segment, a JSON message with transcript/translation followed by
+       a binary PCM16 message (preceding silence + synthesized speech), and finally an "end" message
+       followed by the trailing silence.
+    """
+    await ws.accept()
     try:
-        result = convert_audio_to_text(
-            input_path=tmp_in,
-            target_lang=target_lang,
-            provider=provider,  # type: ignore
-            source_lang=source_lang,
+        config = await ws.receive_json()
+    except WebSocketDisconnect:
+        return
+
+    provider = config.get("provider", "gemini")
+    encoding = config.get("encoding", "pcm_s16le")
+    if provider not in provider_names() or not config.get("target_lang"):
+        await ws.send_json({"type": "error", "detail": f"target_lang is required and {_PROVIDER_ERROR}"})
+        await ws.close()
+        return
+
+    try:
+        await _admit_tts()
+    except HTTPException as e:
+        await ws.send_json({"type": "error", "detail": e.detail})
+        await ws.close(code=1013)  # try again later
+        return
+
+    try:
+        session = StreamingSession(
+            target_lang=config["target_lang"],
+            provider=provider,
+            source_lang=config.get("source_lang"),
+            sample_rate=int(config.get("sample_rate", 16000)),
+            tts_speaker_wav=_speaker_wav(config.get("voice_id")),
         )
+    except HTTPException as e:
+        await ws.send_json({"type": "error", "detail": e.detail})
+        await ws.close()
+        return
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
+        await ws.send_json({"type": "error", "detail": str(e)})
+        await ws.close()
+        return
+
+    async def sender():
+        async for meta, pcm in session.outputs():
+            # Every JSON message is followed by exactly one binary message (possibly empty)
+            await ws.send_json(meta)
+            await ws.send_bytes(pcm)
+
+    send_task = asyncio.create_task(sender())
+    await ws.send_json({"type": "ready"})
+    try:
+        while True:
+            msg = await ws.receive()
+            if msg["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect()
+            if msg.get("bytes"):
+                await session.feed(decode_pcm_chunk(msg["bytes"], encoding))
+            elif msg.get("text") and json.loads(msg["text"]).get("type") == "end":
+                await session.finish()
+                break
+        await send_task
+        await ws.close()
+    except WebSocketDisconnect:
+        session.cancel()
+        send_task.cancel()
+    except Exception as e:
+        session.cancel()
+        send_task.cancel()
         try:
-            os.remove(tmp_in)
+            await ws.send_json({"type": "error", "detail": str(e)})
+            await ws.close()
         except Exception:
             pass
 
-    return result
-
 
 @app.get("/")
 def root():
@@ -121,8 +635,12 @@ def root():
         "name": "Dovashi Speech-to-Speech API",
         "endpoints": {
             "health": "/api/health",
+            "ready": "/api/ready",
+            "metrics": "/metrics",
             "providers": "/api/providers",
             "convert": "POST /api/convert (multipart/form-data)",
-            "convert-text": "POST /api/convert-text (multipart/form-data)"
+            "convert-text": "POST /api/convert-text (multipart/form-data)",
+            "jobs": "POST /api/jobs (multipart/form-data), GET /api/jobs/{id}, GET /api/jobs/{id}/result, DELETE /api/jobs/{id}",
+            "stream": "WS /ws/convert"
         }
     })
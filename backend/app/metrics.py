@@ -0,0 +1,256 @@
+from __future__ import annotations
+import contextvars
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+LabelValues = Tuple[str, ...]
+
+_DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    """Minimal Prometheus metric; values are kept per label combination under one lock."""
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: object) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = _DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label combination: [per-bucket counts..., sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 1)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            row[-1] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines: List[str] = []
+        for key, row in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(row[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+
+_registry: List[_Metric] = []
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    return "\n".join(line for metric in _registry for line in metric.render()) + "\n"
+
+
+STAGE_SECONDS = Histogram("dovashi_stage_seconds", "Time spent per pipeline stage call", ("stage",))
+PROVIDER_CALL_SECONDS = Histogram("dovashi_provider_call_seconds", "Provider API call latency", ("provider", "op"))
+PROVIDER_ERRORS = Counter("dovashi_provider_errors_total", "Failed provider API calls", ("provider", "op"))
+PROVIDER_RETRIES = Counter("dovashi_provider_retries_total", "Provider API calls retried after a failure", ("provider", "op"))
+PROVIDER_HEDGES = Counter("dovashi_provider_hedges_total", "Backup calls fired because a provider call exceeded its latency quantile", ("provider", "op"))
+PROVIDER_THROTTLE_SECONDS = Counter("dovashi_provider_throttle_seconds_total", "Time spent waiting on provider rate limits", ("provider",))
+TRANSLATION_FALLBACKS = Counter("dovashi_translation_fallbacks_total", "Segments that kept their source text because translation failed")
+CACHE_LOOKUPS = Counter("dovashi_cache_lookups_total", "Cache lookups by entry kind and result", ("kind", "result"))
+REQUEST_SECONDS = Histogram("dovashi_request_seconds", "End-to-end time per traced request or job", ("name",))
+SEGMENTS = Histogram(
+    "dovashi_segments", "VAD segments per request", buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+)
+AUDIO_SECONDS = Counter("dovashi_audio_seconds_total", "Seconds of input audio processed")
+REALTIME_FACTOR = Histogram(
+    "dovashi_realtime_factor", "Processing time divided by input audio duration",
+    buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0),
+)
+TTS_QUEUE_DEPTH = Gauge("dovashi_tts_queue_depth", "Segments waiting for a TTS worker")
+TTS_IN_FLIGHT = Gauge("dovashi_tts_in_flight", "Segments being synthesized")
+ADMISSION_REJECTIONS = Counter("dovashi_admission_rejections_total", "Audio requests refused because the TTS backlog was full")
+
+
+class Trace:
+    """
+    Per-request timing breakdown collected by span(): total time and call count per stage,
+    plus the individual spans (with attributes such as the segment index) up to max_spans.
+    """
+
+    max_spans = 2000
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.elapsed: Optional[float] = None
+        self.audio_s = 0.0
+        self.segments = 0
+        self._stages: Dict[str, List[float]] = {}
+        self._spans: List[Dict[str, object]] = []
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float, attrs: Dict[str, object]) -> None:
+        with self._lock:
+            total = self._stages.setdefault(stage, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+            if len(self._spans) < self.max_spans:
+                self._spans.append({"stage": stage, "s": round(seconds, 6), **attrs})
+
+    def summary(self, spans: bool = False) -> Dict[str, object]:
+        total = self.elapsed if self.elapsed is not None else time.perf_counter() - self.started
+        with self._lock:
+            res: Dict[str, object] = {
+                "total_s": round(total, 6),
+                "audio_s": round(self.audio_s, 3),
+                "segments": self.segments,
+                "realtime_factor": round(total / self.audio_s, 4) if self.audio_s else None,
+                "stages": {k: {"s": round(v[0], 6), "n": int(v[1])} for k, v in self._stages.items()},
+            }
+            if spans:
+                res["spans"] = list(self._spans)
+        return res
+
+    def header(self) -> str:
+        """Compact breakdown for the X-Timing header, e.g. "total=2.104, decode=0.031, transcribe=1.620;n=12"."""
+        summary = self.summary()
+        parts = [f"total={summary['total_s']:.3f}"]
+        for stage, v in summary["stages"].items():  # type: ignore[union-attr]
+            parts.append(f"{stage}={v['s']:.3f}" + (f";n={v['n']}" if v["n"] > 1 else ""))
+        return ", ".join(parts)
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("dovashi_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def trace(name: str) -> Iterator[Trace]:
+    """Collect spans from this context (and work handed off with in_context) into a new Trace."""
+    t = Trace(name)
+    token = _current.set(t)
+    try:
+        yield t
+    finally:
+        _current.reset(token)
+        t.elapsed = time.perf_counter() - t.started
+        REQUEST_SECONDS.observe(t.elapsed, name=t.name)
+        if t.audio_s > 0:
+            REALTIME_FACTOR.observe(t.elapsed / t.audio_s)
+
+
+@contextmanager
+def span(stage: str, **attrs: object) -> Iterator[None]:
+    """Time a block into the stage histogram and the current trace, if any."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        t = _current.get()
+        if t is not None:
+            t.add(stage, elapsed, attrs)
+
+
+@contextmanager
+def provider_span(provider: str, op: str, **attrs: object) -> Iterator[None]:
+    """span() for one provider API call, also feeding the per-provider latency histogram."""
+    start = time.perf_counter()
+    try:
+        with span(op, provider=provider, **attrs):
+            yield
+    finally:
+        PROVIDER_CALL_SECONDS.observe(time.perf_counter() - start, provider=provider, op=op)
+
+
+def record_audio(seconds: float, segments: int) -> None:
+    AUDIO_SECONDS.inc(seconds)
+    SEGMENTS.observe(segments)
+    t = _current.get()
+    if t is not None:
+        t.audio_s += seconds
+        t.segments += segments
+
+
+def in_context(fn: Callable[..., T]) -> Callable[..., T]:
+    """Bind fn to a copy of the current context so spans recorded on a worker thread reach the trace."""
+    return functools.partial(contextvars.copy_context().run, fn)
@@ -1,189 +1,1232 @@
 from __future__ import annotations
+import asyncio
+import json
+import logging
 import os
 import tempfile
-from typing import Literal, Optional, List, Dict
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Iterator, Literal, Optional, List, Dict, Tuple, Union
 
 import numpy as np
-import soundfile as sf
 
+from .cache import get_cache, pack_audio, transcript_key, translation_key, tts_key, unpack_audio
+from .config import settings
+from .executors import iterate_cpu, run_cpu
+from .metrics import TRANSLATION_FALLBACKS, in_context, record_audio, span
 from .utils.audio import (
-    ensure_wav,
-    load_mono_wav,
+    AudioSource,
+    StreamingSegmenter,
+    align_spans_to_segments,
+    audio_duration,
+    decode_audio,
+    encode_wav_bytes,
+    group_segments_into_windows,
+    iter_audio_blocks,
     segment_audio_vad,
-    save_chunk_to_wav,
+    source_size,
     assemble_with_pauses,
 )
-from .providers.gemini_provider import GeminiProvider
-from .providers.openai_provider import OpenAIProvider
-from .tts.coqui_tts import CoquiTTS
+from .providers.base import ASRTranslateProvider, TimedText
+from .providers.registry import get_provider, provider_key_count
+from .resilience import DeadlineExceeded, acall_provider, call_provider
+from .segments import SegmentTable, segment_rows
+from .tts.scheduler import get_tts_scheduler
+from .utils.encode import AudioFileWriter, StreamEncoder, check_output_format, make_stream_encoder
+from .utils.resample import resample
+from .utils.timefit import TimeAligner
+from .utils.vad import peak_frame_power
+from .voices import decode_head, select_reference
 
 
-ProviderName = Literal["gemini", "openai"]
+ProviderName = Literal["gemini", "openai", "local"]
+# "segment": one transcription call per VAD segment.
+# "whole": the file (or a few large windows of it) is transcribed with timestamps in one call
+# each, and the text is mapped back onto the VAD segments by time overlap.
+TranscriptionStrategy = Literal["segment", "whole"]
 
+logger = logging.getLogger(__name__)
 
-def _get_provider(name: ProviderName):
-    if name == "gemini":
-        return GeminiProvider()
-    elif name == "openai":
-        return OpenAIProvider()
+
+class Checkpoint:
+    """
+    Per-segment progress hooks for resumable runs (see jobs.py). Results found here are
+    reused instead of recomputed, new results are recorded as segments finish, and check()
+    runs between units of work so it can abort the run by raising. The base class records
+    nothing.
+    """
+
+    def start(self, total_segments: int) -> None:
+        pass
+
+    def check(self) -> None:
+        pass
+
+    def get_texts(self, index: int) -> Tuple[Optional[str], Optional[str]]:
+        return None, None
+
+    def put_texts(self, index: int, transcript: str, translation: Optional[str] = None) -> None:
+        pass
+
+    def get_audio(self, index: int) -> Optional[Tuple[np.ndarray, int]]:
+        return None
+
+    def put_audio(self, index: int, wav: np.ndarray, sr: int) -> None:
+        pass
+
+
+_NO_CHECKPOINT = Checkpoint()
+
+# Process-wide semaphores so concurrent requests share one per-provider limit
+_provider_slots: Dict[str, threading.BoundedSemaphore] = {}
+_provider_slots_lock = threading.Lock()
+# Async counterparts used by the event-loop pipeline
+_async_provider_slots: Dict[str, asyncio.Semaphore] = {}
+
+
+def _get_provider(name: ProviderName) -> ASRTranslateProvider:
+    # Shared, process-wide clients (keep-alive pools, multi-key selection); see providers.registry
+    return get_provider(name)
+
+
+def _provider_concurrency(name: str) -> int:
+    # <NAME>_MAX_CONCURRENCY; it applies per API key, so extra keys add capacity
+    limit = getattr(settings, f"{name}_max_concurrency", 1)
+    return max(1, limit) * provider_key_count(name)
+
+
+def _get_provider_slots(name: str) -> threading.BoundedSemaphore:
+    with _provider_slots_lock:
+        slots = _provider_slots.get(name)
+        if slots is None:
+            slots = threading.BoundedSemaphore(_provider_concurrency(name))
+            _provider_slots[name] = slots
+        return slots
+
+
+def _get_async_provider_slots(name: str) -> asyncio.Semaphore:
+    slots = _async_provider_slots.get(name)
+    if slots is None:
+        slots = asyncio.Semaphore(_provider_concurrency(name))
+        _async_provider_slots[name] = slots
+    return slots
+
+
+def _translation_fallback(error: BaseException, segments: int = 1) -> None:
+    """Keep the source text after a failed translation; a passed deadline fails the request instead."""
+    if isinstance(error, DeadlineExceeded):
+        raise error
+    TRANSLATION_FALLBACKS.inc(segments)
+    logger.warning("Translation failed, keeping the source text for %d segment(s): %s", segments, error)
+
+
+def _process_segment(
+    prov: ASRTranslateProvider,
+    provider: str,
+    slots: threading.BoundedSemaphore,
+    seg: np.ndarray,
+    sr: int,
+    source_lang: Optional[str],
+    target_lang: str,
+) -> Tuple[str, str]:
+    """Transcribe one segment, then translate it as soon as the transcript is available."""
+    cache = get_cache()
+    asr_key = transcript_key(seg, sr, provider, prov.transcribe_model, source_lang)
+    transcript = cache.get_text(asr_key)
+    if transcript is None:
+        with span("encode"):
+            seg_wav = encode_wav_bytes(seg, sr)
+        transcript = call_provider(slots, prov.transcribe, seg_wav, source_lang=source_lang)
+        cache.set_text(asr_key, transcript)
+
+    if target_lang and target_lang.strip():
+        mt_key = translation_key(transcript, target_lang, prov.translate_model)
+        translated = cache.get_text(mt_key)
+        if translated is None:
+            try:
+                translated = call_provider(slots, prov.translate, transcript, target_lang)
+                cache.set_text(mt_key, translated)
+            except Exception as e:
+                _translation_fallback(e)
+                translated = transcript
     else:
-        raise ValueError(f"Unknown provider: {name}")
+        translated = transcript
+    return transcript, translated
 
 
-def _prepare_audio(
-    input_path: str,
+def _checkpointed_segment(checkpoint: Checkpoint, index: int, translated_here: bool, *args) -> Tuple[str, str]:
+    checkpoint.check()
+    with span("segment", index=index):
+        transcript, translated = _process_segment(*args)
+    checkpoint.put_texts(index, transcript, translated if translated_here else None)
+    return transcript, translated
+
+
+async def _aprocess_segment(
+    prov: ASRTranslateProvider,
+    provider: str,
+    slots: asyncio.Semaphore,
+    seg: np.ndarray,
+    sr: int,
+    source_lang: Optional[str],
     target_lang: str,
-    provider: ProviderName,
+) -> Tuple[str, str]:
+    cache = get_cache()
+    asr_key = transcript_key(seg, sr, provider, prov.transcribe_model, source_lang)
+    transcript = cache.get_text(asr_key)
+    if transcript is None:
+        seg_wav = await run_cpu(encode_wav_bytes, seg, sr)
+        transcript = await acall_provider(slots, prov.atranscribe, seg_wav, source_lang=source_lang)
+        cache.set_text(asr_key, transcript)
+
+    if target_lang and target_lang.strip():
+        mt_key = translation_key(transcript, target_lang, prov.translate_model)
+        translated = cache.get_text(mt_key)
+        if translated is None:
+            try:
+                translated = await acall_provider(slots, prov.atranslate, transcript, target_lang)
+                cache.set_text(mt_key, translated)
+            except Exception as e:
+                _translation_fallback(e)
+                translated = transcript
+    else:
+        translated = transcript
+    return transcript, translated
+
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough to keep batched prompts within budget
+    return len(text) // 4 + 1
+
+
+def _translation_batches(texts: List[str]) -> List[List[str]]:
+    batches: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = _estimate_tokens(text)
+        if current and (
+            current_tokens + tokens > settings.translate_batch_max_tokens
+            or len(current) >= settings.translate_batch_max_items
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _batch_translation_enabled(target_lang: str) -> bool:
+    return settings.translate_batch_max_tokens > 0 and bool(target_lang and target_lang.strip())
+
+
+def _pending_translations(prov: ASRTranslateProvider, transcripts: List[str], target_lang: str) -> Tuple[Dict[str, str], Dict[str, str], List[str]]:
+    """Split unique non-empty transcripts into cache hits and texts that still need translating."""
+    cache = get_cache()
+    keys = {t: translation_key(t, target_lang, prov.translate_model) for t in dict.fromkeys(transcripts) if t.strip()}
+    done: Dict[str, str] = {}
+    for text, key in keys.items():
+        hit = cache.get_text(key)
+        if hit is not None:
+            done[text] = hit
+    missing = [t for t in keys if t not in done]
+    return keys, done, missing
+
+
+def _store_batch(keys: Dict[str, str], done: Dict[str, str], batch: List[str], translated: Optional[List[str]]) -> None:
+    if translated is None:
+        # Same fallback as the per-segment path: keep the source text
+        done.update(zip(batch, batch))
+        return
+    cache = get_cache()
+    for text, tr in zip(batch, translated):
+        cache.set_text(keys[text], tr)
+        done[text] = tr
+
+
+def _translate_all(
+    prov: ASRTranslateProvider,
+    slots: threading.BoundedSemaphore,
+    pool: ThreadPoolExecutor,
+    transcripts: List[str],
+    target_lang: str,
+) -> List[str]:
+    """Translate transcripts in token-budgeted batches, skipping cached and duplicate texts."""
+    keys, done, missing = _pending_translations(prov, transcripts, target_lang)
+    batches = _translation_batches(missing)
+    futures = [pool.submit(in_context(call_provider), slots, prov.translate_batch, batch, target_lang) for batch in batches]
+    for batch, fut in zip(batches, futures):
+        try:
+            translated: Optional[List[str]] = fut.result()
+        except Exception as e:
+            _translation_fallback(e, len(batch))
+            translated = None
+        _store_batch(keys, done, batch, translated)
+    return [done.get(t, t) for t in transcripts]
+
+
+async def _atranslate_all(
+    prov: ASRTranslateProvider,
+    slots: asyncio.Semaphore,
+    transcripts: List[str],
+    target_lang: str,
+) -> List[str]:
+    keys, done, missing = _pending_translations(prov, transcripts, target_lang)
+    batches = _translation_batches(missing)
+    results = await asyncio.gather(
+        *[acall_provider(slots, prov.atranslate_batch, batch, target_lang) for batch in batches],
+        return_exceptions=True,
+    )
+    for batch, res in zip(batches, results):
+        if isinstance(res, BaseException):
+            _translation_fallback(res, len(batch))
+        _store_batch(keys, done, batch, None if isinstance(res, BaseException) else res)
+    return [done.get(t, t) for t in transcripts]
+
+
+def _translate_each(
+    prov: ASRTranslateProvider,
+    slots: threading.BoundedSemaphore,
+    pool: ThreadPoolExecutor,
+    transcripts: List[str],
+    target_lang: str,
+) -> List[str]:
+    """Unbatched counterpart of _translate_all: one call per distinct uncached transcript."""
+    keys, done, missing = _pending_translations(prov, transcripts, target_lang)
+    futures = [pool.submit(in_context(call_provider), slots, prov.translate, text, target_lang) for text in missing]
+    for text, fut in zip(missing, futures):
+        try:
+            translated: Optional[List[str]] = [fut.result()]
+        except Exception as e:
+            _translation_fallback(e)
+            translated = None
+        _store_batch(keys, done, [text], translated)
+    return [done.get(t, t) for t in transcripts]
+
+
+async def _atranslate_each(
+    prov: ASRTranslateProvider,
+    slots: asyncio.Semaphore,
+    transcripts: List[str],
+    target_lang: str,
+) -> List[str]:
+    keys, done, missing = _pending_translations(prov, transcripts, target_lang)
+    results = await asyncio.gather(
+        *[acall_provider(slots, prov.atranslate, text, target_lang) for text in missing],
+        return_exceptions=True,
+    )
+    for text, res in zip(missing, results):
+        if isinstance(res, BaseException):
+            _translation_fallback(res)
+        _store_batch(keys, done, [text], None if isinstance(res, BaseException) else [res])
+    return [done.get(t, t) for t in transcripts]
+
+
+def _translate_unsaved(
+    prov: ASRTranslateProvider,
+    slots: threading.BoundedSemaphore,
+    pool: ThreadPoolExecutor,
+    table: SegmentTable,
+    saved: List[Tuple[Optional[str], Optional[str]]],
+    target_lang: str,
+    checkpoint: Checkpoint,
+) -> None:
+    """Batch-translate, in place, every segment whose translation the checkpoint doesn't have yet."""
+    checkpoint.check()
+    transcripts = table.transcripts
+    missing = [i for i, (_, tr) in enumerate(saved) if tr is None]
+    for i, tr in zip(missing, _translate_all(prov, slots, pool, [transcripts[i] for i in missing], target_lang)):
+        table.translations[i] = tr
+        checkpoint.put_texts(i, transcripts[i], tr)
+
+
+def _transcribe_window(
+    prov: ASRTranslateProvider,
+    provider: str,
+    slots: threading.BoundedSemaphore,
+    window: np.ndarray,
+    sr: int,
+    offset_s: float,
+    source_lang: Optional[str],
+) -> List[TimedText]:
+    cache = get_cache()
+    key = transcript_key(window, sr, provider, prov.transcribe_model + "#timestamped", source_lang)
+    hit = cache.get_text(key)
+    if hit is not None:
+        spans = [tuple(span) for span in json.loads(hit)]
+    else:
+        with span("encode"):
+            wav = encode_wav_bytes(window, sr)
+        spans = call_provider(slots, prov.transcribe_timestamped, wav, source_lang=source_lang)
+        cache.set_text(key, json.dumps(spans))
+    return [(float(a) + offset_s, float(b) + offset_s, str(text)) for a, b, text in spans]
+
+
+async def _atranscribe_window(
+    prov: ASRTranslateProvider,
+    provider: str,
+    slots: asyncio.Semaphore,
+    window: np.ndarray,
+    sr: int,
+    offset_s: float,
     source_lang: Optional[str],
+) -> List[TimedText]:
+    cache = get_cache()
+    key = transcript_key(window, sr, provider, prov.transcribe_model + "#timestamped", source_lang)
+    hit = cache.get_text(key)
+    if hit is not None:
+        spans = [tuple(span) for span in json.loads(hit)]
+    else:
+        wav = await run_cpu(encode_wav_bytes, window, sr)
+        spans = await acall_provider(slots, prov.atranscribe_timestamped, wav, source_lang=source_lang)
+        cache.set_text(key, json.dumps(spans))
+    return [(float(a) + offset_s, float(b) + offset_s, str(text)) for a, b, text in spans]
+
+
+def _whole_file_windows(table: SegmentTable) -> List[Tuple[int, int]]:
+    return group_segments_into_windows(table.bounds, table.sample_rate, settings.whole_file_window_s)
+
+
+def _check_strategy(strategy: str) -> None:
+    if strategy not in ("segment", "whole"):
+        raise ValueError(f"Unknown transcription strategy: {strategy}")
+
+
+def _decode_and_segment(
+    input_path: AudioSource,
     vad_top_db: float,
     vad_min_gap_s: float,
-) -> Dict[str, object]:
-    std_wav = ensure_wav(input_path, target_sr=16000)
-    y, sr = load_mono_wav(std_wav, sr=16000)
-    segments, gaps = segment_audio_vad(y, sr, top_db=vad_top_db, min_gap_s=vad_min_gap_s)
+) -> SegmentTable:
+    sr = 16000
+    with span("decode"):
+        y = decode_audio(input_path, target_sr=sr)
+    with span("vad"):
+        segments, gaps = segment_audio_vad(
+            y, sr, top_db=vad_top_db, min_gap_s=vad_min_gap_s, max_segment_s=settings.vad_max_segment_s or None
+        )
+    record_audio(len(y) / sr, len(segments))
+    return SegmentTable.from_vad(segments, gaps, sr, wave=y)
+
 
+# Lowest bitrate a compressed speech input plausibly has (6 kbps Opus), in bytes per second
+_MIN_INPUT_BYTES_PER_S = 750
+
+
+def _use_windowed(input_path: AudioSource, strategy: str) -> bool:
+    if strategy != "segment" or settings.windowed_min_duration_s <= 0:
+        return False
+    duration = audio_duration(input_path)
+    if duration is None:
+        # Length unknown without decoding (an ffmpeg-only format held in memory): only inputs too
+        # small to run that long at any plausible bitrate are decoded whole
+        return source_size(input_path) >= settings.windowed_min_duration_s * _MIN_INPUT_BYTES_PER_S
+    return duration >= settings.windowed_min_duration_s
+
+
+def _prepare_audio_windowed(
+    input_path: AudioSource,
+    target_lang: str,
+    provider: ProviderName,
+    source_lang: Optional[str],
+    vad_top_db: float,
+    vad_min_gap_s: float,
+    checkpoint: Optional[Checkpoint] = None,
+) -> SegmentTable:
+    """
+    Bounded-memory variant of _prepare_audio for long inputs (segment strategy). The input is
+    decoded block by block into the streaming segmenter, whose VAD carries its state across
+    block seams, and at most window_max_pending_segments segments wait on provider calls at
+    once. Segment audio isn't kept, so the returned table has no wave.
+    A first decoding pass measures the input's peak level, the VAD's reference, so segments
+    are exactly those _decode_and_segment would produce. The one difference: without
+    VAD_MAX_SEGMENT_S, voiced regions are still split at 30 s to keep the open segment bounded.
+    """
+    cp = checkpoint or _NO_CHECKPOINT
+    sr = 16000
+    with span("decode"):
+        ref = peak_frame_power(iter_audio_blocks(input_path, sr, settings.window_block_s))
+    if not isinstance(input_path, (str, bytes)):
+        input_path.seek(0)
+    segmenter = StreamingSegmenter(
+        sr, top_db=vad_top_db, min_gap_s=vad_min_gap_s, max_segment_s=settings.vad_max_segment_s or 30.0, ref=ref
+    )
     prov = _get_provider(provider)
+    slots = _get_provider_slots(provider)
+    translate_after = _batch_translation_enabled(target_lang)
+    segment_target = "" if translate_after else target_lang
+    max_pending = max(1, settings.window_max_pending_segments)
+
     transcripts: List[str] = []
     translations: List[str] = []
+    lengths: List[int] = []
+    gaps: List[float] = []
+    saved: List[Tuple[Optional[str], Optional[str]]] = []
+    pending: "deque[Union[Future[Tuple[str, str]], Tuple[Optional[str], Optional[str]]]]" = deque()
+
+    def collect() -> None:
+        item = pending.popleft()
+        transcript, translated = item.result() if isinstance(item, Future) else item
+        transcripts.append(transcript or "")
+        translations.append(translated if translated is not None else transcript or "")
+
+    with ThreadPoolExecutor(max_workers=_provider_concurrency(provider)) as pool:
+        def submit(seg: np.ndarray, gap: float) -> None:
+            i = len(saved)
+            lengths.append(len(seg))
+            gaps.append(gap)
+            saved.append(cp.get_texts(i))
+            if saved[i][0] is not None and (translate_after or saved[i][1] is not None):
+                pending.append(saved[i])
+            else:
+                pending.append(pool.submit(
+                    in_context(_checkpointed_segment), cp, i, not translate_after,
+                    prov, provider, slots, seg, sr, source_lang, segment_target,
+                ))
+            while len(pending) > max_pending:
+                collect()
 
-    for (s, e) in segments:
-        seg = y[s:e]
-        seg_path = save_chunk_to_wav(seg, sr)
         try:
-            transcript = prov.transcribe(seg_path, source_lang=source_lang)
-        finally:
-            try:
-                os.remove(seg_path)
-            except Exception:
-                pass
-        transcripts.append(transcript)
+            blocks = iter_audio_blocks(input_path, sr, settings.window_block_s)
+            total_samples = 0
+            while True:
+                with span("decode"):
+                    block = next(blocks, None)
+                if block is None:
+                    break
+                total_samples += len(block)
+                with span("vad"):
+                    segments = segmenter.feed(block)
+                for seg, gap in segments:
+                    submit(seg, gap)
+            tail, trailing = segmenter.flush()
+            for seg, gap in tail:
+                submit(seg, gap)
+            while pending:
+                collect()
+        except Exception:
+            for item in pending:
+                if isinstance(item, Future):
+                    item.cancel()
+            raise
+        gaps.append(trailing)
+        record_audio(total_samples / sr, len(transcripts))
+        cp.start(len(transcripts))
+        table = SegmentTable.from_lengths(lengths, gaps, sr, transcripts, translations)
+        if translate_after:
+            _translate_unsaved(prov, slots, pool, table, saved, target_lang, cp)
+    return table
+
 
-        if target_lang and target_lang.strip():
+def _prepare_audio(
+    input_path: AudioSource,
+    target_lang: str,
+    provider: ProviderName,
+    source_lang: Optional[str],
+    vad_top_db: float,
+    vad_min_gap_s: float,
+    strategy: TranscriptionStrategy = "segment",
+    checkpoint: Optional[Checkpoint] = None,
+) -> SegmentTable:
+    _check_strategy(strategy)
+    if _use_windowed(input_path, strategy):
+        return _prepare_audio_windowed(input_path, target_lang, provider, source_lang, vad_top_db, vad_min_gap_s, checkpoint)
+    cp = checkpoint or _NO_CHECKPOINT
+    table = _decode_and_segment(input_path, vad_top_db, vad_min_gap_s)
+    y, sr, n = table.wave, table.sample_rate, len(table)
+    cp.start(n)
+    saved = [cp.get_texts(i) for i in range(n)]
+
+    prov = _get_provider(provider)
+    slots = _get_provider_slots(provider)
+    # With batching (or whole-file transcription) segments are translated together afterwards
+    translate_after = _batch_translation_enabled(target_lang) or (strategy == "whole" and bool(target_lang.strip()))
+    segment_target = "" if translate_after else target_lang
+    workers = min(_provider_concurrency(provider), max(1, n))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if strategy == "whole":
+            if n and all(t is not None for t, _ in saved):
+                table.transcripts = [t or "" for t, _ in saved]
+            else:
+                cp.check()
+                futures = [
+                    pool.submit(in_context(_transcribe_window), prov, provider, slots, y[s:e], sr, s / sr, source_lang)
+                    for (s, e) in _whole_file_windows(table)
+                ]
+                spans: List[TimedText] = []
+                for fut in futures:
+                    spans.extend(fut.result())
+                table.transcripts = align_spans_to_segments(spans, table.bounds, sr)
+                saved = [(t, None) for t in table.transcripts]
+                for i, t in enumerate(table.transcripts):
+                    cp.put_texts(i, t)
+            table.translations = list(table.transcripts)
+        else:
+            # Segments are fanned out concurrently; futures are collected in segment order.
+            # Segments already recorded by the checkpoint are reused as they are.
+            pending: List[Union[Future[Tuple[str, str]], Tuple[Optional[str], Optional[str]]]] = [
+                saved[i] if saved[i][0] is not None and (translate_after or saved[i][1] is not None)
+                else pool.submit(
+                    in_context(_checkpointed_segment), cp, i, not translate_after,
+                    prov, provider, slots, table.audio(i), sr, source_lang, segment_target,
+                )
+                for i in range(n)
+            ]
             try:
-                translated = prov.translate(transcript, target_lang)
+                for i, item in enumerate(pending):
+                    transcript, translated = item.result() if isinstance(item, Future) else item
+                    table.transcripts[i] = transcript or ""
+                    table.translations[i] = translated if translated is not None else transcript or ""
             except Exception:
-                translated = transcript
-        else:
-            translated = transcript
-        translations.append(translated)
+                for item in pending:
+                    if isinstance(item, Future):
+                        item.cancel()
+                raise
+        if translate_after:
+            _translate_unsaved(prov, slots, pool, table, saved, target_lang, cp)
+    return table
+
+
+async def _aprepare_audio(
+    input_path: AudioSource,
+    target_lang: str,
+    provider: ProviderName,
+    source_lang: Optional[str],
+    vad_top_db: float,
+    vad_min_gap_s: float,
+    strategy: TranscriptionStrategy = "segment",
+) -> SegmentTable:
+    _check_strategy(strategy)
+    if await run_cpu(_use_windowed, input_path, strategy):
+        # Runs for as long as the recording takes to transcribe, so it gets its own thread
+        # rather than holding a CPU executor slot
+        return await asyncio.to_thread(
+            _prepare_audio_windowed, input_path, target_lang, provider, source_lang, vad_top_db, vad_min_gap_s
+        )
+    table = await run_cpu(_decode_and_segment, input_path, vad_top_db, vad_min_gap_s)
+    y, sr = table.wave, table.sample_rate
+
+    prov = _get_provider(provider)
+    slots = _get_async_provider_slots(provider)
+    translate_after = _batch_translation_enabled(target_lang) or (strategy == "whole" and bool(target_lang.strip()))
+    segment_target = "" if translate_after else target_lang
+    if strategy == "whole":
+        window_spans = await asyncio.gather(*[
+            _atranscribe_window(prov, provider, slots, y[s:e], sr, s / sr, source_lang)
+            for (s, e) in _whole_file_windows(table)
+        ])
+        spans = [span for window in window_spans for span in window]
+        table.transcripts = align_spans_to_segments(spans, table.bounds, sr)
+        table.translations = list(table.transcripts)
+    else:
+        results = await asyncio.gather(*[
+            _aprocess_segment(prov, provider, slots, table.audio(i), sr, source_lang, segment_target)
+            for i in range(len(table))
+        ])
+        table.transcripts = [t for t, _ in results]
+        table.translations = [t for _, t in results]
+
+    if translate_after:
+        table.translations = await _atranslate_all(prov, slots, table.transcripts, target_lang)
+    return table
+
+
+def _synthesize_fallback(text: str, tts_speaker_wav: Optional[str], error: Exception) -> Tuple[np.ndarray, int]:
+    # Retried in English, unless the TTS server timed out, which it would only do again
+    if not isinstance(error, TimeoutError):
+        try:
+            return get_tts_scheduler().synthesize(text, language="en", speaker_wav=tts_speaker_wav)
+        except Exception:
+            pass
+    return np.zeros(int(0.2 * 24000), dtype=np.float32), 24000
+
+
+def _iter_synthesized(
+    texts: List[str],
+    target_lang: str,
+    tts_speaker_wav: Optional[str],
+    checkpoint: Optional[Checkpoint] = None,
+) -> Iterator[Tuple[np.ndarray, int]]:
+    """
+    Synthesize all segments through the shared TTS scheduler, yielding them in order as they
+    complete. Uncached segments are queued together up front so the workers can batch them
+    alongside segments from other requests.
+    """
+    cp = checkpoint or _NO_CHECKPOINT
+    cache = get_cache()
+    scheduler = get_tts_scheduler()
+    language = target_lang or "en"
+    keys = [tts_key(text, language, tts_speaker_wav) for text in texts]
+    pending: List[Union[Future[Tuple[np.ndarray, int]], Tuple[np.ndarray, int]]] = []
+    for i, (text, key) in enumerate(zip(texts, keys)):
+        saved = cp.get_audio(i)
+        if saved is not None:
+            pending.append(saved)
+            continue
+        hit = cache.get(key)
+        pending.append(unpack_audio(hit) if hit is not None else scheduler.submit(text, language, tts_speaker_wav))
+
+    for i, (text, key, item) in enumerate(zip(texts, keys, pending)):
+        if not isinstance(item, Future):
+            yield item
+            continue
+        cp.check()
+        try:
+            with span("tts", index=i):
+                wav, wav_sr = item.result()
+            cache.set(key, pack_audio(wav, wav_sr))
+        except Exception as e:
+            wav, wav_sr = _synthesize_fallback(text, tts_speaker_wav, e)
+        cp.put_audio(i, wav, wav_sr)
+        yield wav, wav_sr
+
+
+def _synthesize_segments(
+    texts: List[str],
+    target_lang: str,
+    tts_speaker_wav: Optional[str],
+    checkpoint: Optional[Checkpoint] = None,
+) -> List[Tuple[np.ndarray, int]]:
+    return list(_iter_synthesized(texts, target_lang, tts_speaker_wav, checkpoint))
+
+
+def _synthesize_segment(text: str, target_lang: str, tts_speaker_wav: Optional[str]) -> Tuple[np.ndarray, int]:
+    return _synthesize_segments([text], target_lang, tts_speaker_wav)[0]
+
+
+def _iter_output(
+    table: SegmentTable,
+    target_lang: str,
+    tts_speaker_wav: Optional[str],
+    checkpoint: Optional[Checkpoint] = None,
+    align: bool = False,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    The output track as (sample_rate, samples) pieces in order: each synthesized segment with
+    its preceding pause, then the trailing silence. Same samples as assemble_with_pauses over
+    all segments, without ever holding the whole track. The output rate is that of the first
+    segment, since pieces go out before the later segments exist.
+    With align, segments are fitted to their source timing instead (see _iter_aligned_output).
+    """
+    synthesized = _iter_synthesized(table.translations, target_lang, tts_speaker_wav, checkpoint)
+    if align:
+        yield from _iter_aligned_output(table, synthesized)
+        return
+    out_sr: Optional[int] = None
+    gaps = table.rows["gap"]
+    for i, (wav, wav_sr) in enumerate(synthesized):
+        if out_sr is None:
+            out_sr = wav_sr
+        with span("assemble"):
+            piece = assemble_with_pauses([wav], [wav_sr], [float(gaps[i]), 0.0], target_sr=out_sr)
+        yield out_sr, piece
+    out_sr = out_sr or 24000
+    yield out_sr, np.zeros(int(out_sr * table.trailing_gap), dtype=np.float32)
+
+
+def _iter_aligned_output(table: SegmentTable, synthesized: Iterator[Tuple[np.ndarray, int]]) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Output pieces with every segment placed at its source position by TimeAligner, so the track
+    is as long as the input (unless the last segments overrun even after compression). Each
+    piece is one buffer allocated at its final size: the silence up to the segment's start,
+    with the fitted segment written into its tail.
+    """
+    out_sr: Optional[int] = None
+    aligner: Optional[TimeAligner] = None
+    written = 0
+    for i, (wav, wav_sr) in enumerate(synthesized):
+        if aligner is None:
+            out_sr = wav_sr
+            aligner = TimeAligner(
+                table.start_s, table.end_s, table.duration_s, out_sr,
+                tolerance=settings.align_tolerance,
+                max_stretch=settings.align_max_stretch,
+                min_gap_s=settings.align_min_gap_s,
+                method=settings.time_stretch_method,
+            )
+        with span("align", index=i):
+            pos, fitted = aligner.fit(i, resample(wav, wav_sr, aligner.sr))
+        piece = np.zeros(pos + len(fitted) - written, dtype=np.float32)
+        piece[pos - written:] = fitted
+        written = pos + len(fitted)
+        yield aligner.sr, piece
+    out_sr = out_sr or 24000
+    total = aligner.total if aligner is not None else int(round(table.duration_s * out_sr))
+    yield out_sr, np.zeros(max(0, total - written), dtype=np.float32)
+
+
+def _write_pieces(
+    path: str, pieces: Iterator[Tuple[int, np.ndarray]], output_format: str = "wav", bitrate_kbps: Optional[float] = None
+) -> None:
+    out: Optional[AudioFileWriter] = None
+    try:
+        for out_sr, piece in pieces:
+            if out is None:
+                out = AudioFileWriter(path, output_format, out_sr, bitrate_kbps)
+            with span("encode"):
+                out.write(piece)
+    finally:
+        if out is not None:
+            with span("encode"):
+                out.close()
+
+
+def _synthesize_to_file(
+    table: SegmentTable,
+    target_lang: str,
+    tts_speaker_wav: Optional[str],
+    checkpoint: Optional[Checkpoint] = None,
+    align: bool = False,
+    output_format: str = "wav",
+    bitrate_kbps: Optional[float] = None,
+) -> str:
+    fd, out_path = tempfile.mkstemp(suffix=check_output_format(output_format).extension)
+    os.close(fd)
+    try:
+        # Encoded piece by piece so memory doesn't grow with the length of the output
+        pieces = _iter_output(table, target_lang, tts_speaker_wav, checkpoint, align)
+        _write_pieces(out_path, pieces, output_format, bitrate_kbps)
+    except Exception:
+        os.remove(out_path)
+        raise
+    return out_path
+
+
+def _iter_encoded_stream(
+    table: SegmentTable,
+    target_lang: str,
+    tts_speaker_wav: Optional[str],
+    align: bool = False,
+    output_format: str = "wav",
+    bitrate_kbps: Optional[float] = None,
+) -> Iterator[bytes]:
+    """
+    Streaming counterpart of _synthesize_to_file: each piece is encoded as soon as it is
+    synthesized and whatever bytes the encoder has ready go out (for WAV, a header first).
+    """
+    encoder: Optional[StreamEncoder] = None
+    try:
+        for out_sr, piece in _iter_output(table, target_lang, tts_speaker_wav, align=align):
+            if encoder is None:
+                encoder = make_stream_encoder(output_format, out_sr, bitrate_kbps)
+            with span("encode"):
+                data = encoder.encode(piece)
+            if data:
+                yield data
+        if encoder is not None:
+            with span("encode"):
+                data = encoder.finish()
+            if data:
+                yield data
+    finally:
+        if encoder is not None:
+            encoder.close()
+
+
+def text_result(columns: Dict[str, Any]) -> Dict[str, object]:
+    """
+    The text conversion payload from a SegmentTable.to_dict() form: the joined translation and
+    transcript, and segments[] (segment_rows).
+    """
+    transcripts, translations = columns["transcript"], columns["translation"]
+    translation_text = " ".join(t.strip() for t in translations if t and t.strip()).strip()
+    transcript_text = " ".join(t.strip() for t in transcripts if t and t.strip()).strip()
+
+    if not translation_text:
+        translation_text = transcript_text
 
     return {
-        "std_wav": std_wav,
-        "wave": y,
-        "sample_rate": sr,
-        "segments": segments,
-        "gaps": gaps,
-        "transcripts": transcripts,
-        "translations": translations,
+        "translation": translation_text or "",
+        "transcript": transcript_text or "",
+        "segments": segment_rows(columns),
     }
 
 
+def _build_text_result(table: SegmentTable) -> Dict[str, object]:
+    return text_result(table.to_dict())
+
+
+def _align(align: Optional[bool]) -> bool:
+    return settings.tts_align if align is None else align
+
+
+def _bitrate(bitrate_kbps: Optional[float]) -> Optional[float]:
+    return (settings.output_bitrate_kbps or None) if bitrate_kbps is None else bitrate_kbps
+
+
+def _clone_reference(table: SegmentTable, input_path: AudioSource) -> Optional[str]:
+    """
+    For clone_voice: a speaker reference picked from the input's own voiced segments
+    (select_reference), as a temporary WAV; None if no segment is usable. Windowed tables keep
+    no wave, so the first VOICE_SCAN_S of the input is decoded again to find it.
+    """
+    with span("voice"):
+        y, bounds = table.wave, table.bounds
+        if y is None:
+            y = decode_head(input_path, table.sample_rate, settings.voice_scan_s)
+            bounds = bounds[bounds[:, 1] <= len(y)]
+        reference = select_reference(y, table.sample_rate, bounds, settings.voice_reference_s)
+    if not len(reference):
+        logger.warning("clone_voice: no usable voiced segment in the input, using the default voice")
+        return None
+    fd, path = tempfile.mkstemp(suffix=".wav")
+    with os.fdopen(fd, "wb") as f:
+        f.write(encode_wav_bytes(reference, table.sample_rate))
+    return path
+
+
+def _remove_reference(path: Optional[str]) -> None:
+    if path:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _removing_reference(chunks: Iterator[bytes], path: Optional[str]) -> Iterator[bytes]:
+    try:
+        yield from chunks
+    finally:
+        _remove_reference(path)
+
+
 def convert_audio(
-    input_path: str,
+    input_path: AudioSource,
     target_lang: str,
     provider: ProviderName = "gemini",
     source_lang: Optional[str] = None,
     vad_top_db: float = 30.0,
     vad_min_gap_s: float = 0.25,
     tts_speaker_wav: Optional[str] = None,
+    strategy: TranscriptionStrategy = "segment",
+    checkpoint: Optional[Checkpoint] = None,
+    align: Optional[bool] = None,
+    output_format: str = "wav",
+    bitrate_kbps: Optional[float] = None,
+    clone_voice: bool = False,
 ) -> str:
     """
-    Convert speech audio to target language while preserving pauses.
-    Returns a path to a temporary WAV file containing the synthesized speech.
+    Convert speech audio (a file path, the encoded file bytes or a file object) to target language while preserving pauses.
+    Returns a path to a temporary file containing the synthesized speech, encoded as
+    output_format (see OUTPUT_FORMATS) at about bitrate_kbps for the lossy formats.
+    strategy selects per-segment or whole-file transcription (see TranscriptionStrategy);
+    checkpoint records per-segment results so an interrupted run can resume; align fits each
+    segment to its source timing (default TTS_ALIGN). The voice is tts_speaker_wav's, or with
+    clone_voice that of the input's own speaker (a reference extracted from its segments).
     """
-    prep = _prepare_audio(
+    check_output_format(output_format)
+    table = _prepare_audio(
         input_path=input_path,
         target_lang=target_lang,
         provider=provider,
         source_lang=source_lang,
         vad_top_db=vad_top_db,
         vad_min_gap_s=vad_min_gap_s,
+        strategy=strategy,
+        checkpoint=checkpoint,
     )
+    reference = _clone_reference(table, input_path) if clone_voice else None
+    try:
+        return _synthesize_to_file(
+            table, target_lang, reference or tts_speaker_wav, checkpoint, _align(align), output_format, _bitrate(bitrate_kbps)
+        )
+    finally:
+        _remove_reference(reference)
+
 
+async def aconvert_audio(
+    input_path: AudioSource,
+    target_lang: str,
+    provider: ProviderName = "gemini",
+    source_lang: Optional[str] = None,
+    vad_top_db: float = 30.0,
+    vad_min_gap_s: float = 0.25,
+    tts_speaker_wav: Optional[str] = None,
+    strategy: TranscriptionStrategy = "segment",
+    align: Optional[bool] = None,
+    output_format: str = "wav",
+    bitrate_kbps: Optional[float] = None,
+    clone_voice: bool = False,
+) -> str:
+    """
+    Async variant of convert_audio. Provider calls run natively on the event loop;
+    decode, VAD and TTS run on the CPU executor so the loop stays responsive.
+    """
+    check_output_format(output_format)
+    table = await _aprepare_audio(
+        input_path=input_path,
+        target_lang=target_lang,
+        provider=provider,
+        source_lang=source_lang,
+        vad_top_db=vad_top_db,
+        vad_min_gap_s=vad_min_gap_s,
+        strategy=strategy,
+    )
+    reference = await run_cpu(_clone_reference, table, input_path) if clone_voice else None
+    speaker = reference or tts_speaker_wav
     try:
-        translations: List[str] = prep["translations"]  # type: ignore[assignment]
-        gaps: List[float] = prep["gaps"]  # type: ignore[assignment]
+        return await run_cpu(
+            _synthesize_to_file, table, target_lang, speaker, None, _align(align), output_format, _bitrate(bitrate_kbps)
+        )
+    finally:
+        _remove_reference(reference)
 
-        tts = CoquiTTS()
-        seg_audios: list[np.ndarray] = []
-        seg_srs: list[int] = []
 
-        for translated in translations:
-            try:
-                wav, wav_sr = tts.synthesize(translated, language=target_lang or "en", speaker_wav=tts_speaker_wav)
-            except Exception:
-                try:
-                    wav, wav_sr = tts.synthesize(translated, language="en", speaker_wav=tts_speaker_wav)
-                except Exception:
-                    wav = np.zeros(int(0.2 * 24000), dtype=np.float32)
-                    wav_sr = 24000
-            seg_audios.append(wav)
-            seg_srs.append(wav_sr)
-
-        if seg_audios:
-            chosen_sr = max(set(seg_srs), key=seg_srs.count) if seg_srs else 24000
-            final = assemble_with_pauses(seg_audios, seg_srs, gaps_seconds=gaps, target_sr=chosen_sr)
-        else:
-            final = np.zeros(1, dtype=np.float32)
-            chosen_sr = 24000
+async def aconvert_audio_stream(
+    input_path: AudioSource,
+    target_lang: str,
+    provider: ProviderName = "gemini",
+    source_lang: Optional[str] = None,
+    vad_top_db: float = 30.0,
+    vad_min_gap_s: float = 0.25,
+    tts_speaker_wav: Optional[str] = None,
+    strategy: TranscriptionStrategy = "segment",
+    align: Optional[bool] = None,
+    output_format: str = "wav",
+    bitrate_kbps: Optional[float] = None,
+    clone_voice: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Like aconvert_audio, but returns the encoded audio as an async iterator of chunks produced
+    while synthesis is still running. ASR and translation finish before this returns, so their
+    errors are raised here rather than mid-stream.
+    """
+    check_output_format(output_format)
+    table = await _aprepare_audio(
+        input_path=input_path,
+        target_lang=target_lang,
+        provider=provider,
+        source_lang=source_lang,
+        vad_top_db=vad_top_db,
+        vad_min_gap_s=vad_min_gap_s,
+        strategy=strategy,
+    )
+    reference = await run_cpu(_clone_reference, table, input_path) if clone_voice else None
+    speaker = reference or tts_speaker_wav
+    pieces = _iter_encoded_stream(table, target_lang, speaker, _align(align), output_format, _bitrate(bitrate_kbps))
+    return iterate_cpu(_removing_reference(pieces, reference))
 
-        out_sr = chosen_sr
 
-        fd, out_path = tempfile.mkstemp(suffix=".wav")
-        os.close(fd)
-        sf.write(out_path, final, out_sr, subtype="PCM_16")
-        return out_path
-    finally:
-        std_wav: str = prep["std_wav"]  # type: ignore[assignment]
-        try:
-            os.remove(std_wav)
-        except Exception:
-            pass
+def convert_audio_to_table(
+    input_path: AudioSource,
+    target_lang: str,
+    provider: ProviderName = "gemini",
+    source_lang: Optional[str] = None,
+    vad_top_db: float = 30.0,
+    vad_min_gap_s: float = 0.25,
+    strategy: TranscriptionStrategy = "segment",
+    checkpoint: Optional[Checkpoint] = None,
+) -> SegmentTable:
+    """The segments of convert_audio_to_text, transcribed and translated, before they are joined."""
+    return _prepare_audio(
+        input_path=input_path,
+        target_lang=target_lang,
+        provider=provider,
+        source_lang=source_lang,
+        vad_top_db=vad_top_db,
+        vad_min_gap_s=vad_min_gap_s,
+        strategy=strategy,
+        checkpoint=checkpoint,
+    )
 
 
 def convert_audio_to_text(
-    input_path: str,
+    input_path: AudioSource,
+    target_lang: str,
+    provider: ProviderName = "gemini",
+    source_lang: Optional[str] = None,
+    vad_top_db: float = 30.0,
+    vad_min_gap_s: float = 0.25,
+    strategy: TranscriptionStrategy = "segment",
+    checkpoint: Optional[Checkpoint] = None,
+) -> Dict[str, object]:
+    return _build_text_result(
+        convert_audio_to_table(input_path, target_lang, provider, source_lang, vad_top_db, vad_min_gap_s, strategy, checkpoint)
+    )
+
+
+async def aconvert_audio_to_text(
+    input_path: AudioSource,
     target_lang: str,
     provider: ProviderName = "gemini",
     source_lang: Optional[str] = None,
     vad_top_db: float = 30.0,
     vad_min_gap_s: float = 0.25,
+    strategy: TranscriptionStrategy = "segment",
 ) -> Dict[str, object]:
-    prep = _prepare_audio(
+    table = await _aprepare_audio(
         input_path=input_path,
         target_lang=target_lang,
         provider=provider,
         source_lang=source_lang,
         vad_top_db=vad_top_db,
         vad_min_gap_s=vad_min_gap_s,
+        strategy=strategy,
     )
+    return _build_text_result(table)
 
-    try:
-        transcripts: List[str] = prep["transcripts"]  # type: ignore[assignment]
-        translations: List[str] = prep["translations"]  # type: ignore[assignment]
-
-        translation_text = " ".join(t.strip() for t in translations if t and t.strip()).strip()
-        transcript_text = " ".join(t.strip() for t in transcripts if t and t.strip()).strip()
-
-        if not translation_text:
-            translation_text = transcript_text
-
-        segments_payload = [
-            {
-                "transcript": transcripts[i],
-                "translation": translations[i],
-            }
-            for i in range(len(translations))
-        ]
-
-        return {
-            "translation": translation_text or "",
-            "transcript": transcript_text or "",
-            "segments": segments_payload,
+
+def _target_languages(target_langs: List[str]) -> List[str]:
+    langs = list(dict.fromkeys(lang.strip() for lang in target_langs if lang and lang.strip()))
+    if not langs:
+        raise ValueError("At least one target language is required")
+    return langs
+
+
+def _prepare_languages(
+    input_path: AudioSource,
+    target_langs: List[str],
+    provider: ProviderName,
+    source_lang: Optional[str],
+    vad_top_db: float,
+    vad_min_gap_s: float,
+    strategy: TranscriptionStrategy = "segment",
+) -> Dict[str, SegmentTable]:
+    """
+    Decode, segment and transcribe once, then translate the transcripts into every target
+    language concurrently. The per-language tables share the rows, transcripts and wave.
+    """
+    langs = _target_languages(target_langs)
+    table = _prepare_audio(input_path, "", provider, source_lang, vad_top_db, vad_min_gap_s, strategy)
+    prov = _get_provider(provider)
+    slots = _get_provider_slots(provider)
+    workers = min(_provider_concurrency(provider), max(1, len(table) * len(langs)))
+    # Each language's calls queue on one shared pool; the outer threads only wait on them
+    with ThreadPoolExecutor(max_workers=workers) as pool, ThreadPoolExecutor(max_workers=len(langs)) as fan_out:
+        futures = {
+            lang: fan_out.submit(
+                in_context(_translate_all if _batch_translation_enabled(lang) else _translate_each),
+                prov, slots, pool, table.transcripts, lang,
+            )
+            for lang in langs
         }
+        return {lang: table.with_translations(fut.result()) for lang, fut in futures.items()}
+
+
+async def _aprepare_languages(
+    input_path: AudioSource,
+    target_langs: List[str],
+    provider: ProviderName,
+    source_lang: Optional[str],
+    vad_top_db: float,
+    vad_min_gap_s: float,
+    strategy: TranscriptionStrategy = "segment",
+) -> Dict[str, SegmentTable]:
+    langs = _target_languages(target_langs)
+    table = await _aprepare_audio(input_path, "", provider, source_lang, vad_top_db, vad_min_gap_s, strategy)
+    prov = _get_provider(provider)
+    slots = _get_async_provider_slots(provider)
+    translations = await asyncio.gather(*[
+        (_atranslate_all if _batch_translation_enabled(lang) else _atranslate_each)(prov, slots, table.transcripts, lang)
+        for lang in langs
+    ])
+    return {lang: table.with_translations(tr) for lang, tr in zip(langs, translations)}
+
+
+def _collect_outputs(langs: List[str], results: List[Union[str, BaseException]]) -> Dict[str, str]:
+    """WAV path per language; if any language failed, the others' outputs are removed and its error raised."""
+    errors = [res for res in results if isinstance(res, BaseException)]
+    if errors:
+        for res in results:
+            if isinstance(res, str):
+                os.remove(res)
+        raise errors[0]
+    return {lang: res for lang, res in zip(langs, results) if isinstance(res, str)}
+
+
+def convert_audio_multi(
+    input_path: AudioSource,
+    target_langs: List[str],
+    provider: ProviderName = "gemini",
+    source_lang: Optional[str] = None,
+    vad_top_db: float = 30.0,
+    vad_min_gap_s: float = 0.25,
+    tts_speaker_wav: Optional[str] = None,
+    strategy: TranscriptionStrategy = "segment",
+    align: Optional[bool] = None,
+    output_format: str = "wav",
+    bitrate_kbps: Optional[float] = None,
+    clone_voice: bool = False,
+) -> Dict[str, str]:
+    """
+    convert_audio into several target languages at once. Decoding, VAD and transcription run
+    once; translation and synthesis run per language in parallel. Returns an output path per language.
+    """
+    check_output_format(output_format)
+    tables = _prepare_languages(input_path, target_langs, provider, source_lang, vad_top_db, vad_min_gap_s, strategy)
+    # One reference for every language: the tables share the input's segments and wave
+    reference = _clone_reference(next(iter(tables.values())), input_path) if clone_voice else None
+    speaker = reference or tts_speaker_wav
+    try:
+        # Every language's segments are queued on the TTS scheduler together, so they share batches
+        with ThreadPoolExecutor(max_workers=len(tables)) as fan_out:
+            futures = [
+                fan_out.submit(
+                    in_context(_synthesize_to_file), table, lang, speaker, None, _align(align), output_format, _bitrate(bitrate_kbps)
+                )
+                for lang, table in tables.items()
+            ]
+            return _collect_outputs(list(tables), [fut.exception() or fut.result() for fut in futures])
     finally:
-        std_wav: str = prep["std_wav"]  # type: ignore[assignment]
-        try:
-            os.remove(std_wav)
-        except Exception:
-            pass
+        _remove_reference(reference)
+
+
+async def aconvert_audio_multi(
+    input_path: AudioSource,
+    target_langs: List[str],
+    provider: ProviderName = "gemini",
+    source_lang: Optional[str] = None,
+    vad_top_db: float = 30.0,
+    vad_min_gap_s: float = 0.25,
+    tts_speaker_wav: Optional[str] = None,
+    strategy: TranscriptionStrategy = "segment",
+    align: Optional[bool] = None,
+    output_format: str = "wav",
+    bitrate_kbps: Optional[float] = None,
+    clone_voice: bool = False,
+) -> Dict[str, str]:
+    """Async variant of convert_audio_multi."""
+    check_output_format(output_format)
+    tables = await _aprepare_languages(input_path, target_langs, provider, source_lang, vad_top_db, vad_min_gap_s, strategy)
+    reference = await run_cpu(_clone_reference, next(iter(tables.values())), input_path) if clone_voice else None
+    speaker = reference or tts_speaker_wav
+    try:
+        results = await asyncio.gather(
+            *[
+                run_cpu(_synthesize_to_file, table, lang, speaker, None, _align(align), output_format, _bitrate(bitrate_kbps))
+                for lang, table in tables.items()
+            ],
+            return_exceptions=True,
+        )
+    finally:
+        _remove_reference(reference)
+    return _collect_outputs(list(tables), results)
+
+
+def convert_audio_to_text_multi(
+    input_path: AudioSource,
+    target_langs: List[str],
+    provider: ProviderName = "gemini",
+    source_lang: Optional[str] = None,
+    vad_top_db: float = 30.0,
+    vad_min_gap_s: float = 0.25,
+    strategy: TranscriptionStrategy = "segment",
+) -> Dict[str, Dict[str, object]]:
+    """convert_audio_to_text into several target languages, transcribing once. Returns a result per language."""
+    tables = _prepare_languages(input_path, target_langs, provider, source_lang, vad_top_db, vad_min_gap_s, strategy)
+    return {lang: _build_text_result(table) for lang, table in tables.items()}
+
+
+async def aconvert_audio_to_text_multi(
+    input_path: AudioSource,
+    target_langs: List[str],
+    provider: ProviderName = "gemini",
+    source_lang: Optional[str] = None,
+    vad_top_db: float = 30.0,
+    vad_min_gap_s: float = 0.25,
+    strategy: TranscriptionStrategy = "segment",
+) -> Dict[str, Dict[str, object]]:
+    tables = await _aprepare_languages(input_path, target_langs, provider, source_lang, vad_top_db, vad_min_gap_s, strategy)
+    return {lang: _build_text_result(table) for lang, table in tables.items()}
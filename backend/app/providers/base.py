@@ -1,15 +1,188 @@
 from __future__ import annotations
+import asyncio
+import json
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import List, Optional, Tuple, Union
+
+# A path to an audio file, or the encoded file contents (e.g. in-memory WAV bytes)
+AudioInput = Union[str, bytes]
+# (start_seconds, end_seconds, text) relative to the start of the audio
+TimedText = Tuple[float, float, str]
+
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class ProviderError(RuntimeError):
+    """
+    A failed provider call. `retryable` marks transient failures (rate limits, server errors,
+    timeouts, dropped connections); `retry_after` is the server's requested wait in seconds, if any.
+    """
+
+    def __init__(self, message: str, retryable: bool = False, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.status = status
+        self.retry_after = retry_after
+
+
+def _error_status(e: BaseException) -> Optional[int]:
+    # openai.APIStatusError has status_code; google.api_core exceptions carry the HTTP status as code
+    for attr in ("status_code", "code"):
+        value = getattr(e, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def _retry_after(e: BaseException) -> Optional[float]:
+    headers = getattr(getattr(e, "response", None), "headers", None)
+    try:
+        return float(headers.get("retry-after")) if headers is not None and headers.get("retry-after") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def provider_error(message: str, e: BaseException) -> ProviderError:
+    """Wrap an SDK exception, classifying it as retryable from its status code or type."""
+    status = _error_status(e)
+    kind = type(e).__name__
+    retryable = (
+        status in RETRYABLE_STATUS
+        or isinstance(e, (TimeoutError, ConnectionError))
+        or any(word in kind for word in ("Timeout", "Connection", "Unavailable", "ResourceExhausted"))
+    )
+    return ProviderError(f"{message}: {e}", retryable=retryable, status=status, retry_after=_retry_after(e))
+
+
+def read_audio_bytes(audio: AudioInput) -> bytes:
+    if isinstance(audio, (bytes, bytearray)):
+        return bytes(audio)
+    with open(audio, "rb") as f:
+        return f.read()
+
+
+def batch_translate_prompt(texts: List[str], target_lang: str) -> str:
+    return (
+        "Translate each string in the following JSON array into the target language specified. "
+        "Return ONLY a JSON array of strings with exactly the same number of items, in the same order, "
+        "with no extra commentary.\n\n"
+        f"Target language code or name: {target_lang}\n"
+        f"Texts: {json.dumps(texts, ensure_ascii=False)}"
+    )
+
+
+def parse_batch_translation(raw: Optional[str], expected: int) -> Optional[List[str]]:
+    """Parse a batched reply; None when it isn't a JSON array of `expected` strings."""
+    if raw is None:
+        return None
+    raw = raw.strip()
+    if raw.startswith("```"):
+        raw = raw.strip("`")
+        raw = raw[raw.find("["):] if "[" in raw else raw
+    try:
+        items = json.loads(raw)
+    except ValueError:
+        return None
+    if not isinstance(items, list) or len(items) != expected or not all(isinstance(i, str) for i in items):
+        return None
+    return [i.strip() for i in items]
+
+
+def parse_timed_spans(raw: Optional[str]) -> List[TimedText]:
+    """Parse a JSON array of {"start", "end", "text"} objects, skipping malformed entries."""
+    raw = (raw or "").strip()
+    if raw.startswith("```"):
+        raw = raw.strip("`")
+        raw = raw[raw.find("["):] if "[" in raw else raw
+    try:
+        items = json.loads(raw)
+    except ValueError:
+        return []
+    spans: List[TimedText] = []
+    for item in items if isinstance(items, list) else []:
+        try:
+            spans.append((float(item["start"]), float(item["end"]), str(item["text"]).strip()))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return spans
 
 
 class ASRTranslateProvider(ABC):
+    # Provider label in metrics (see /metrics)
+    name = "unknown"
+    # Whether a slow call may be duplicated by a hedged request (see resilience)
+    hedgeable = True
+
+    @property
+    def transcribe_model(self) -> str:
+        """Identifier of the model behind transcribe(); used in cache keys."""
+        return type(self).__name__
+
+    @property
+    def translate_model(self) -> str:
+        """Identifier of the model behind translate(); used in cache keys."""
+        return type(self).__name__
+
     @abstractmethod
-    def transcribe(self, audio_path: str, source_lang: Optional[str] = None) -> str:
-        """Transcribe speech to text. Should return plain text only."""
+    def transcribe(self, audio: AudioInput, source_lang: Optional[str] = None) -> str:
+        """Transcribe speech (file path or WAV bytes) to text. Should return plain text only."""
         raise NotImplementedError
 
     @abstractmethod
     def translate(self, text: str, target_lang: str) -> str:
         """Translate text to target language code. Return plain text only."""
         raise NotImplementedError
+
+    def transcribe_timestamped(self, audio: AudioInput, source_lang: Optional[str] = None) -> List[TimedText]:
+        """Transcribe a long recording in one call, returning timestamped spans."""
+        raise NotImplementedError(f"{type(self).__name__} does not support timestamped transcription")
+
+    async def atranscribe_timestamped(self, audio: AudioInput, source_lang: Optional[str] = None) -> List[TimedText]:
+        return await asyncio.to_thread(self.transcribe_timestamped, audio, source_lang)
+
+    async def atranscribe(self, audio: AudioInput, source_lang: Optional[str] = None) -> str:
+        """Async transcription. Defaults to running transcribe() in a worker thread."""
+        return await asyncio.to_thread(self.transcribe, audio, source_lang)
+
+    async def atranslate(self, text: str, target_lang: str) -> str:
+        """Async translation. Defaults to running translate() in a worker thread."""
+        return await asyncio.to_thread(self.translate, text, target_lang)
+
+    def _translate_batch_call(self, texts: List[str], target_lang: str) -> Optional[str]:
+        """Send one batched translation request and return the raw reply (None if unsupported)."""
+        return None
+
+    async def _atranslate_batch_call(self, texts: List[str], target_lang: str) -> Optional[str]:
+        return await asyncio.to_thread(self._translate_batch_call, texts, target_lang)
+
+    def translate_batch(self, texts: List[str], target_lang: str) -> List[str]:
+        """
+        Translate several texts with a single request where the provider supports it.
+        Falls back to per-item translate() when the reply doesn't match the input count.
+        """
+        out = ["" for _ in texts]
+        pending = [i for i, t in enumerate(texts) if t.strip()]
+        translated = None
+        if len(pending) > 1:
+            raw = self._translate_batch_call([texts[i] for i in pending], target_lang)
+            translated = parse_batch_translation(raw, len(pending))
+        if translated is None:
+            translated = [self.translate(texts[i], target_lang) for i in pending]
+        for i, t in zip(pending, translated):
+            out[i] = t
+        return out
+
+    async def atranslate_batch(self, texts: List[str], target_lang: str) -> List[str]:
+        out = ["" for _ in texts]
+        pending = [i for i, t in enumerate(texts) if t.strip()]
+        translated = None
+        if len(pending) > 1:
+            raw = await self._atranslate_batch_call([texts[i] for i in pending], target_lang)
+            translated = parse_batch_translation(raw, len(pending))
+        if translated is None:
+            translated = list(await asyncio.gather(*[self.atranslate(texts[i], target_lang) for i in pending]))
+        for i, t in zip(pending, translated):
+            out[i] = t
+        return out
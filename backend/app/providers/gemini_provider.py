@@ -1,22 +1,90 @@
 from __future__ import annotations
+import asyncio
 import os
-from typing import Optional
+from typing import List, Optional, Union
 
+import google.ai.generativelanguage as glm
 import google.generativeai as genai
 
-from .base import ASRTranslateProvider
+from ..resilience import call_timeout
+from .base import (
+    ASRTranslateProvider,
+    AudioInput,
+    TimedText,
+    batch_translate_prompt,
+    parse_timed_spans,
+    provider_error,
+    read_audio_bytes,
+)
 
 
 class GeminiProvider(ASRTranslateProvider):
-    def __init__(self, api_key: Optional[str] = None, model: str = "gemini-2.5-flash"):
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str] = None, model: str = "gemini-2.5-flash", timeout: Optional[float] = None):
         key = api_key or os.getenv("GEMINI_API_KEY")
         if not key:
             raise RuntimeError("GEMINI_API_KEY is not set")
-        genai.configure(api_key=key)
+        # Clients of the generativelanguage API with the key in their own options, instead of the
+        # module-global genai.configure(), so several keys can be used side by side; their gRPC
+        # channels stay open for the provider's lifetime
+        self._client_options = {"api_key": key}
+        self._client = glm.GenerativeServiceClient(client_options=self._client_options)
+        # gRPC asyncio channels are bound to the loop that created them, see _async_client
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._aclient: Optional[glm.GenerativeServiceAsyncClient] = None
         self.model_name = model
-        self.model = genai.GenerativeModel(self.model_name)
+        self.timeout = timeout
+
+    @property
+    def request_options(self) -> Optional[dict]:
+        # The configured timeout, shortened to what is left of the request's deadline
+        timeout = call_timeout(self.timeout)
+        return {"timeout": timeout} if timeout else None
+
+    @property
+    def _async_client(self) -> glm.GenerativeServiceAsyncClient:
+        # Created from within the running loop, and again whenever a call comes from another one;
+        # only the latest is kept, since each client holds on to its loop
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._async_loop is not loop:
+            self._aclient = glm.GenerativeServiceAsyncClient(client_options=self._client_options)
+            self._async_loop = loop
+        return self._aclient
+
+    def _request(self, contents: Union[str, list], json_output: bool = False) -> glm.GenerateContentRequest:
+        parts = []
+        for part in contents if isinstance(contents, list) else [contents]:
+            if isinstance(part, str):
+                parts.append(glm.Part(text=part))
+            else:
+                parts.append(glm.Part(inline_data=glm.Blob(mime_type=part["mime_type"], data=part["data"])))
+        return glm.GenerateContentRequest(
+            model=f"models/{self.model_name}",
+            contents=[glm.Content(role="user", parts=parts)],
+            generation_config=glm.GenerationConfig(response_mime_type="application/json") if json_output else None,
+        )
+
+    def _generate(self, contents: Union[str, list], json_output: bool = False) -> str:
+        res = self._client.generate_content(self._request(contents, json_output), **(self.request_options or {}))
+        # .text raises ValueError when the reply was blocked or is empty, like the SDK's models
+        return genai.types.GenerateContentResponse.from_response(res).text
 
-    def transcribe(self, audio_path: str, source_lang: Optional[str] = None) -> str:
+    async def _agenerate(self, contents: Union[str, list], json_output: bool = False) -> str:
+        res = await self._async_client.generate_content(
+            self._request(contents, json_output), **(self.request_options or {})
+        )
+        return genai.types.GenerateContentResponse.from_response(res).text
+
+    @property
+    def transcribe_model(self) -> str:
+        return self.model_name
+
+    @property
+    def translate_model(self) -> str:
+        return self.model_name
+
+    def _transcribe_parts(self, audio: AudioInput, source_lang: Optional[str]) -> list:
         prompt = (
             "Transcribe the speech from the audio exactly and accurately. "
             "Return plain text only without timestamps or extra commentary."
@@ -24,26 +92,83 @@ class GeminiProvider(ASRTranslateProvider):
         if source_lang:
             prompt += f" The speech language is '{source_lang}'."
 
-        with open(audio_path, "rb") as f:
-            audio_bytes = f.read()
-        audio_part = {"mime_type": "audio/wav", "data": audio_bytes}
-        try:
-            res = self.model.generate_content([prompt, audio_part])
-            return (res.text or "").strip()
-        except Exception as e:
-            raise RuntimeError(f"Gemini transcription failed: {e}")
+        audio_part = {"mime_type": "audio/wav", "data": read_audio_bytes(audio)}
+        return [prompt, audio_part]
 
-    def translate(self, text: str, target_lang: str) -> str:
-        if not text.strip():
-            return ""
+    @staticmethod
+    def _timestamped_parts(audio: AudioInput, source_lang: Optional[str]) -> list:
         prompt = (
+            "Transcribe the speech from the audio exactly and accurately, split into utterances. "
+            "Return ONLY a JSON array of objects with keys \"start\" and \"end\" (seconds from the "
+            "beginning of the audio, as numbers) and \"text\"."
+        )
+        if source_lang:
+            prompt += f" The speech language is '{source_lang}'."
+        return [prompt, {"mime_type": "audio/wav", "data": read_audio_bytes(audio)}]
+
+    @staticmethod
+    def _translate_prompt(text: str, target_lang: str) -> str:
+        return (
             "Translate the following text into the target language specified. "
             "Return only the translated text, with no extra commentary.\n\n"
             f"Target language code or name: {target_lang}\n"
             f"Text: {text}"
         )
+
+    def transcribe(self, audio: AudioInput, source_lang: Optional[str] = None) -> str:
+        parts = self._transcribe_parts(audio, source_lang)
+        try:
+            return (self._generate(parts) or "").strip()
+        except Exception as e:
+            raise provider_error("Gemini transcription failed", e) from e
+
+    def translate(self, text: str, target_lang: str) -> str:
+        if not text.strip():
+            return ""
+        prompt = self._translate_prompt(text, target_lang)
+        try:
+            return (self._generate(prompt) or "").strip()
+        except Exception as e:
+            raise provider_error("Gemini translation failed", e) from e
+
+    def transcribe_timestamped(self, audio: AudioInput, source_lang: Optional[str] = None) -> List[TimedText]:
+        try:
+            raw = self._generate(self._timestamped_parts(audio, source_lang), json_output=True)
+        except Exception as e:
+            raise provider_error("Gemini transcription failed", e) from e
+        return parse_timed_spans(raw)
+
+    async def atranscribe_timestamped(self, audio: AudioInput, source_lang: Optional[str] = None) -> List[TimedText]:
+        try:
+            raw = await self._agenerate(self._timestamped_parts(audio, source_lang), json_output=True)
+        except Exception as e:
+            raise provider_error("Gemini transcription failed", e) from e
+        return parse_timed_spans(raw)
+
+    async def atranscribe(self, audio: AudioInput, source_lang: Optional[str] = None) -> str:
+        parts = self._transcribe_parts(audio, source_lang)
+        try:
+            return (await self._agenerate(parts) or "").strip()
+        except Exception as e:
+            raise provider_error("Gemini transcription failed", e) from e
+
+    async def atranslate(self, text: str, target_lang: str) -> str:
+        if not text.strip():
+            return ""
+        prompt = self._translate_prompt(text, target_lang)
+        try:
+            return (await self._agenerate(prompt) or "").strip()
+        except Exception as e:
+            raise provider_error("Gemini translation failed", e) from e
+
+    def _translate_batch_call(self, texts: List[str], target_lang: str) -> Optional[str]:
+        try:
+            return self._generate(batch_translate_prompt(texts, target_lang), json_output=True) or ""
+        except Exception as e:
+            raise provider_error("Gemini batch translation failed", e) from e
+
+    async def _atranslate_batch_call(self, texts: List[str], target_lang: str) -> Optional[str]:
         try:
-            res = self.model.generate_content(prompt)
-            return (res.text or "").strip()
+            return await self._agenerate(batch_translate_prompt(texts, target_lang), json_output=True) or ""
         except Exception as e:
-            raise RuntimeError(f"Gemini translation failed: {e}")
+            raise provider_error("Gemini batch translation failed", e) from e
@@ -0,0 +1,311 @@
+from __future__ import annotations
+import asyncio
+import importlib
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from ..config import settings
+from .base import ASRTranslateProvider, AudioInput, ProviderError, TimedText
+
+I = TypeVar("I")
+R = TypeVar("R")
+
+# Whisper works on 16 kHz input in windows of at most 30 s
+_ASR_SR = 16000
+_WINDOW_S = 30.0
+
+# ISO 639-1 -> NLLB-200 language codes for the languages offered in the UI plus other common ones;
+# anything else can be passed as a full NLLB code (e.g. "fra_Latn")
+_NLLB_CODES = {
+    "ar": "arb_Arab", "bn": "ben_Beng", "de": "deu_Latn", "en": "eng_Latn", "es": "spa_Latn",
+    "fa": "pes_Arab", "fr": "fra_Latn", "hi": "hin_Deva", "id": "ind_Latn", "it": "ita_Latn",
+    "ja": "jpn_Jpan", "ko": "kor_Hang", "nl": "nld_Latn", "pl": "pol_Latn", "pt": "por_Latn",
+    "ru": "rus_Cyrl", "ta": "tam_Taml", "te": "tel_Telu", "th": "tha_Thai", "tr": "tur_Latn",
+    "uk": "ukr_Cyrl", "ur": "urd_Arab", "vi": "vie_Latn", "zh": "zho_Hans",
+}
+
+
+def _require(module: str, package: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        raise ProviderError(
+            f"The local provider needs {package} (pip install -r requirements-local.txt)", retryable=False
+        ) from e
+
+
+@dataclass
+class _Item(Generic[I]):
+    payload: I
+    future: Future = field(default_factory=Future)
+
+
+class _Batcher(Generic[I, R]):
+    """
+    Coalesces concurrent single-item calls into batched model calls, like the TTS scheduler:
+    each worker thread takes up to batch_size queued items at a time, so batches form naturally
+    under load without adding latency when a call arrives alone.
+    """
+
+    def __init__(self, name: str, run_batch: Callable[[List[I]], List[R]], batch_size: int, workers: int):
+        self._run_batch = run_batch
+        self.batch_size = max(1, batch_size)
+        self._queue: "queue.Queue[_Item[I]]" = queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"dovashi-{name}-{i}", daemon=True) for i in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                results: List[object] = list(self._run_batch([item.payload for item in batch]))
+            except Exception as e:
+                results = [e for _ in batch]
+            for item, res in zip(batch, results):
+                if isinstance(res, Exception):
+                    item.future.set_exception(res)
+                else:
+                    item.future.set_result(res)
+
+    def submit(self, payload: I) -> "Future[R]":
+        item: _Item[I] = _Item(payload)
+        self._queue.put(item)
+        return item.future
+
+    def __call__(self, payload: I) -> R:
+        return self.submit(payload).result()
+
+
+class LocalProvider(ASRTranslateProvider):
+    """
+    Offline ASR and translation on local CPU models: faster-whisper (CTranslate2, int8) for
+    transcription and a CTranslate2-converted NLLB/M2M100 model for translation. One instance is
+    shared process-wide (see providers.registry), so both models load once, lazily on first use.
+    Concurrent segment calls are coalesced into batched encoder/decoder runs; thread counts come
+    from the LOCAL_* settings. The optional dependencies are in requirements-local.txt.
+    """
+
+    name = "local"
+    # A duplicate call would only compete with the original for the same CPU
+    hedgeable = False
+
+    def __init__(self):
+        self.asr_model_name = settings.local_asr_model
+        self.mt_model_path = settings.local_mt_model
+        self.mt_tokenizer_name = settings.local_mt_tokenizer
+        self._whisper = None
+        self._translator = None
+        self._tokenizer = None
+        self._load_lock = threading.Lock()
+        self._tokenizer_lock = threading.Lock()
+        # transcript -> language whisper detected, so translate() knows the source language
+        self._languages: "OrderedDict[str, str]" = OrderedDict()
+        self._languages_lock = threading.Lock()
+        self._asr = _Batcher("local-asr", self._transcribe_batch, settings.local_batch_size, settings.local_asr_workers)
+        self._mt = _Batcher("local-mt", self._translate_batch, settings.local_batch_size, settings.local_mt_workers)
+
+    @property
+    def transcribe_model(self) -> str:
+        return f"faster-whisper:{self.asr_model_name}"
+
+    @property
+    def translate_model(self) -> str:
+        return f"ct2:{os.path.basename(os.path.normpath(self.mt_model_path or 'none'))}"
+
+    @property
+    def whisper(self):
+        with self._load_lock:
+            if self._whisper is None:
+                faster_whisper = _require("faster_whisper", "faster-whisper")
+                self._whisper = faster_whisper.WhisperModel(
+                    self.asr_model_name,
+                    device=settings.local_device,
+                    compute_type=settings.local_compute_type,
+                    # Intra-op threads per call, and parallel calls (one per ASR batch worker)
+                    cpu_threads=settings.local_asr_threads,
+                    num_workers=settings.local_asr_workers,
+                )
+            return self._whisper
+
+    @property
+    def translator(self):
+        with self._load_lock:
+            if self._translator is None:
+                if not self.mt_model_path:
+                    raise ProviderError("LOCAL_MT_MODEL is not set", retryable=False)
+                ctranslate2 = _require("ctranslate2", "ctranslate2")
+                transformers = _require("transformers", "transformers")
+                self._translator = ctranslate2.Translator(
+                    self.mt_model_path,
+                    device=settings.local_device,
+                    compute_type=settings.local_compute_type,
+                    intra_threads=settings.local_mt_threads,
+                    inter_threads=settings.local_mt_workers,
+                )
+                self._tokenizer = transformers.AutoTokenizer.from_pretrained(self.mt_tokenizer_name)
+            return self._translator
+
+    @staticmethod
+    def _load_audio(audio: AudioInput) -> np.ndarray:
+        from ..utils.audio import decode_audio
+
+        return decode_audio(audio, target_sr=_ASR_SR)
+
+    @staticmethod
+    def _whisper_language(code: Optional[str]) -> Optional[str]:
+        # Whisper takes ISO 639-1 codes; anything else is left to language detection
+        code = (code or "").strip().lower()
+        return code if len(code) == 2 else None
+
+    def _remember_language(self, text: str, language: Optional[str]) -> None:
+        if not text or not language:
+            return
+        with self._languages_lock:
+            self._languages[text] = language
+            self._languages.move_to_end(text)
+            while len(self._languages) > 4096:
+                self._languages.popitem(last=False)
+
+    def _transcribe_long(self, audio: np.ndarray, language: Optional[str]) -> Tuple[str, str]:
+        segments, info = self.whisper.transcribe(audio, language=language, beam_size=settings.local_beam_size)
+        return " ".join(s.text.strip() for s in segments).strip(), info.language
+
+    def _transcribe_batch(self, items: List[Tuple[np.ndarray, Optional[str]]]) -> List[Tuple[str, str]]:
+        """
+        Transcribe several segments with one encoder pass and one batched decode. Segments longer
+        than Whisper's 30 s window go through faster-whisper's own long-form transcribe() instead.
+        """
+        whisper = self.whisper
+        results: List[Optional[Tuple[str, str]]] = [None] * len(items)
+        short = [i for i, (audio, _) in enumerate(items) if len(audio) <= _WINDOW_S * _ASR_SR]
+        for i, (audio, language) in enumerate(items):
+            if i not in short:
+                results[i] = self._transcribe_long(audio, language)
+        if short:
+            fw_audio = _require("faster_whisper.audio", "faster-whisper")
+            fw_tokenizer = _require("faster_whisper.tokenizer", "faster-whisper")
+            features = np.stack([
+                fw_audio.pad_or_trim(whisper.feature_extractor(items[i][0])) for i in short
+            ]).astype(np.float32)
+            encoded = whisper.encode(features)
+            languages = [items[i][1] for i in short]
+            if any(lang is None for lang in languages):
+                detected = whisper.model.detect_language(encoded)
+                languages = [
+                    lang or detected[j][0][0].strip("<|>") for j, lang in enumerate(languages)
+                ]
+            tokenizers: Dict[str, object] = {}
+            prompts = []
+            for lang in languages:
+                tok = tokenizers.get(lang)
+                if tok is None:
+                    tok = tokenizers[lang] = fw_tokenizer.Tokenizer(
+                        whisper.hf_tokenizer, whisper.model.is_multilingual, task="transcribe", language=lang
+                    )
+                prompts.append(list(tok.sot_sequence) + [tok.no_timestamps])  # type: ignore[attr-defined]
+            outputs = whisper.model.generate(encoded, prompts, beam_size=settings.local_beam_size, max_length=448)
+            for j, (i, out) in enumerate(zip(short, outputs)):
+                tok = tokenizers[languages[j]]
+                results[i] = (tok.decode(out.sequences_ids[0]).strip(), languages[j])  # type: ignore[attr-defined]
+        return results  # type: ignore[return-value]
+
+    def transcribe(self, audio: AudioInput, source_lang: Optional[str] = None) -> str:
+        try:
+            text, language = self._asr((self._load_audio(audio), self._whisper_language(source_lang)))
+        except ProviderError:
+            raise
+        except Exception as e:
+            raise ProviderError(f"Local transcription failed: {e}", retryable=False) from e
+        self._remember_language(text, language)
+        return text
+
+    def transcribe_timestamped(self, audio: AudioInput, source_lang: Optional[str] = None) -> List[TimedText]:
+        try:
+            segments, info = self.whisper.transcribe(
+                self._load_audio(audio), language=self._whisper_language(source_lang), beam_size=settings.local_beam_size
+            )
+            spans = [(float(s.start), float(s.end), s.text.strip()) for s in segments]
+        except ProviderError:
+            raise
+        except Exception as e:
+            raise ProviderError(f"Local transcription failed: {e}", retryable=False) from e
+        for _, _, text in spans:
+            self._remember_language(text, info.language)
+        return spans
+
+    def _lang_token(self, code: str) -> str:
+        """Language token of the MT model for an ISO code (NLLB "fra_Latn", M2M100 "__fr__")."""
+        code = code.strip()
+        if "nllb" in self.mt_tokenizer_name.lower():
+            return code if "_" in code else _NLLB_CODES.get(code.lower(), code)
+        return code if code.startswith("__") else f"__{code.lower()}__"
+
+    def _translate_batch(self, items: List[Tuple[str, str, str]]) -> List[str]:
+        """Translate (text, source, target) items, one CTranslate2 batch per language pair."""
+        translator = self.translator
+        out = ["" for _ in items]
+        pairs: Dict[Tuple[str, str], List[int]] = {}
+        for i, (_, src, tgt) in enumerate(items):
+            pairs.setdefault((src, tgt), []).append(i)
+        for (src, tgt), indices in pairs.items():
+            tokenizer = self._tokenizer
+            # The HF tokenizer's source language is shared state; tokenize one pair at a time
+            with self._tokenizer_lock:
+                tokenizer.src_lang = self._lang_token(src)  # type: ignore[union-attr]
+                sources = [
+                    tokenizer.convert_ids_to_tokens(tokenizer.encode(items[i][0]))  # type: ignore[union-attr]
+                    for i in indices
+                ]
+            target = self._lang_token(tgt)
+            results = translator.translate_batch(
+                sources,
+                target_prefix=[[target]] * len(sources),
+                beam_size=settings.local_beam_size,
+                max_batch_size=settings.local_batch_size,
+            )
+            for i, res in zip(indices, results):
+                # Drop the target-language token the decoder was primed with
+                tokens = res.hypotheses[0][1:]
+                out[i] = tokenizer.decode(  # type: ignore[union-attr]
+                    tokenizer.convert_tokens_to_ids(tokens), skip_special_tokens=True  # type: ignore[union-attr]
+                ).strip()
+        return out
+
+    def _source_language(self, text: str) -> str:
+        with self._languages_lock:
+            return self._languages.get(text) or settings.local_mt_source_lang
+
+    def translate(self, text: str, target_lang: str) -> str:
+        if not text.strip():
+            return ""
+        return self.translate_batch([text], target_lang)[0]
+
+    def translate_batch(self, texts: List[str], target_lang: str) -> List[str]:
+        """All non-empty texts go to the MT batcher at once instead of one prompt per batch."""
+        try:
+            futures = {
+                i: self._mt.submit((t, self._source_language(t), target_lang)) for i, t in enumerate(texts) if t.strip()
+            }
+            return [futures[i].result() if i in futures else "" for i in range(len(texts))]
+        except ProviderError:
+            raise
+        except Exception as e:
+            raise ProviderError(f"Local translation failed: {e}", retryable=False) from e
+
+    async def atranslate_batch(self, texts: List[str], target_lang: str) -> List[str]:
+        return await asyncio.to_thread(self.translate_batch, texts, target_lang)
@@ -1,48 +1,188 @@
 from __future__ import annotations
 import os
-from typing import Optional
+from typing import List, Optional
 
-from openai import OpenAI
+import httpx
+from openai import NOT_GIVEN, AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
 
-from .base import ASRTranslateProvider
+from ..resilience import call_timeout
+from .base import ASRTranslateProvider, AudioInput, TimedText, batch_translate_prompt, provider_error, read_audio_bytes
 
 
 class OpenAIProvider(ASRTranslateProvider):
-    def __init__(self, api_key: Optional[str] = None, chat_model: Optional[str] = None):
+    name = "openai"
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        chat_model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_connections: int = 10,
+        keepalive_s: float = 60.0,
+    ):
         key = api_key or os.getenv("OPENAI_API_KEY")
         if not key:
             raise RuntimeError("OPENAI_API_KEY is not set")
-        self.client = OpenAI(api_key=key)
+        # The instance is meant to live for the whole process (see providers.registry), so size
+        # its connection pools to the call concurrency and keep idle connections open for reuse
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_s,
+        )
+        self.timeout = timeout
+        # Retries are handled by the pipeline so they can be bounded per segment
+        client_kwargs = {"timeout": timeout} if timeout else {}
+        self.client = OpenAI(
+            api_key=key, max_retries=0, http_client=DefaultHttpxClient(limits=limits), **client_kwargs
+        )
+        self.aclient = AsyncOpenAI(
+            api_key=key, max_retries=0, http_client=DefaultAsyncHttpxClient(limits=limits), **client_kwargs
+        )
         self.chat_model = chat_model or os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini")
         self.whisper_model = os.getenv("OPENAI_WHISPER_MODEL", "whisper-1")
 
-    def transcribe(self, audio_path: str, source_lang: Optional[str] = None) -> str:
-        # Whisper ignores source_lang; it autodetects. We pass file directly.
-        with open(audio_path, "rb") as f:
-            try:
-                res = self.client.audio.transcriptions.create(model=self.whisper_model, file=f)
-                # SDK returns an object with .text
-                return (res.text or "").strip()
-            except Exception as e:
-                raise RuntimeError(f"OpenAI Whisper transcription failed: {e}")
+    @property
+    def _timeout(self):
+        # The configured timeout, shortened to what is left of the request's deadline
+        return call_timeout(self.timeout) or NOT_GIVEN
 
-    def translate(self, text: str, target_lang: str) -> str:
-        if not text.strip():
-            return ""
+    @property
+    def transcribe_model(self) -> str:
+        return self.whisper_model
+
+    @property
+    def translate_model(self) -> str:
+        return self.chat_model
+
+    def _translate_messages(self, text: str, target_lang: str) -> list:
         system = (
             "You are a high-quality translator. Translate the user's text to the target language. "
             "Return ONLY the translated text with no explanations."
         )
         user = f"Target language: {target_lang}\nText: {text}"
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ]
+
+    @staticmethod
+    def _batch_messages(texts: List[str], target_lang: str) -> list:
+        system = "You are a high-quality translator. Reply with a JSON array of strings only."
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": batch_translate_prompt(texts, target_lang)},
+        ]
+
+    @staticmethod
+    def _upload_file(audio: AudioInput):
+        # The SDK accepts (filename, bytes); the filename tells Whisper the container format
+        name = "segment.wav" if isinstance(audio, (bytes, bytearray)) else os.path.basename(audio)
+        return (name, read_audio_bytes(audio))
+
+    def transcribe(self, audio: AudioInput, source_lang: Optional[str] = None) -> str:
+        # Whisper ignores source_lang; it autodetects.
+        try:
+            res = self.client.audio.transcriptions.create(
+                model=self.whisper_model, file=self._upload_file(audio), timeout=self._timeout
+            )
+            # SDK returns an object with .text
+            return (res.text or "").strip()
+        except Exception as e:
+            raise provider_error("OpenAI Whisper transcription failed", e) from e
+
+    @staticmethod
+    def _timed_spans(res) -> List[TimedText]:
+        # verbose_json segments may come back as dicts or SDK objects depending on the version
+        spans: List[TimedText] = []
+        for seg in getattr(res, "segments", None) or []:
+            get = seg.get if isinstance(seg, dict) else lambda k, s=seg: getattr(s, k, None)
+            spans.append((float(get("start") or 0.0), float(get("end") or 0.0), str(get("text") or "").strip()))
+        return spans
+
+    def transcribe_timestamped(self, audio: AudioInput, source_lang: Optional[str] = None) -> List[TimedText]:
+        try:
+            res = self.client.audio.transcriptions.create(
+                model=self.whisper_model,
+                file=self._upload_file(audio),
+                response_format="verbose_json",
+                timestamp_granularities=["segment"],
+                timeout=self._timeout,
+            )
+        except Exception as e:
+            raise provider_error("OpenAI Whisper transcription failed", e) from e
+        return self._timed_spans(res)
+
+    async def atranscribe_timestamped(self, audio: AudioInput, source_lang: Optional[str] = None) -> List[TimedText]:
+        try:
+            res = await self.aclient.audio.transcriptions.create(
+                model=self.whisper_model,
+                file=self._upload_file(audio),
+                response_format="verbose_json",
+                timestamp_granularities=["segment"],
+                timeout=self._timeout,
+            )
+        except Exception as e:
+            raise provider_error("OpenAI Whisper transcription failed", e) from e
+        return self._timed_spans(res)
+
+    def translate(self, text: str, target_lang: str) -> str:
+        if not text.strip():
+            return ""
         try:
             res = self.client.chat.completions.create(
                 model=self.chat_model,
-                messages=[
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": user},
-                ],
+                messages=self._translate_messages(text, target_lang),
+                temperature=0.2,
+                timeout=self._timeout,
+            )
+            return (res.choices[0].message.content or "").strip()
+        except Exception as e:
+            raise provider_error("OpenAI translation failed", e) from e
+
+    async def atranscribe(self, audio: AudioInput, source_lang: Optional[str] = None) -> str:
+        try:
+            res = await self.aclient.audio.transcriptions.create(
+                model=self.whisper_model, file=self._upload_file(audio), timeout=self._timeout
+            )
+            return (res.text or "").strip()
+        except Exception as e:
+            raise provider_error("OpenAI Whisper transcription failed", e) from e
+
+    async def atranslate(self, text: str, target_lang: str) -> str:
+        if not text.strip():
+            return ""
+        try:
+            res = await self.aclient.chat.completions.create(
+                model=self.chat_model,
+                messages=self._translate_messages(text, target_lang),
                 temperature=0.2,
+                timeout=self._timeout,
             )
             return (res.choices[0].message.content or "").strip()
         except Exception as e:
-            raise RuntimeError(f"OpenAI translation failed: {e}")
+            raise provider_error("OpenAI translation failed", e) from e
+
+    def _translate_batch_call(self, texts: List[str], target_lang: str) -> Optional[str]:
+        try:
+            res = self.client.chat.completions.create(
+                model=self.chat_model,
+                messages=self._batch_messages(texts, target_lang),
+                temperature=0.2,
+                timeout=self._timeout,
+            )
+            return res.choices[0].message.content or ""
+        except Exception as e:
+            raise provider_error("OpenAI batch translation failed", e) from e
+
+    async def _atranslate_batch_call(self, texts: List[str], target_lang: str) -> Optional[str]:
+        try:
+            res = await self.aclient.chat.completions.create(
+                model=self.chat_model,
+                messages=self._batch_messages(texts, target_lang),
+                temperature=0.2,
+                timeout=self._timeout,
+            )
+            return res.choices[0].message.content or ""
+        except Exception as e:
+            raise provider_error("OpenAI batch translation failed", e) from e
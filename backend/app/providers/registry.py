@@ -0,0 +1,209 @@
+from __future__ import annotations
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from ..config import settings
+from .base import ASRTranslateProvider, AudioInput, TimedText
+
+# Builds a provider client for one API key
+ProviderFactory = Callable[[str], ASRTranslateProvider]
+
+SELECTIONS = ("least_loaded", "round_robin")
+
+
+def split_keys(*values: Optional[str]) -> List[str]:
+    """API keys from comma-separated settings, de-duplicated in order."""
+    keys: List[str] = []
+    for value in values:
+        for key in (value or "").split(","):
+            key = key.strip()
+            if key and key not in keys:
+                keys.append(key)
+    return keys
+
+
+class PooledProvider(ASRTranslateProvider):
+    """
+    One provider client per API key behind the ASRTranslateProvider interface. Every call is
+    routed to a member chosen by `selection`: "least_loaded" picks the key with the fewest calls
+    in flight (ties go round-robin), "round_robin" simply rotates, which spreads rate limits
+    evenly when calls have similar cost.
+    """
+
+    def __init__(self, members: List[ASRTranslateProvider], selection: str = "least_loaded"):
+        if not members:
+            raise ValueError("PooledProvider needs at least one member")
+        if selection not in SELECTIONS:
+            raise ValueError(f"Unknown key selection: {selection}")
+        self.members = members
+        self.selection = selection
+        self.name = members[0].name
+        self._in_flight = [0] * len(members)
+        self._calls = [0] * len(members)
+        self._rotation = itertools.cycle(range(len(members)))
+        self._lock = threading.Lock()
+
+    @property
+    def transcribe_model(self) -> str:
+        return self.members[0].transcribe_model
+
+    @property
+    def translate_model(self) -> str:
+        return self.members[0].translate_model
+
+    def _pick(self) -> int:
+        start = next(self._rotation)
+        if self.selection == "round_robin":
+            return start
+        n = len(self.members)
+        return min(((start + i) % n for i in range(n)), key=lambda i: self._in_flight[i])
+
+    @contextmanager
+    def _member(self) -> Iterator[ASRTranslateProvider]:
+        with self._lock:
+            i = self._pick()
+            self._in_flight[i] += 1
+            self._calls[i] += 1
+        try:
+            yield self.members[i]
+        finally:
+            with self._lock:
+                self._in_flight[i] -= 1
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "keys": len(self.members),
+                "selection": self.selection,
+                "in_flight": list(self._in_flight),
+                "calls": list(self._calls),
+            }
+
+    def transcribe(self, audio: AudioInput, source_lang: Optional[str] = None) -> str:
+        with self._member() as m:
+            return m.transcribe(audio, source_lang)
+
+    def translate(self, text: str, target_lang: str) -> str:
+        with self._member() as m:
+            return m.translate(text, target_lang)
+
+    def transcribe_timestamped(self, audio: AudioInput, source_lang: Optional[str] = None) -> List[TimedText]:
+        with self._member() as m:
+            return m.transcribe_timestamped(audio, source_lang)
+
+    async def atranscribe_timestamped(self, audio: AudioInput, source_lang: Optional[str] = None) -> List[TimedText]:
+        with self._member() as m:
+            return await m.atranscribe_timestamped(audio, source_lang)
+
+    async def atranscribe(self, audio: AudioInput, source_lang: Optional[str] = None) -> str:
+        with self._member() as m:
+            return await m.atranscribe(audio, source_lang)
+
+    async def atranslate(self, text: str, target_lang: str) -> str:
+        with self._member() as m:
+            return await m.atranslate(text, target_lang)
+
+    def _translate_batch_call(self, texts: List[str], target_lang: str) -> Optional[str]:
+        with self._member() as m:
+            return m._translate_batch_call(texts, target_lang)
+
+    async def _atranslate_batch_call(self, texts: List[str], target_lang: str) -> Optional[str]:
+        with self._member() as m:
+            return await m._atranslate_batch_call(texts, target_lang)
+
+
+def _gemini(key: str) -> ASRTranslateProvider:
+    from .gemini_provider import GeminiProvider
+
+    return GeminiProvider(api_key=key, timeout=settings.segment_timeout_s)
+
+
+def _openai(key: str) -> ASRTranslateProvider:
+    from .openai_provider import OpenAIProvider
+
+    return OpenAIProvider(
+        api_key=key,
+        timeout=settings.segment_timeout_s,
+        # Each key's pool only needs as many connections as calls that can be in flight at once
+        max_connections=settings.openai_max_concurrency,
+        keepalive_s=settings.provider_keepalive_s,
+    )
+
+
+def _local(key: str) -> ASRTranslateProvider:
+    from .local_provider import LocalProvider
+
+    return LocalProvider()
+
+
+# Client factory per provider name, and the API keys to pool for it
+_factories: Dict[str, ProviderFactory] = {"gemini": _gemini, "openai": _openai, "local": _local}
+_key_settings: Dict[str, Callable[[], List[str]]] = {
+    "gemini": lambda: split_keys(settings.gemini_api_keys, settings.gemini_api_key),
+    "openai": lambda: split_keys(settings.openai_api_keys, settings.openai_api_key),
+    # Runs on this machine: no keys, a single shared instance
+    "local": lambda: [""],
+}
+_env_names = {"gemini": "GEMINI_API_KEY", "openai": "OPENAI_API_KEY"}
+
+_providers: Dict[str, ASRTranslateProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def register_provider(
+    name: str, factory: ProviderFactory, keys: Optional[Callable[[], List[str]]] = None
+) -> None:
+    """
+    Add a provider under `name`. `keys` returns the API keys to pool (one client each); providers
+    that need no key leave it unset and get a single instance built with an empty key.
+    """
+    with _providers_lock:
+        _factories[name] = factory
+        _key_settings[name] = keys or (lambda: [""])
+        _providers.pop(name, None)
+
+
+def provider_names() -> List[str]:
+    return list(_factories)
+
+
+def provider_key_count(name: str) -> int:
+    keys = _key_settings.get(name)
+    return max(1, len(keys())) if keys else 1
+
+
+def get_provider(name: str) -> ASRTranslateProvider:
+    """
+    The process-wide provider for `name`, built on first use and shared by all requests so HTTP
+    connection pools (and their TLS sessions) are reused. Construction errors such as a missing
+    API key are not cached; the next call tries again.
+    """
+    prov = _providers.get(name)
+    if prov is not None:
+        return prov
+    with _providers_lock:
+        prov = _providers.get(name)
+        if prov is None:
+            factory = _factories.get(name)
+            if factory is None:
+                raise ValueError(f"Unknown provider: {name}")
+            keys = _key_settings[name]()
+            if not keys:
+                # Same message the providers raise themselves
+                raise RuntimeError(f"{_env_names.get(name, name.upper() + '_API_KEY')} is not set")
+            members = [factory(key) for key in keys]
+            prov = members[0] if len(members) == 1 else PooledProvider(members, settings.provider_key_selection)
+            _providers[name] = prov
+        return prov
+
+
+def provider_stats() -> Dict[str, object]:
+    """Per-key in-flight and call counts for providers built so far."""
+    with _providers_lock:
+        built = dict(_providers)
+    return {
+        name: prov.stats() if isinstance(prov, PooledProvider) else {"keys": 1}
+        for name, prov in built.items()
+    }
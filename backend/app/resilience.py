@@ -0,0 +1,433 @@
+from __future__ import annotations
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from .config import settings
+from .metrics import PROVIDER_ERRORS, PROVIDER_HEDGES, PROVIDER_RETRIES, PROVIDER_THROTTLE_SECONDS, in_context, provider_span
+from .providers.base import ProviderError
+from .providers.registry import provider_key_count
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(ProviderError):
+    """The request's deadline passed before a provider call could complete."""
+
+
+# Absolute time.monotonic() by which the current request must finish; None = no deadline
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("dovashi_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Bound every provider call made from this context (and work handed off with in_context)
+    to finish within `seconds`. Nested deadlines can only shorten the outer one.
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(at if outer is None else min(outer, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (None when there is none)."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def call_timeout(default: Optional[float]) -> Optional[float]:
+    """Per-call timeout for a provider SDK: its configured timeout, shortened to fit the deadline."""
+    left = remaining()
+    if left is None:
+        return default
+    left = max(0.001, left)
+    return left if default is None else min(default, left)
+
+
+def _check_deadline(provider: str, op: str) -> Optional[float]:
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {provider} {op}")
+    return left
+
+
+class TokenBucket:
+    """
+    Request-rate limiter that adapts to the provider: a 429 halves the refill rate (down to 1/16 of
+    the configured rate) and every success recovers 5% of it, so sustained throttling settles just
+    under the provider's real limit instead of retrying into it.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long to wait before it is actually available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def acquire(self, timeout: Optional[float] = None) -> float:
+        wait_s = self._reserve()
+        if timeout is not None and wait_s > timeout:
+            self._refund()
+            raise DeadlineExceeded("Deadline exceeded waiting for the provider rate limit")
+        if wait_s > 0:
+            time.sleep(wait_s)
+        return wait_s
+
+    async def aacquire(self, timeout: Optional[float] = None) -> float:
+        wait_s = self._reserve()
+        if timeout is not None and wait_s > timeout:
+            self._refund()
+            raise DeadlineExceeded("Deadline exceeded waiting for the provider rate limit")
+        if wait_s > 0:
+            await asyncio.sleep(wait_s)
+        return wait_s
+
+    def _refund(self) -> None:
+        with self._lock:
+            self._tokens += 1.0
+
+    def throttled(self) -> None:
+        with self._lock:
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+
+    def succeeded(self) -> None:
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+class LatencyTracker:
+    """Recent successful call latencies for one provider operation; threshold() is the hedge delay."""
+
+    window = 256
+
+    def __init__(self):
+        self._samples: Deque[float] = deque(maxlen=self.window)
+        self._threshold: Optional[float] = None
+        self._since_update = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self._since_update += 1
+            # Re-sorting on every sample is wasted work; the quantile moves slowly
+            if self._since_update >= 16 or self._threshold is None:
+                self._since_update = 0
+                if len(self._samples) >= settings.hedge_min_samples:
+                    ordered = sorted(self._samples)
+                    self._threshold = ordered[min(len(ordered) - 1, int(settings.hedge_quantile * len(ordered)))]
+
+    def threshold(self) -> Optional[float]:
+        return self._threshold
+
+
+_buckets: Dict[Tuple[str, str], Optional[TokenBucket]] = {}
+_latency: Dict[Tuple[str, str], LatencyTracker] = {}
+_state_lock = threading.Lock()
+_hedge_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _rate_limit(provider: str) -> float:
+    limits = {
+        "gemini": settings.gemini_rate_limit_rps,
+        "openai": settings.openai_rate_limit_rps,
+    }
+    # Per API key, like the concurrency limit
+    return max(0.0, limits.get(provider, 0.0)) * provider_key_count(provider)
+
+
+def get_bucket(provider: str, model: str) -> Optional[TokenBucket]:
+    """The shared rate limiter for one provider model; None when the provider is unlimited."""
+    key = (provider, model)
+    with _state_lock:
+        if key not in _buckets:
+            rate = _rate_limit(provider)
+            _buckets[key] = TokenBucket(rate, settings.rate_limit_burst) if rate > 0 else None
+        return _buckets[key]
+
+
+def _get_latency(provider: str, op: str) -> LatencyTracker:
+    with _state_lock:
+        tracker = _latency.get((provider, op))
+        if tracker is None:
+            tracker = _latency[(provider, op)] = LatencyTracker()
+        return tracker
+
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    with _state_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=settings.hedge_workers, thread_name_prefix="dovashi-hedge")
+        return _hedge_pool
+
+
+def call_labels(fn: Callable) -> Tuple[str, str, str]:
+    """(provider, operation, model) for a bound provider method; async twins share their sync name."""
+    name = getattr(fn, "__name__", "call")
+    op = name[1:] if name.startswith("atr") else name
+    prov = getattr(fn, "__self__", None)
+    model_attr = "transcribe_model" if op.startswith("transcribe") else "translate_model"
+    return getattr(prov, "name", "unknown"), op, str(getattr(prov, model_attr, ""))
+
+
+def retry_delay(attempt: int, error: BaseException) -> float:
+    """Exponential backoff with full jitter, but never sooner than the server's Retry-After."""
+    delay = random.uniform(0.0, min(settings.retry_max_s, settings.retry_base_s * (2 ** attempt)))
+    retry_after = getattr(error, "retry_after", None)
+    return max(delay, retry_after) if retry_after else delay
+
+
+def _retryable(e: BaseException) -> bool:
+    if isinstance(e, DeadlineExceeded):
+        return False
+    # Errors that don't come from a provider adapter keep the old behaviour: always retried
+    return e.retryable if isinstance(e, ProviderError) else True
+
+
+def _on_error(e: BaseException, provider: str, op: str, bucket: Optional[TokenBucket]) -> None:
+    if isinstance(e, DeadlineExceeded):
+        return
+    PROVIDER_ERRORS.inc(provider=provider, op=op)
+    if bucket is not None and getattr(e, "status", None) == 429:
+        bucket.throttled()
+
+
+def _timed_call(provider: str, op: str, fn: Callable[..., T], *args, **kwargs) -> T:
+    start = time.perf_counter()
+    with provider_span(provider, op):
+        result = fn(*args, **kwargs)
+    _get_latency(provider, op).observe(time.perf_counter() - start)
+    return result
+
+
+async def _atimed_call(provider: str, op: str, fn: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+    start = time.perf_counter()
+    with provider_span(provider, op):
+        result = await fn(*args, **kwargs)
+    _get_latency(provider, op).observe(time.perf_counter() - start)
+    return result
+
+
+def _hedge_delay(fn: Callable, provider: str, op: str) -> Optional[float]:
+    if not settings.provider_hedging or not getattr(getattr(fn, "__self__", None), "hedgeable", True):
+        return None
+    return _get_latency(provider, op).threshold()
+
+
+def _first_result(futures: List[Future], timeout: Optional[float], provider: str, op: str) -> T:
+    """The first successful result among futures; the last error if all of them fail."""
+    pending = set(futures)
+    error: Optional[BaseException] = None
+    end = None if timeout is None else time.monotonic() + timeout
+    while pending:
+        left = None if end is None else end - time.monotonic()
+        if left is not None and left <= 0:
+            break
+        done, pending = wait(pending, timeout=left, return_when=FIRST_COMPLETED)
+        for fut in done:
+            if fut.exception() is None:
+                return fut.result()
+            error = fut.exception()
+    if error is not None and not pending:
+        raise error
+    raise DeadlineExceeded(f"Deadline exceeded during {provider} {op}")
+
+
+def _hedged_call(
+    slots: threading.BoundedSemaphore,
+    bucket: Optional[TokenBucket],
+    after: float,
+    provider: str,
+    op: str,
+    fn: Callable[..., T],
+    *args,
+    **kwargs,
+) -> T:
+    """
+    Run the call on the hedge pool; if it hasn't finished after `after` seconds (the recent p95),
+    fire a second identical call and take whichever succeeds first. The backup only goes out when
+    a provider slot and a rate-limit token are free right away, so hedging never adds load to a
+    provider that is already saturated. The losing call runs to completion in the background.
+    The caller's slot passes to the primary call and each call releases its own slot when it
+    finishes, so calls still running after this returns keep counting against the limit.
+    """
+    pool = _get_hedge_pool()
+    try:
+        primary = pool.submit(in_context(_timed_call), provider, op, fn, *args, **kwargs)
+    except BaseException:
+        slots.release()
+        raise
+    primary.add_done_callback(lambda _: slots.release())
+    done, _ = wait([primary], timeout=after)
+    if done:
+        return primary.result()
+    left = remaining()
+    if slots.acquire(blocking=False):
+        if bucket is None or bucket.try_acquire():
+            PROVIDER_HEDGES.inc(provider=provider, op=op)
+            backup = pool.submit(in_context(_timed_call), provider, op, fn, *args, **kwargs)
+            backup.add_done_callback(lambda _: slots.release())
+            return _first_result([primary, backup], left, provider, op)
+        slots.release()
+    return _first_result([primary], left, provider, op)
+
+
+async def _ahedged_call(
+    slots: asyncio.Semaphore,
+    bucket: Optional[TokenBucket],
+    after: float,
+    provider: str,
+    op: str,
+    fn: Callable[..., Awaitable[T]],
+    *args,
+    **kwargs,
+) -> T:
+    """Async _hedged_call; here the losing call is cancelled (and releases its slot once it has stopped)."""
+    tasks = [asyncio.ensure_future(_atimed_call(provider, op, fn, *args, **kwargs))]
+    tasks[0].add_done_callback(lambda _: slots.release())
+    done, _ = await asyncio.wait(tasks, timeout=after)
+    if not done and not slots.locked() and (bucket is None or bucket.try_acquire()):
+        await slots.acquire()
+        PROVIDER_HEDGES.inc(provider=provider, op=op)
+        tasks.append(asyncio.ensure_future(_atimed_call(provider, op, fn, *args, **kwargs)))
+        tasks[-1].add_done_callback(lambda _: slots.release())
+    try:
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            left = remaining()
+            done, pending = await asyncio.wait(pending, timeout=left, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded(f"Deadline exceeded during {provider} {op}")
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        assert error is not None
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def call_provider(slots: threading.BoundedSemaphore, fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run a provider call inside the provider's concurrency slot and rate limit, within the current
+    deadline, retrying retryable failures with jittered backoff and hedging slow calls if enabled.
+    """
+    provider, op, model = call_labels(fn)
+    bucket = get_bucket(provider, model)
+    attempts = max(0, settings.segment_max_retries) + 1
+    for attempt in range(attempts):
+        left = _check_deadline(provider, op)
+        try:
+            if not slots.acquire(timeout=left):
+                raise DeadlineExceeded(f"Deadline exceeded waiting for a {provider} slot")
+            held = True
+            try:
+                if bucket is not None:
+                    PROVIDER_THROTTLE_SECONDS.inc(bucket.acquire(remaining()), provider=provider)
+                after = _hedge_delay(fn, provider, op)
+                if after is None:
+                    result = _timed_call(provider, op, fn, *args, **kwargs)
+                else:
+                    # The slot goes with the primary call, which may outlive this one
+                    held = False
+                    result = _hedged_call(slots, bucket, after, provider, op, fn, *args, **kwargs)
+            finally:
+                if held:
+                    slots.release()
+        except Exception as e:
+            _on_error(e, provider, op, bucket)
+            if attempt == attempts - 1 or not _retryable(e):
+                raise
+            delay = retry_delay(attempt, e)
+            left = remaining()
+            if left is not None and delay >= left:
+                raise DeadlineExceeded(f"Deadline exceeded retrying {provider} {op}: {e}") from e
+            PROVIDER_RETRIES.inc(provider=provider, op=op)
+            time.sleep(delay)
+            continue
+        if bucket is not None:
+            bucket.succeeded()
+        return result
+    raise RuntimeError("unreachable")
+
+
+async def acall_provider(slots: asyncio.Semaphore, fn: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+    """Async call_provider for atranscribe/atranslate."""
+    provider, op, model = call_labels(fn)
+    bucket = get_bucket(provider, model)
+    attempts = max(0, settings.segment_max_retries) + 1
+    for attempt in range(attempts):
+        left = _check_deadline(provider, op)
+        try:
+            try:
+                await asyncio.wait_for(slots.acquire(), left)
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"Deadline exceeded waiting for a {provider} slot") from None
+            held = True
+            try:
+                if bucket is not None:
+                    PROVIDER_THROTTLE_SECONDS.inc(await bucket.aacquire(remaining()), provider=provider)
+                after = _hedge_delay(fn, provider, op)
+                if after is None:
+                    result = await _atimed_call(provider, op, fn, *args, **kwargs)
+                else:
+                    held = False
+                    result = await _ahedged_call(slots, bucket, after, provider, op, fn, *args, **kwargs)
+            finally:
+                if held:
+                    slots.release()
+        except Exception as e:
+            _on_error(e, provider, op, bucket)
+            if attempt == attempts - 1 or not _retryable(e):
+                raise
+            delay = retry_delay(attempt, e)
+            left = remaining()
+            if left is not None and delay >= left:
+                raise DeadlineExceeded(f"Deadline exceeded retrying {provider} {op}: {e}") from e
+            PROVIDER_RETRIES.inc(provider=provider, op=op)
+            await asyncio.sleep(delay)
+            continue
+        if bucket is not None:
+            bucket.succeeded()
+        return result
+    raise RuntimeError("unreachable")
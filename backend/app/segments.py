@@ -0,0 +1,166 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# One row per VAD segment: sample bounds in the decoded input and the silence before it (seconds)
+SEGMENT_DTYPE = np.dtype([("start", "<i8"), ("end", "<i8"), ("gap", "<f8")])
+
+
+class SegmentTable:
+    """
+    The segments of one input as columns: a structured array of sample bounds and leading gaps,
+    plus the trailing silence and one transcript and translation per segment. Stages fill the
+    text columns in place, and segment audio is sliced out of the decoded wave as views, so the
+    table is passed between stages without copying. The windowed pipeline drops the wave once a
+    segment is transcribed, so its table has wave=None.
+    """
+
+    __slots__ = ("sample_rate", "rows", "trailing_gap", "transcripts", "translations", "wave")
+
+    def __init__(
+        self,
+        sample_rate: int,
+        rows: np.ndarray,
+        trailing_gap: float = 0.0,
+        transcripts: Optional[List[str]] = None,
+        translations: Optional[List[str]] = None,
+        wave: Optional[np.ndarray] = None,
+    ):
+        self.sample_rate = sample_rate
+        self.rows = rows
+        self.trailing_gap = trailing_gap
+        self.transcripts: List[str] = transcripts if transcripts is not None else [""] * len(rows)
+        self.translations: List[str] = translations if translations is not None else list(self.transcripts)
+        self.wave = wave
+
+    @classmethod
+    def from_vad(
+        cls, segments: Sequence[Tuple[int, int]], gaps: Sequence[float], sample_rate: int, wave: Optional[np.ndarray] = None
+    ) -> "SegmentTable":
+        """From segment_audio_vad output: (start, end) samples and len(segments) + 1 gaps."""
+        rows = np.zeros(len(segments), dtype=SEGMENT_DTYPE)
+        if len(segments):
+            bounds = np.asarray(segments, dtype=np.int64)
+            rows["start"], rows["end"] = bounds[:, 0], bounds[:, 1]
+            rows["gap"] = gaps[:-1]
+        return cls(sample_rate, rows, float(gaps[-1]) if len(gaps) else 0.0, wave=wave)
+
+    @classmethod
+    def from_lengths(
+        cls, lengths: Sequence[int], gaps: Sequence[float], sample_rate: int, transcripts: List[str], translations: List[str]
+    ) -> "SegmentTable":
+        """
+        From segment lengths in samples and the gaps before each (plus the trailing one), as the
+        streaming segmenter reports them. Gaps are whole samples divided by the rate, so the
+        starts are recovered exactly.
+        """
+        rows = np.zeros(len(lengths), dtype=SEGMENT_DTYPE)
+        if len(lengths):
+            rows["gap"] = gaps[:-1]
+            gap_samples = np.rint(rows["gap"] * sample_rate).astype(np.int64)
+            steps = gap_samples + np.asarray(lengths, dtype=np.int64)
+            rows["end"] = np.cumsum(steps)
+            rows["start"] = rows["end"] - np.asarray(lengths, dtype=np.int64)
+        return cls(sample_rate, rows, float(gaps[-1]) if len(gaps) else 0.0, transcripts, translations)
+
+    def with_translations(self, translations: List[str]) -> "SegmentTable":
+        """A table for another target language: same rows, transcripts and wave (shared, not copied)."""
+        return SegmentTable(self.sample_rate, self.rows, self.trailing_gap, self.transcripts, translations, self.wave)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def audio(self, index: int) -> np.ndarray:
+        """Samples of one segment, as a view of the decoded wave."""
+        if self.wave is None:
+            raise ValueError("this segment table has no audio")
+        row = self.rows[index]
+        return self.wave[row["start"]:row["end"]]
+
+    @property
+    def bounds(self) -> np.ndarray:
+        """(start, end) samples per segment, shape (n, 2)."""
+        return np.column_stack((self.rows["start"], self.rows["end"]))
+
+    @property
+    def gaps(self) -> np.ndarray:
+        """Leading gap of every segment followed by the trailing one (segment_audio_vad's layout)."""
+        return np.append(self.rows["gap"], self.trailing_gap)
+
+    @property
+    def start_s(self) -> np.ndarray:
+        return self.rows["start"] / self.sample_rate
+
+    @property
+    def end_s(self) -> np.ndarray:
+        return self.rows["end"] / self.sample_rate
+
+    @property
+    def duration_s(self) -> float:
+        """Length of the source: up to the end of the last segment plus the trailing silence."""
+        last_end = int(self.rows["end"][-1]) if len(self.rows) else 0
+        return last_end / self.sample_rate + self.trailing_gap
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Column-oriented JSON-ready form, without the wave: one list per field, named like the
+        API's segments[] (see segment_rows). Times are in seconds to the microsecond, so
+        from_dict() recovers the sample bounds exactly.
+        """
+        return {
+            "sample_rate": self.sample_rate,
+            "start": np.round(self.start_s, 6).tolist(),
+            "end": np.round(self.end_s, 6).tolist(),
+            "gap": np.round(self.rows["gap"], 6).tolist(),
+            "trailing_gap": round(self.trailing_gap, 6),
+            "transcript": list(self.transcripts),
+            "translation": list(self.translations),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SegmentTable":
+        sample_rate = int(data["sample_rate"])
+        rows = np.zeros(len(data["start"]), dtype=SEGMENT_DTYPE)
+        if len(rows):
+            rows["start"] = np.rint(np.asarray(data["start"]) * sample_rate)
+            rows["end"] = np.rint(np.asarray(data["end"]) * sample_rate)
+            rows["gap"] = data["gap"]
+        return cls(sample_rate, rows, float(data["trailing_gap"]), list(data["transcript"]), list(data["translation"]))
+
+    def to_msgpack(self) -> bytes:
+        """Compact binary form: the rows go in as raw little-endian bytes. Needs msgpack."""
+        return _msgpack().packb(
+            {
+                "sample_rate": self.sample_rate,
+                "rows": self.rows.tobytes(),
+                "trailing_gap": self.trailing_gap,
+                "transcript": self.transcripts,
+                "translation": self.translations,
+            },
+            use_bin_type=True,
+        )
+
+    @classmethod
+    def from_msgpack(cls, payload: bytes) -> "SegmentTable":
+        data = _msgpack().unpackb(payload, raw=False)
+        rows = np.frombuffer(data["rows"], dtype=SEGMENT_DTYPE).copy()
+        return cls(data["sample_rate"], rows, data["trailing_gap"], data["transcript"], data["translation"])
+
+
+def segment_rows(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The API's segments[] from a to_dict() form: one object per segment, times to the millisecond."""
+    return [
+        {"start": round(start, 3), "end": round(end, 3), "transcript": transcript, "translation": translation}
+        for start, end, transcript, translation in zip(data["start"], data["end"], data["transcript"], data["translation"])
+    ]
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError as e:
+        raise RuntimeError(
+            "SegmentTable msgpack serialization needs the msgpack package (pip install -r requirements-msgpack.txt)"
+        ) from e
+    return msgpack
@@ -0,0 +1,109 @@
+from __future__ import annotations
+import asyncio
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import numpy as np
+
+from .executors import run_cpu
+from .pipeline import (
+    ProviderName,
+    _aprocess_segment,
+    _get_async_provider_slots,
+    _get_provider,
+    _synthesize_segment,
+)
+from .utils.audio import StreamingSegmenter, assemble_with_pauses, encode_pcm16
+
+
+def decode_pcm_chunk(data: bytes, encoding: str = "pcm_s16le") -> np.ndarray:
+    if encoding == "pcm_s16le":
+        return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    if encoding == "f32le":
+        return np.frombuffer(data, dtype="<f4").astype(np.float32)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class StreamingSession:
+    """
+    Speech-to-speech for audio that arrives incrementally (e.g. over a WebSocket).
+    Every segment finalized by the streaming VAD goes through ASR -> translate -> TTS
+    on its own; outputs() yields them in order as PCM16 with the preceding silence
+    already inserted, so playback can start after the first segment.
+    """
+
+    def __init__(
+        self,
+        target_lang: str,
+        provider: ProviderName = "gemini",
+        source_lang: Optional[str] = None,
+        sample_rate: int = 16000,
+        vad_top_db: float = 30.0,
+        vad_min_gap_s: float = 0.25,
+        tts_speaker_wav: Optional[str] = None,
+    ):
+        self.target_lang = target_lang
+        self.source_lang = source_lang
+        self.sample_rate = sample_rate
+        self.tts_speaker_wav = tts_speaker_wav
+        self.out_sr: Optional[int] = None
+        self.provider = provider
+        self._prov = _get_provider(provider)
+        self._slots = _get_async_provider_slots(provider)
+        self._segmenter = StreamingSegmenter(sample_rate, top_db=vad_top_db, min_gap_s=vad_min_gap_s)
+        self._pending: asyncio.Queue = asyncio.Queue()
+        self._index = 0
+        self._trailing_gap = 0.0
+
+    async def feed(self, chunk: np.ndarray) -> None:
+        for seg, gap in await run_cpu(self._segmenter.feed, chunk):
+            self._schedule(seg, gap)
+
+    async def finish(self) -> None:
+        segs, self._trailing_gap = await run_cpu(self._segmenter.flush)
+        for seg, gap in segs:
+            self._schedule(seg, gap)
+        self._pending.put_nowait(None)
+
+    def cancel(self) -> None:
+        while not self._pending.empty():
+            task = self._pending.get_nowait()
+            if task is not None:
+                task.cancel()
+        self._pending.put_nowait(None)
+
+    def _schedule(self, seg: np.ndarray, gap: float) -> None:
+        task = asyncio.create_task(self._process(self._index, seg, gap))
+        self._index += 1
+        self._pending.put_nowait(task)
+
+    async def _process(self, index: int, seg: np.ndarray, gap: float) -> Tuple[Dict[str, object], np.ndarray, int]:
+        transcript, translated = await _aprocess_segment(
+            self._prov, self.provider, self._slots, seg, self.sample_rate, self.source_lang, self.target_lang
+        )
+        wav, wav_sr = await run_cpu(_synthesize_segment, translated, self.target_lang, self.tts_speaker_wav)
+        meta = {
+            "type": "segment",
+            "index": index,
+            "transcript": transcript,
+            "translation": translated,
+            "gap_s": gap,
+        }
+        return meta, wav, wav_sr
+
+    async def outputs(self) -> AsyncIterator[Tuple[Dict[str, object], bytes]]:
+        """Yield (metadata, pcm16 bytes) per segment in order, then the trailing silence."""
+        while True:
+            task = await self._pending.get()
+            if task is None:
+                break
+            meta, wav, wav_sr = await task
+            if self.out_sr is None:
+                self.out_sr = wav_sr
+            # Reuse the pause-preserving assembly for [gap, segment] at the stream's rate
+            pcm = await run_cpu(assemble_with_pauses, [wav], [wav_sr], [float(meta["gap_s"]), 0.0], self.out_sr)
+            meta["sample_rate"] = self.out_sr
+            yield meta, encode_pcm16(pcm)
+
+        out_sr = self.out_sr or 24000
+        tail = np.zeros(int(out_sr * self._trailing_gap), dtype=np.float32)
+        yield {"type": "end", "sample_rate": out_sr, "trailing_gap_s": self._trailing_gap}, encode_pcm16(tail)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+import os
+import sys
+from typing import Dict
+
+# Read by OpenMP, the BLAS builds numpy/torch ship with, numexpr and numba when they load
+_THREAD_ENV = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "NUMBA_NUM_THREADS",
+)
+
+
+def thread_env(threads: int) -> Dict[str, str]:
+    """Environment that caps a new process's native thread pools at `threads`."""
+    return {name: str(threads) for name in _THREAD_ENV}
+
+
+def limit_threads(threads: int) -> None:
+    """
+    Cap this process's native thread pools at `threads` (0 leaves them alone). The environment
+    only reaches libraries that haven't loaded yet, so pools that already exist are resized in
+    place: torch and numba if imported, and BLAS/OpenMP through threadpoolctl when installed.
+    """
+    if threads <= 0:
+        return
+    os.environ.update(thread_env(threads))
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+    numba = sys.modules.get("numba")
+    if numba is not None:
+        numba.set_num_threads(min(threads, numba.config.NUMBA_NUM_THREADS))
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(limits=threads)
@@ -1,10 +1,20 @@
 from __future__ import annotations
+import os
 import threading
-from typing import Optional, Tuple
+from collections import OrderedDict
+from typing import List, Optional, Tuple, Union
 
 import numpy as np
 
-from TTS.api import TTS
+from ..cache import speaker_wav_hash
+from ..config import settings
+
+SynthesisResult = Union[Tuple[np.ndarray, int], Exception]
+
+
+def latents_path(speaker_wav: str) -> str:
+    """Where prepare_speaker() stores a reference's conditioning latents: next to the clip."""
+    return os.path.splitext(speaker_wav)[0] + ".latents.npz"
 
 
 class CoquiTTS:
@@ -12,10 +22,14 @@ class CoquiTTS:
     Lazy-initialized Coqui TTS (XTTS v2) synthesizer.
     Usage:
         wav, sr = CoquiTTS().synthesize(text, language="en", speaker_wav=None)
+    CoquiTTS() returns the process-wide instance; CoquiTTS.create_replica() builds an
+    independent model for worker pools.
     """
 
     _instance = None
     _lock = threading.Lock()
+    # Speaker conditioning latents kept per instance, keyed by speaker_wav content hash
+    _max_cached_speakers = 32
 
     def __new__(cls, model_name: str | None = None):
         if cls._instance is None:
@@ -25,8 +39,21 @@ class CoquiTTS:
                     cls._instance._init_model(model_name)
         return cls._instance
 
+    @classmethod
+    def create_replica(cls, model_name: str | None = None) -> "CoquiTTS":
+        replica = super().__new__(cls)
+        replica._init_model(model_name)
+        return replica
+
     def _init_model(self, model_name: Optional[str] = None):
-        self.model_name = model_name or "tts_models/multilingual/multi-dataset/xtts_v2"
+        # Imported here so processes that never synthesize (text-only workers) don't load torch
+        from TTS.api import TTS
+
+        from ..threads import limit_threads
+
+        # torch starts its pools on import, so the per-process cap is applied again once it has loaded
+        limit_threads(settings.process_threads)
+        self.model_name = model_name or settings.tts_model_name
         # TTS will automatically use CUDA if available
         self.tts = TTS(model_name=self.model_name)
         # Access the output sample rate from synthesizer
@@ -34,12 +61,104 @@ class CoquiTTS:
             self.sample_rate = getattr(self.tts.synthesizer, "output_sample_rate", 24000)
         except Exception:
             self.sample_rate = 24000
+        # One model instance is not safe to run from several threads at once
+        self._synth_lock = threading.Lock()
+        self._latents: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _xtts_model(self):
+        model = getattr(getattr(self.tts, "synthesizer", None), "tts_model", None)
+        return model if hasattr(model, "get_conditioning_latents") and hasattr(model, "inference") else None
+
+    def _load_latents(self, model, speaker_wav: str, key: str) -> Optional[tuple]:
+        try:
+            with np.load(latents_path(speaker_wav)) as data:
+                if str(data["speaker_hash"]) != key:
+                    return None  # the clip changed since they were computed
+                arrays = data["gpt_cond_latent"], data["speaker_embedding"]
+        except (OSError, KeyError, ValueError):
+            return None
+        import torch
+
+        device = next(model.parameters()).device
+        return tuple(torch.from_numpy(a).to(device) for a in arrays)
+
+    def _save_latents(self, speaker_wav: str, key: str, latents: tuple) -> None:
+        path = latents_path(speaker_wav)
+        gpt_cond_latent, speaker_embedding = (t.detach().cpu().numpy() for t in latents)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, gpt_cond_latent=gpt_cond_latent, speaker_embedding=speaker_embedding, speaker_hash=key)
+        os.replace(path + ".tmp", path)
+
+    def _speaker_latents(self, model, speaker_wav: str, persist: bool = False) -> tuple:
+        # In memory, then persisted by prepare_speaker(), and only then a speaker encoder pass
+        key = speaker_wav_hash(speaker_wav)
+        latents = self._latents.get(key)
+        if latents is None:
+            latents = self._load_latents(model, speaker_wav, key)
+            if latents is None:
+                latents = model.get_conditioning_latents(audio_path=[speaker_wav])
+                if persist:
+                    self._save_latents(speaker_wav, key, latents)
+            self._latents[key] = latents
+            if len(self._latents) > self._max_cached_speakers:
+                self._latents.popitem(last=False)
+        else:
+            self._latents.move_to_end(key)
+            if persist and not os.path.exists(latents_path(speaker_wav)):
+                self._save_latents(speaker_wav, key, latents)
+        return latents
+
+    @staticmethod
+    def _inference_kwargs(model) -> dict:
+        # What tts.tts() passes for a speaker clip: the loaded config's sampling settings rather
+        # than inference()'s own defaults, and sentence splitting so long segments stay within the
+        # model's per-call token limit
+        config = model.config
+        kwargs = {
+            name: getattr(config, name)
+            for name in ("temperature", "length_penalty", "repetition_penalty", "top_k", "top_p")
+            if hasattr(config, name)
+        }
+        kwargs["enable_text_splitting"] = True
+        return kwargs
+
+    def prepare_speaker(self, speaker_wav: str) -> bool:
+        """
+        Compute a reference clip's conditioning latents once and store them next to it, so every
+        later synthesis with it, in any process, skips the speaker encoder. False for models
+        without speaker latents, which re-read the clip on each call.
+        """
+        with self._synth_lock:
+            model = self._xtts_model()
+            if model is None:
+                return False
+            self._speaker_latents(model, speaker_wav, persist=True)
+        return True
 
     def synthesize(self, text: str, language: str = "en", speaker_wav: Optional[str] = None) -> Tuple[np.ndarray, int]:
         if not text.strip():
             return np.zeros(1, dtype=np.float32), self.sample_rate
-        # Prefer explicit language and optional speaker_wav for XTTS
-        wav = self.tts.tts(text=text, language=language, speaker_wav=speaker_wav)
+        with self._synth_lock:
+            model = self._xtts_model() if speaker_wav else None
+            if model is not None:
+                # Encode the reference clip once and reuse its latents for every segment
+                gpt_cond_latent, speaker_embedding = self._speaker_latents(model, speaker_wav)  # type: ignore[arg-type]
+                wav = model.inference(
+                    text, language, gpt_cond_latent, speaker_embedding, **self._inference_kwargs(model)
+                )["wav"]
+            else:
+                # Prefer explicit language and optional speaker_wav for XTTS
+                wav = self.tts.tts(text=text, language=language, speaker_wav=speaker_wav)
         # Ensure float32 numpy array
         wav = np.asarray(wav, dtype=np.float32)
         return wav, self.sample_rate
+
+    def synthesize_batch(self, items: List[Tuple[str, str, Optional[str]]]) -> List[SynthesisResult]:
+        """Synthesize (text, language, speaker_wav) items; failures are returned in place of results."""
+        results: List[SynthesisResult] = []
+        for text, language, speaker_wav in items:
+            try:
+                results.append(self.synthesize(text, language=language, speaker_wav=speaker_wav))
+            except Exception as e:
+                results.append(e)
+        return results
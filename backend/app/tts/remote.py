@@ -0,0 +1,137 @@
+from __future__ import annotations
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Connection
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..resilience import call_timeout
+
+
+class _Link:
+    """One connection to the server plus the calls awaiting a reply on it."""
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+        self.pending: Dict[int, Future] = {}
+
+
+class RemoteTTSScheduler:
+    """
+    Client for the TTS model server (app.tts.server), with the TTSScheduler interface.
+    Calls are pipelined over one Unix-socket connection: submit() sends the segment and returns
+    a future that a reader thread resolves when the reply comes back, so every segment of every
+    request in this process can be queued on the server at once. A dropped
+    connection fails the calls waiting on it and is reopened on the next call.
+    Each call waits at most call_timeout_s for its reply (shortened to the deadline of the
+    request that made it, 0 = no limit): an expiry thread then fails its future with TimeoutError
+    and drops the reply if it comes late.
+    """
+
+    def __init__(self, address: str, authkey: str = "", timeout_s: float = 30.0, call_timeout_s: float = 0.0):
+        self.address = address
+        self._authkey = authkey.encode() if authkey else None
+        self.timeout_s = timeout_s
+        self.call_timeout_s = call_timeout_s
+        self._lock = threading.Lock()
+        self._link: Optional[_Link] = None
+        self._ids = itertools.count()
+        # (expires at, call id, link, timeout) of the calls with a timeout, soonest first
+        self._expiry: List[Tuple[float, int, _Link, float]] = []
+        self._expiry_cv = threading.Condition(self._lock)
+        self._expirer: Optional[threading.Thread] = None
+
+    def _connect(self) -> _Link:
+        # Called with self._lock held
+        if self._link is None:
+            link = _Link(Client(self.address, family="AF_UNIX", authkey=self._authkey))
+            threading.Thread(target=self._read, args=(link,), name="dovashi-tts-remote", daemon=True).start()
+            self._link = link
+        return self._link
+
+    def _read(self, link: _Link) -> None:
+        try:
+            while True:
+                call_id, ok, value = link.conn.recv()
+                with self._lock:
+                    future = link.pending.pop(call_id, None)
+                if future is None:
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+        except Exception as e:  # EOF or a reset when the server goes away
+            error = ConnectionError(f"TTS server connection lost: {str(e) or 'closed'}")
+        with self._lock:
+            if self._link is link:
+                self._link = None
+            pending, link.pending = link.pending, {}
+        link.conn.close()
+        for future in pending.values():
+            future.set_exception(error)
+
+    def _call(self, op: str, *args, timeout: Optional[float] = None) -> Future:
+        future: Future = Future()
+        with self._lock:
+            call_id = next(self._ids)
+            try:
+                link = self._connect()
+                link.pending[call_id] = future
+                link.conn.send((call_id, op, args))
+            except Exception as e:  # refused, reset or rejected authkey
+                if self._link is not None:
+                    self._link.pending.pop(call_id, None)
+                future.set_exception(ConnectionError(f"TTS server at {self.address} unavailable: {e}"))
+                return future
+            if timeout is not None:
+                heapq.heappush(self._expiry, (time.monotonic() + timeout, call_id, link, timeout))
+                if self._expirer is None:
+                    self._expirer = threading.Thread(target=self._expire, name="dovashi-tts-expiry", daemon=True)
+                    self._expirer.start()
+                self._expiry_cv.notify()
+        return future
+
+    def _expire(self) -> None:
+        while True:
+            expired = []
+            with self._expiry_cv:
+                while not self._expiry or self._expiry[0][0] > time.monotonic():
+                    self._expiry_cv.wait(self._expiry[0][0] - time.monotonic() if self._expiry else None)
+                now = time.monotonic()
+                while self._expiry and self._expiry[0][0] <= now:
+                    _, call_id, link, timeout = heapq.heappop(self._expiry)
+                    # Gone from pending when the reply (or a lost connection) already resolved it
+                    future = link.pending.pop(call_id, None)
+                    if future is not None:
+                        expired.append((future, timeout))
+            for future, timeout in expired:
+                future.set_exception(TimeoutError(f"TTS server at {self.address} did not reply within {timeout:.1f}s"))
+
+    def _reply_timeout(self) -> Optional[float]:
+        return call_timeout(self.call_timeout_s or None)
+
+    def submit(self, text: str, language: str = "en", speaker_wav: Optional[str] = None) -> "Future[Tuple[np.ndarray, int]]":
+        return self._call("submit", text, language, speaker_wav, timeout=self._reply_timeout())
+
+    def synthesize(self, text: str, language: str = "en", speaker_wav: Optional[str] = None) -> Tuple[np.ndarray, int]:
+        return self.submit(text, language, speaker_wav).result()
+
+    def warm_up(self, text: str = "Hello.", language: str = "en", speaker_wav: Optional[str] = None) -> None:
+        self._call("warm_up", text, language, speaker_wav, timeout=self._reply_timeout()).result()
+
+    def prepare_speaker(self, speaker_wav: str) -> bool:
+        # The path must be readable by the server, which runs on the same host
+        return self._call("prepare_speaker", speaker_wav, timeout=self._reply_timeout()).result()
+
+    def backlog(self) -> int:
+        return self._call("backlog", timeout=self.timeout_s).result()
+
+    def stats(self) -> Dict[str, object]:
+        stats = self._call("stats", timeout=self.timeout_s).result()
+        stats["server"] = self.address
+        return stats
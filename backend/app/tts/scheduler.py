@@ -0,0 +1,235 @@
+from __future__ import annotations
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import settings
+from .coqui_tts import CoquiTTS, SynthesisResult
+
+
+@dataclass
+class _Job:
+    text: str
+    language: str
+    speaker_wav: Optional[str]
+    future: Future = field(default_factory=Future)
+    enqueued: float = field(default_factory=time.monotonic)
+
+
+# Process-mode workers: each child process owns one model replica
+_proc_tts: Optional[CoquiTTS] = None
+
+
+def _proc_init(model_name: Optional[str]) -> None:
+    global _proc_tts
+    _proc_tts = CoquiTTS(model_name)
+
+
+def _proc_synthesize_batch(items: List[Tuple[str, str, Optional[str]]]) -> List[SynthesisResult]:
+    assert _proc_tts is not None
+    return _proc_tts.synthesize_batch(items)
+
+
+def _proc_prepare_speaker(speaker_wav: str) -> bool:
+    assert _proc_tts is not None
+    return _proc_tts.prepare_speaker(speaker_wav)
+
+
+class _ThreadBackend:
+    def __init__(self, tts: CoquiTTS):
+        self.tts = tts
+
+    def synthesize_batch(self, items: List[Tuple[str, str, Optional[str]]]) -> List[SynthesisResult]:
+        return self.tts.synthesize_batch(items)
+
+    def prepare_speaker(self, speaker_wav: str) -> bool:
+        return self.tts.prepare_speaker(speaker_wav)
+
+
+class _ProcessBackend:
+    def __init__(self, model_name: Optional[str]):
+        self.pool = ProcessPoolExecutor(max_workers=1, initializer=_proc_init, initargs=(model_name,))
+
+    def synthesize_batch(self, items: List[Tuple[str, str, Optional[str]]]) -> List[SynthesisResult]:
+        return self.pool.submit(_proc_synthesize_batch, items).result()
+
+    def prepare_speaker(self, speaker_wav: str) -> bool:
+        return self.pool.submit(_proc_prepare_speaker, speaker_wav).result()
+
+
+class TTSScheduler:
+    """
+    Queue in front of a pool of TTS model replicas.
+    Segments from all concurrent jobs share one queue; each worker takes up to batch_size
+    queued segments at a time (never more than its share of the queue, so the replicas stay
+    evenly loaded) and runs them on its own replica ("thread" mode: replicas in this process,
+    "process" mode: one child process per replica so CPU synthesis runs in parallel without
+    the GIL). XTTS synthesizes one text at a time, so a batch only saves per-call overhead
+    (one round trip to a process replica); batch_size 1 is the default.
+    stats() reports queue depth and wait times for backpressure.
+    """
+
+    def __init__(self, workers: int = 1, mode: str = "thread", batch_size: int = 1, model_name: Optional[str] = None):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown TTS worker mode: {mode}")
+        self.workers = max(1, workers)
+        self.mode = mode
+        self.batch_size = max(1, batch_size)
+        self.model_name = model_name
+        self._queue: "queue.Queue[_Job]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._batches = 0
+        self._dispatched = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._backends: List[Optional[object]] = [None] * self.workers
+        self._backend_locks = [threading.Lock() for _ in range(self.workers)]
+        self._threads = [
+            threading.Thread(target=self._run, args=(i,), name=f"dovashi-tts-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def _make_backend(self, index: int):
+        if self.mode == "process":
+            return _ProcessBackend(self.model_name)
+        # The first replica is the shared singleton so direct CoquiTTS() users don't load another model
+        return _ThreadBackend(CoquiTTS(self.model_name) if index == 0 else CoquiTTS.create_replica(self.model_name))
+
+    def _backend(self, index: int):
+        # Replicas load lazily so an idle pool costs nothing until first use or warm_up()
+        with self._backend_locks[index]:
+            if self._backends[index] is None:
+                self._backends[index] = self._make_backend(index)
+            return self._backends[index]
+
+    def warm_up(self, text: str = "Hello.", language: str = "en", speaker_wav: Optional[str] = None) -> None:
+        """Load every replica and run one short synthesis on each, in parallel."""
+        errors: List[Exception] = []
+
+        def warm(index: int) -> None:
+            try:
+                # A failed dummy synthesis (e.g. a model that needs a speaker) still leaves the
+                # replica loaded, which is the expensive part; only load errors are reported.
+                self._backend(index).synthesize_batch([(text, language, speaker_wav)])  # type: ignore[attr-defined]
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=warm, args=(i,)) for i in range(self.workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+
+    def _run(self, index: int) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # A batch runs on one replica, so take no more than this worker's share of the
+            # queue; otherwise one worker drains the backlog while the others sit idle
+            take = min(self.batch_size, -(-(self._queue.qsize() + 1) // self.workers))
+            while len(batch) < take:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            now = time.monotonic()
+            with self._stats_lock:
+                self._in_flight += len(batch)
+                self._batches += 1
+                self._dispatched += len(batch)
+                for job in batch:
+                    waited = now - job.enqueued
+                    self._wait_total += waited
+                    self._wait_max = max(self._wait_max, waited)
+            try:
+                results = self._backend(index).synthesize_batch([(j.text, j.language, j.speaker_wav) for j in batch])
+            except Exception as e:
+                results = [e for _ in batch]
+            with self._stats_lock:
+                self._in_flight -= len(batch)
+            for job, res in zip(batch, results):
+                if isinstance(res, Exception):
+                    with self._stats_lock:
+                        self._failed += 1
+                    job.future.set_exception(res)
+                else:
+                    with self._stats_lock:
+                        self._completed += 1
+                    job.future.set_result(res)
+
+    def submit(self, text: str, language: str = "en", speaker_wav: Optional[str] = None) -> "Future[Tuple[np.ndarray, int]]":
+        job = _Job(text=text, language=language, speaker_wav=speaker_wav)
+        self._queue.put(job)
+        return job.future
+
+    def synthesize(self, text: str, language: str = "en", speaker_wav: Optional[str] = None) -> Tuple[np.ndarray, int]:
+        """Blocking call with the same signature as CoquiTTS.synthesize."""
+        return self.submit(text, language, speaker_wav).result()
+
+    def prepare_speaker(self, speaker_wav: str) -> bool:
+        """
+        Precompute and store a reference clip's conditioning latents (CoquiTTS.prepare_speaker).
+        One replica does it; the others load the stored latents on first use.
+        """
+        return self._backend(0).prepare_speaker(speaker_wav)  # type: ignore[attr-defined]
+
+    def backlog(self) -> int:
+        """Segments queued or being synthesized, for admission control."""
+        with self._stats_lock:
+            return self._queue.qsize() + self._in_flight
+
+    def stats(self) -> Dict[str, object]:
+        with self._stats_lock:
+            return {
+                "mode": self.mode,
+                "workers": self.workers,
+                "batch_size": self.batch_size,
+                "queue_depth": self._queue.qsize(),
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "failed": self._failed,
+                "batches": self._batches,
+                "avg_wait_s": (self._wait_total / self._dispatched) if self._dispatched else 0.0,
+                "max_wait_s": self._wait_max,
+            }
+
+
+_scheduler: Optional[TTSScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_tts_scheduler() -> TTSScheduler:
+    """
+    The process-wide scheduler: a local worker pool, or with TTS_SERVER_SOCKET set a client of
+    the shared TTS model server (same interface), so API workers don't each load the models.
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None and settings.tts_server_socket:
+                from .remote import RemoteTTSScheduler
+
+                _scheduler = RemoteTTSScheduler(  # type: ignore[assignment]
+                    settings.tts_server_socket,
+                    settings.tts_server_authkey,
+                    call_timeout_s=settings.tts_server_timeout_s,
+                )
+            elif _scheduler is None:
+                _scheduler = TTSScheduler(
+                    workers=settings.tts_workers,
+                    mode=settings.tts_worker_mode,
+                    batch_size=settings.tts_batch_size,
+                    model_name=settings.tts_model_name,
+                )
+    return _scheduler
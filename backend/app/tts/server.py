@@ -0,0 +1,123 @@
+from __future__ import annotations
+import argparse
+import logging
+import os
+import pickle
+import signal
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing.connection import Connection, Listener
+from typing import Optional
+
+from ..config import settings
+from ..threads import limit_threads
+from .scheduler import TTSScheduler
+
+logger = logging.getLogger(__name__)
+
+# Scheduler methods clients may call; submit returns a future, the rest run on a helper thread
+_OPS = ("submit", "warm_up", "prepare_speaker", "backlog", "stats")
+
+
+def _portable(error: BaseException) -> BaseException:
+    # Model errors may not survive pickling; the client still gets the type and message
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+class TTSServer:
+    """
+    Serves one TTSScheduler to the API worker processes over a Unix socket, so the models are
+    loaded once per host instead of once per worker and segments from every worker share
+    one queue. Each connection is read by its own thread; replies go back as the
+    scheduler's futures complete, in whatever order that is.
+    """
+
+    def __init__(self, scheduler: TTSScheduler, address: str, authkey: str = ""):
+        self.scheduler = scheduler
+        self.address = address
+        if os.path.exists(address):
+            os.remove(address)  # stale socket from a previous run
+        self._listener = Listener(address, family="AF_UNIX", authkey=authkey.encode() if authkey else None)
+        os.chmod(address, 0o600)
+        self._calls = ThreadPoolExecutor(max_workers=4, thread_name_prefix="dovashi-tts-server")
+
+    def serve_forever(self) -> None:
+        logger.info("TTS server listening on %s", self.address)
+        while True:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                return  # closed
+            except Exception as e:  # failed handshake, e.g. a wrong authkey
+                logger.warning("Rejected a TTS server connection: %s", e)
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def close(self) -> None:
+        self._listener.close()
+
+    def _serve(self, conn: Connection) -> None:
+        send_lock = threading.Lock()
+
+        def reply(call_id: int, future: Future) -> None:
+            error = future.exception()
+            message = (call_id, False, _portable(error)) if error is not None else (call_id, True, future.result())
+            try:
+                with send_lock:
+                    conn.send(message)
+            except (OSError, ValueError):
+                pass  # the client went away; its calls are failed on its side
+
+        try:
+            while True:
+                call_id, op, args = conn.recv()
+                if op not in _OPS:
+                    future: Future = Future()
+                    future.set_exception(ValueError(f"Unknown TTS server call: {op}"))
+                elif op == "submit":
+                    future = self.scheduler.submit(*args)
+                else:
+                    future = self._calls.submit(getattr(self.scheduler, op), *args)
+                future.add_done_callback(lambda f, call_id=call_id: reply(call_id, f))
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the TTS models to the API workers over a Unix socket")
+    parser.add_argument("--socket", default=settings.tts_server_socket, help="socket path (default TTS_SERVER_SOCKET)")
+    parser.add_argument("--warmup", action="store_true", help="load the models before accepting connections")
+    args = parser.parse_args(argv)
+    if not args.socket:
+        parser.error("--socket or TTS_SERVER_SOCKET is required")
+    logging.basicConfig(level=logging.INFO)
+
+    limit_threads(settings.process_threads)
+    scheduler = TTSScheduler(
+        workers=settings.tts_workers,
+        mode=settings.tts_worker_mode,
+        batch_size=settings.tts_batch_size,
+        model_name=settings.tts_model_name,
+    )
+    if args.warmup:
+        scheduler.warm_up(speaker_wav=settings.warmup_speaker_wav)
+    server = TTSServer(scheduler, args.socket, settings.tts_server_authkey)
+    # Exit through the finally below so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
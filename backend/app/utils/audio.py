@@ -1,97 +1,294 @@
+import io
 import os
-import tempfile
-import mimetypes
-from typing import List, Tuple, Dict
+import struct
+import threading
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
-import librosa
 import soundfile as sf
 import ffmpeg
 
+from .resample import resample, resample_stream
+from .vad import StreamingVAD, segment_vad
 
-def ensure_wav(input_path: str, target_sr: int = 16000) -> str:
+
+# A path to an audio file, its encoded contents, or a readable (seekable) binary file object
+AudioSource = Union[str, bytes, BinaryIO]
+
+# Encoded input is handed to ffmpeg in chunks of this size
+PIPE_CHUNK_BYTES = 1 << 20
+
+
+def decode_audio(source: AudioSource, target_sr: int = 16000) -> np.ndarray:
     """
-    Ensure the input audio is a WAV PCM 16-bit mono at target_sr. If not, convert via ffmpeg.
-    Returns the path to a temporary WAV file (may be the original if already compliant).
+    Decode a path, encoded bytes or a file object once into a mono float32 buffer at target_sr.
+    libsndfile handles WAV/FLAC/OGG (and MP3 on recent builds) in memory; anything else
+    is piped through ffmpeg, which also resamples, so no temp files are written.
     """
     try:
-        y, sr = librosa.load(input_path, sr=None, mono=True)
-        # Re-write to temporary standardized wav
-        tmp_fd, tmp_path = tempfile.mkstemp(suffix=".wav")
-        os.close(tmp_fd)
-        if sr != target_sr:
-            y = librosa.resample(y, orig_sr=sr, target_sr=target_sr)
-            sr = target_sr
-        sf.write(tmp_path, y, sr, subtype="PCM_16")
-        return tmp_path
+        y, sr = sf.read(io.BytesIO(source) if isinstance(source, bytes) else source, dtype="float32", always_2d=True)
     except Exception:
-        # Fallback: use ffmpeg to convert any format to wav
-        tmp_fd, tmp_path = tempfile.mkstemp(suffix=".wav")
-        os.close(tmp_fd)
-        (
-            ffmpeg
-            .input(input_path)
-            .output(tmp_path, ac=1, ar=target_sr, f='wav', acodec='pcm_s16le')
-            .overwrite_output()
-            .run(quiet=True)
-        )
-        return tmp_path
+        if not isinstance(source, (str, bytes)):
+            source.seek(0)
+        return _ffmpeg_decode(source, target_sr)
+    y = y[:, 0] if y.shape[1] == 1 else y.mean(axis=1, dtype=np.float32)
+    return np.ascontiguousarray(resample(y, sr, target_sr), dtype=np.float32)
+
+
+def _ffmpeg_decode(source: AudioSource, target_sr: int) -> np.ndarray:
+    return np.concatenate([np.zeros(0, dtype=np.float32), *_ffmpeg_blocks(source, target_sr, 1 << 18)])
+
+
+def _ffmpeg_blocks(source: AudioSource, target_sr: int, block_frames: int) -> Iterator[np.ndarray]:
+    """
+    Decode through ffmpeg as mono float32 at target_sr, yielding up to block_frames samples at
+    a time. Bytes and file objects are copied to ffmpeg's stdin chunk by chunk from a thread
+    (stderr is drained from another), so neither side is ever held in memory as a whole.
+    """
+    from_pipe = not isinstance(source, str)
+    proc = (
+        ffmpeg
+        .input("pipe:" if from_pipe else source)
+        .output("pipe:", f="f32le", ac=1, ar=target_sr)
+        .run_async(pipe_stdin=from_pipe, pipe_stdout=True, pipe_stderr=True)
+    )
+    errors: List[bytes] = []
+
+    def feed() -> None:
+        reader = io.BytesIO(source) if isinstance(source, bytes) else source
+        try:
+            for chunk in iter(lambda: reader.read(PIPE_CHUNK_BYTES), b""):  # type: ignore[union-attr]
+                proc.stdin.write(chunk)
+        except BrokenPipeError:
+            pass
+        finally:
+            proc.stdin.close()
+
+    threads = [threading.Thread(target=lambda: errors.append(proc.stderr.read()), daemon=True)]
+    if from_pipe:
+        threads.append(threading.Thread(target=feed, daemon=True))
+    for t in threads:
+        t.start()
+    try:
+        while True:
+            data = proc.stdout.read(block_frames * 4)
+            if not data:
+                break
+            # A read may end mid-sample; carry the remainder over to the next block
+            while len(data) % 4:
+                more = proc.stdout.read(4 - len(data) % 4)
+                if not more:
+                    break
+                data += more
+            yield np.frombuffer(data[: len(data) - len(data) % 4], dtype="<f4")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        for t in threads:
+            t.join()
+        if proc.wait() not in (0, -9):
+            raise ffmpeg.Error("ffmpeg", b"", b"".join(errors))
+
+
+def audio_duration(source: AudioSource) -> Optional[float]:
+    """
+    Duration in seconds from the container header: libsndfile's, or ffprobe's for a path in a
+    format only ffmpeg reads. None if neither can tell without decoding.
+    """
+    try:
+        if isinstance(source, (str, bytes)):
+            info = sf.info(io.BytesIO(source) if isinstance(source, bytes) else source)
+        else:
+            info = sf.info(source)
+            source.seek(0)
+        return float(info.duration)
+    except Exception:
+        if not isinstance(source, (str, bytes)):
+            source.seek(0)
+    if isinstance(source, str):
+        try:
+            return float(ffmpeg.probe(source)["format"]["duration"])
+        except (ffmpeg.Error, OSError, KeyError, ValueError):
+            pass
+    return None
+
+
+def source_size(source: AudioSource) -> int:
+    """Encoded size of an input in bytes."""
+    if isinstance(source, bytes):
+        return len(source)
+    if isinstance(source, str):
+        return os.path.getsize(source)
+    pos = source.tell()
+    try:
+        return source.seek(0, os.SEEK_END)
+    finally:
+        source.seek(pos)
+
+
+def iter_audio_blocks(source: AudioSource, target_sr: int = 16000, block_s: float = 30.0) -> Iterator[np.ndarray]:
+    """
+    Incremental counterpart of decode_audio: yields mono float32 blocks at target_sr, reading
+    about block_s seconds of input at a time. Resampling runs as one continuous soxr stream,
+    so block boundaries leave no seams and memory stays proportional to block_s.
+    """
+    try:
+        f = sf.SoundFile(io.BytesIO(source) if isinstance(source, bytes) else source)
+    except Exception:
+        if not isinstance(source, (str, bytes)):
+            source.seek(0)
+        yield from _ffmpeg_blocks(source, target_sr, int(block_s * target_sr))
+        return
+    with f:
+        resampler = resample_stream(f.samplerate, target_sr) if f.samplerate != target_sr else None
+        for block in f.blocks(blocksize=max(1, int(block_s * f.samplerate)), dtype="float32", always_2d=True):
+            y = block[:, 0] if block.shape[1] == 1 else block.mean(axis=1, dtype=np.float32)
+            if resampler is not None:
+                y = resampler.resample_chunk(y)
+            if len(y):
+                yield np.ascontiguousarray(y, dtype=np.float32)
+        if resampler is not None:
+            tail = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+            if len(tail):
+                yield tail
+
+
+def encode_wav_bytes(y: np.ndarray, sr: int) -> bytes:
+    """Encode a (view of a) float buffer as an in-memory PCM_16 WAV file."""
+    buf = io.BytesIO()
+    sf.write(buf, y, sr, format="WAV", subtype="PCM_16")
+    return buf.getvalue()
 
 
-def load_mono_wav(path: str, sr: int = 16000) -> Tuple[np.ndarray, int]:
-    y, s = librosa.load(path, sr=sr, mono=True)
-    return y, s
+def encode_pcm16(y: np.ndarray) -> bytes:
+    return (np.clip(y, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+
+def wav_stream_header(sr: int, channels: int = 1) -> bytes:
+    """
+    Header of a PCM_16 WAV whose length is not known yet: the RIFF and data sizes are set
+    to 0xFFFFFFFF, which players and ffmpeg read as "until end of stream".
+    """
+    block_align = channels * 2
+    return (
+        b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sr, sr * block_align, block_align, 16)
+        + b"data" + struct.pack("<I", 0xFFFFFFFF)
+    )
 
 
-def segment_audio_vad(y: np.ndarray, sr: int, top_db: float = 30.0, min_gap_s: float = 0.25) -> Tuple[List[Tuple[int, int]], List[float]]:
+def segment_audio_vad(
+    y: np.ndarray,
+    sr: int,
+    top_db: float = 30.0,
+    min_gap_s: float = 0.25,
+    max_segment_s: Optional[float] = None,
+    hysteresis_db: float = 0.0,
+) -> Tuple[List[Tuple[int, int]], List[float]]:
     """
     Segment audio into voiced chunks using an energy-based splitter.
     Returns:
     - segments: list of (start_sample, end_sample)
     - gaps_seconds: list of gaps between segments including leading and trailing silences.
       Length is len(segments) + 1: [leading_silence, gap1, gap2, ..., trailing_silence]
+    Voiced regions longer than max_segment_s (if given) are split at their quietest point.
     """
-    intervals = librosa.effects.split(y, top_db=top_db)
-    if len(intervals) == 0:
-        # Treat whole audio as one segment
-        intervals = np.array([[0, len(y)]])
+    return segment_vad(y, sr, top_db=top_db, min_gap_s=min_gap_s, max_segment_s=max_segment_s, hysteresis_db=hysteresis_db)
+
 
-    # Merge segments that are separated by very small gaps (< min_gap_s)
-    merged = []
-    for start, end in intervals:
-        if not merged:
-            merged.append([int(start), int(end)])
+def group_segments_into_windows(segments: List[Tuple[int, int]], sr: int, max_window_s: float) -> List[Tuple[int, int]]:
+    """
+    Group consecutive VAD segments into as few windows as possible, each at most max_window_s long
+    (a single longer segment becomes its own window). Windows start/end on segment boundaries.
+    """
+    max_len = int(max_window_s * sr)
+    windows: List[Tuple[int, int]] = []
+    for s, e in segments:
+        if windows and e - windows[-1][0] <= max_len:
+            windows[-1] = (windows[-1][0], e)
         else:
-            prev_start, prev_end = merged[-1]
-            gap = (start - prev_end) / sr
-            if gap < min_gap_s:
-                merged[-1][1] = int(end)
-            else:
-                merged.append([int(start), int(end)])
-
-    segments = [(s, e) for s, e in merged]
-
-    # Compute gaps (leading, betweens, trailing)
-    gaps_seconds: List[float] = []
-    # Leading
-    leading = segments[0][0] / sr
-    gaps_seconds.append(max(0.0, float(leading)))
-    # Between
-    for i in range(len(segments) - 1):
-        gap = (segments[i + 1][0] - segments[i][1]) / sr
-        gaps_seconds.append(max(0.0, float(gap)))
-    # Trailing
-    trailing = (len(y) - segments[-1][1]) / sr
-    gaps_seconds.append(max(0.0, float(trailing)))
-
-    return segments, gaps_seconds
-
-
-def save_chunk_to_wav(y: np.ndarray, sr: int) -> str:
-    fd, path = tempfile.mkstemp(suffix=".wav")
-    os.close(fd)
-    sf.write(path, y, sr, subtype="PCM_16")
-    return path
+            windows.append((s, e))
+    return windows
+
+
+def align_spans_to_segments(spans: List[Tuple[float, float, str]], segments: List[Tuple[int, int]], sr: int) -> List[str]:
+    """
+    Map timestamped transcript spans (seconds) onto VAD segments (samples). Each span goes to the
+    segment it overlaps most, or the nearest one by midpoint when it overlaps none.
+    Returns one (possibly empty) text per segment.
+    """
+    texts: List[List[str]] = [[] for _ in segments]
+    if not spans or len(segments) == 0:
+        return ["" for _ in segments]
+
+    spans = sorted(spans, key=lambda span: span[0])
+    seg = np.asarray(segments, dtype=np.float64) / sr
+    span_t = np.asarray([(a, b) for a, b, _ in spans], dtype=np.float64)
+    # overlap[i, j] = seconds of span i inside segment j
+    overlap = np.minimum(span_t[:, 1:2], seg[None, :, 1]) - np.maximum(span_t[:, 0:1], seg[None, :, 0])
+    best = overlap.argmax(axis=1)
+    no_overlap = overlap.max(axis=1) <= 0
+    if no_overlap.any():
+        span_mid = span_t.mean(axis=1)
+        seg_mid = seg.mean(axis=1)
+        nearest = np.abs(span_mid[:, None] - seg_mid[None, :]).argmin(axis=1)
+        best = np.where(no_overlap, nearest, best)
+
+    for (_, _, text), j in zip(spans, best):
+        if text:
+            texts[int(j)].append(text)
+    return [" ".join(t) for t in texts]
+
+
+class StreamingSegmenter:
+    """
+    Incremental counterpart of segment_audio_vad for audio that arrives in chunks.
+    feed() returns finalized segments as (samples, leading_gap_seconds); flush() returns the
+    remaining segments plus the trailing silence. Boundaries come from StreamingVAD (identical
+    to segment_audio_vad's when `ref` is the input's peak_frame_power); this class only keeps
+    the samples of the segment that is still open.
+    """
+
+    def __init__(
+        self,
+        sr: int,
+        top_db: float = 30.0,
+        min_gap_s: float = 0.25,
+        hop_length: int = 512,
+        max_segment_s: Optional[float] = 30.0,
+        ref: Optional[float] = None,
+    ):
+        self.sr = sr
+        self._vad = StreamingVAD(
+            sr, top_db=top_db, min_gap_s=min_gap_s, hop_length=hop_length, max_segment_s=max_segment_s, ref=ref
+        )
+        self._buf = np.zeros(0, dtype=np.float32)
+        self._buf_start = 0  # absolute sample index of _buf[0]
+
+    def feed(self, chunk: np.ndarray) -> List[Tuple[np.ndarray, float]]:
+        self._buf = np.concatenate([self._buf, np.asarray(chunk, dtype=np.float32)])
+        out = self._slice(*self._vad.feed(chunk))
+        # Keep only the open segment (if any) and samples not yet analysed
+        open_start = self._vad.open_start
+        keep_from = open_start if open_start is not None else self._vad.analysed
+        drop = keep_from - self._buf_start
+        if drop > 0:
+            self._buf = self._buf[drop:]
+            self._buf_start = keep_from
+        return out
+
+    def flush(self) -> Tuple[List[Tuple[np.ndarray, float]], float]:
+        segments, gaps = self._vad.finish()
+        out = self._slice(segments, gaps[:-1])
+        self._buf = np.zeros(0, dtype=np.float32)
+        return out, gaps[-1]
+
+    def _slice(self, segments: List[Tuple[int, int]], gaps: List[float]) -> List[Tuple[np.ndarray, float]]:
+        return [
+            (self._buf[s - self._buf_start:e - self._buf_start].copy(), gap)
+            for (s, e), gap in zip(segments, gaps)
+        ]
 
 
 def assemble_with_pauses(segment_audios: List[np.ndarray], segment_srs: List[int], gaps_seconds: List[float], target_sr: int = 22050) -> np.ndarray:
@@ -101,11 +298,8 @@ def assemble_with_pauses(segment_audios: List[np.ndarray], segment_srs: List[int
     """
     assert len(gaps_seconds) == len(segment_audios) + 1
 
-    # Resample all segments to target_sr
-    segments_resampled = [
-        librosa.resample(seg, orig_sr=sr, target_sr=target_sr) if sr != target_sr else seg
-        for seg, sr in zip(segment_audios, segment_srs)
-    ]
+    # Resample segments whose rate differs from target_sr (none when target_sr is the TTS rate)
+    segments_resampled = [resample(seg, sr, target_sr) for seg, sr in zip(segment_audios, segment_srs)]
 
     output = []
     # Leading silence
@@ -122,8 +316,3 @@ def assemble_with_pauses(segment_audios: List[np.ndarray], segment_srs: List[int
         return np.concatenate(output)
     else:
         return np.zeros(1, dtype=np.float32)
-
-
-def guess_mime_type(path: str) -> str:
-    mt, _ = mimetypes.guess_type(path)
-    return mt or 'application/octet-stream'
@@ -0,0 +1,282 @@
+from __future__ import annotations
+import inspect
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+import ffmpeg
+
+from .audio import encode_pcm16, wav_stream_header
+from .resample import resample_stream
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    sf_format: str
+    subtype: str
+    media_type: str
+    extension: str
+    # Lossy codecs take a bitrate; lossless ones ignore it
+    lossy: bool = False
+    # ffmpeg encoder for streams libsndfile can only write to seekable files
+    ffmpeg_codec: Optional[str] = None
+
+
+OUTPUT_FORMATS: Dict[str, OutputFormat] = {
+    "wav": OutputFormat("WAV", "PCM_16", "audio/wav", ".wav"),
+    # Headerless PCM_16 little-endian mono at the TTS sample rate
+    "pcm": OutputFormat("RAW", "PCM_16", "application/octet-stream", ".pcm"),
+    "flac": OutputFormat("FLAC", "PCM_16", "audio/flac", ".flac", ffmpeg_codec="flac"),
+    "ogg": OutputFormat("OGG", "VORBIS", "audio/ogg", ".ogg", lossy=True),
+    "opus": OutputFormat("OGG", "OPUS", "audio/ogg; codecs=opus", ".opus", lossy=True),
+    "mp3": OutputFormat("MP3", "MPEG_LAYER_III", "audio/mpeg", ".mp3", lossy=True, ffmpeg_codec="libmp3lame"),
+}
+
+_OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+# compression_level / bitrate_mode arrived in soundfile 0.13; older ones encode at the codec default
+_SF_COMPRESSION = "compression_level" in inspect.signature(sf.SoundFile.__init__).parameters
+
+
+def check_output_format(name: str) -> OutputFormat:
+    fmt = OUTPUT_FORMATS.get(name)
+    if fmt is None:
+        raise ValueError("output_format must be one of " + ", ".join(OUTPUT_FORMATS))
+    return fmt
+
+
+def encoder_rate(name: str, sr: int) -> int:
+    """Rate the audio is encoded at: Opus only takes a few rates, anything else goes up to 48 kHz."""
+    return 48000 if name == "opus" and sr not in _OPUS_RATES else sr
+
+
+def _bitrate_range(name: str, sr: int) -> Tuple[float, float]:
+    # kbps of mono output at libsndfile's compression levels 1 and 0
+    if name == "opus":
+        return 6, 256
+    if name == "mp3":
+        return (32, 320) if sr >= 32000 else (8, 160)
+    return (48, 156) if sr >= 32000 else (35, 95)
+
+
+def compression_level(name: str, sr: int, bitrate_kbps: Optional[float]) -> Optional[float]:
+    """
+    libsndfile's 0 (best) .. 1 (smallest) compression level for about bitrate_kbps. It spans the
+    codec's bitrate range linearly for Opus and constant-bitrate MP3; Vorbis is variable-rate and
+    content-dependent, so there the bitrate is only approximate.
+    """
+    if not bitrate_kbps or not check_output_format(name).lossy:
+        return None
+    low, high = _bitrate_range(name, sr)
+    return float(np.clip((high - bitrate_kbps) / (high - low), 0.0, 0.99))
+
+
+def _soundfile_options(name: str, sr: int, bitrate_kbps: Optional[float]) -> Dict[str, object]:
+    # Only passed when set, so lossless formats open on any soundfile version
+    level = compression_level(name, sr, bitrate_kbps)
+    if level is None or not _SF_COMPRESSION:
+        return {}
+    options: Dict[str, object] = {"compression_level": level}
+    if name == "mp3":
+        options["bitrate_mode"] = "CONSTANT"
+    return options
+
+
+class _Rate:
+    """Streams pieces through a soxr resampler when the encoder needs another rate."""
+
+    def __init__(self, name: str, sr: int):
+        self.sr = encoder_rate(name, sr)
+        self._stream = resample_stream(sr, self.sr) if self.sr != sr else None
+
+    def __call__(self, y: np.ndarray, last: bool = False) -> np.ndarray:
+        y = np.asarray(y, dtype=np.float32)
+        return self._stream.resample_chunk(y, last=last) if self._stream is not None else y
+
+
+class AudioFileWriter:
+    """Writes pieces straight into an encoded file of any OUTPUT_FORMATS format."""
+
+    def __init__(self, path: str, name: str, sr: int, bitrate_kbps: Optional[float] = None):
+        fmt = check_output_format(name)
+        self._rate = _Rate(name, sr)
+        self._file = sf.SoundFile(
+            path, "w", samplerate=self._rate.sr, channels=1, format=fmt.sf_format, subtype=fmt.subtype,
+            **_soundfile_options(name, self._rate.sr, bitrate_kbps),
+        )
+
+    def write(self, y: np.ndarray) -> None:
+        self._file.write(self._rate(y))
+
+    def close(self) -> None:
+        try:
+            tail = self._rate(np.zeros(0, dtype=np.float32), last=True)
+            if len(tail):
+                self._file.write(tail)
+        finally:
+            self._file.close()
+
+
+class StreamEncoder:
+    """
+    Encodes pieces of a track as they are produced: encode() returns whatever encoded bytes
+    are ready, finish() the rest. Memory stays proportional to a piece, never the track.
+    """
+
+    def __init__(self, name: str, sr: int):
+        self.name = name
+        self._rate = _Rate(name, sr)
+        self.sr = self._rate.sr
+
+    def encode(self, y: np.ndarray) -> bytes:
+        return self._encode(self._rate(y))
+
+    def finish(self) -> bytes:
+        return self._encode(self._rate(np.zeros(0, dtype=np.float32), last=True)) + self._finish()
+
+    def _encode(self, y: np.ndarray) -> bytes:
+        raise NotImplementedError
+
+    def _finish(self) -> bytes:
+        return b""
+
+    def close(self) -> None:
+        """Release resources without finishing the stream (on errors)."""
+
+
+class _PcmStreamEncoder(StreamEncoder):
+    def __init__(self, name: str, sr: int, wav_header: bool):
+        super().__init__(name, sr)
+        self._header = wav_stream_header(self.sr) if wav_header else b""
+
+    def _encode(self, y: np.ndarray) -> bytes:
+        header, self._header = self._header, b""
+        return header + encode_pcm16(y)
+
+
+class _ForwardSink:
+    """
+    Write-only file object for libsndfile that hands bytes on as soon as they are written.
+    Ogg never seeks back over data it has written, so the stream needs no rewrites.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        target = offset if whence == 0 else self._pos + offset
+        if target != self._pos:
+            raise OSError("stream output cannot seek")
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        return b""
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+class _SoundFileStreamEncoder(StreamEncoder):
+    """Ogg Vorbis / Opus through libsndfile into a _ForwardSink."""
+
+    def __init__(self, name: str, sr: int, bitrate_kbps: Optional[float]):
+        super().__init__(name, sr)
+        fmt = OUTPUT_FORMATS[name]
+        self._sink = _ForwardSink()
+        self._file = sf.SoundFile(
+            self._sink, "w", samplerate=self.sr, channels=1, format=fmt.sf_format, subtype=fmt.subtype,
+            **_soundfile_options(name, self.sr, bitrate_kbps),
+        )
+
+    def _encode(self, y: np.ndarray) -> bytes:
+        if len(y):
+            self._file.write(y)
+        return self._sink.drain()
+
+    def _finish(self) -> bytes:
+        self._file.close()
+        return self._sink.drain()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+class _FfmpegStreamEncoder(StreamEncoder):
+    """
+    MP3 / FLAC through an ffmpeg pipe; libsndfile rewrites their headers at the end, which a
+    stream can't do. Output is read by a thread so ffmpeg never blocks on a full stdout pipe.
+    """
+
+    def __init__(self, name: str, sr: int, bitrate_kbps: Optional[float]):
+        super().__init__(name, sr)
+        codec = OUTPUT_FORMATS[name].ffmpeg_codec
+        out_args = {"f": name, "acodec": codec}
+        if bitrate_kbps and name != "flac":
+            out_args["audio_bitrate"] = f"{int(bitrate_kbps)}k"
+        self._proc = (
+            ffmpeg
+            .input("pipe:", f="f32le", ac=1, ar=self.sr)
+            .output("pipe:", **out_args)
+            .run_async(pipe_stdin=True, pipe_stdout=True, pipe_stderr=True)
+        )
+        self._out: "queue.Queue[bytes]" = queue.Queue()
+        self._errors: List[bytes] = []
+        self._threads = [
+            threading.Thread(target=self._pump, daemon=True),
+            threading.Thread(target=lambda: self._errors.append(self._proc.stderr.read()), daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def _pump(self) -> None:
+        for chunk in iter(lambda: self._proc.stdout.read1(1 << 16), b""):
+            self._out.put(chunk)
+
+    def _drain(self) -> bytes:
+        chunks = []
+        while True:
+            try:
+                chunks.append(self._out.get_nowait())
+            except queue.Empty:
+                return b"".join(chunks)
+
+    def _encode(self, y: np.ndarray) -> bytes:
+        if len(y):
+            self._proc.stdin.write(np.asarray(y, dtype="<f4").tobytes())
+        return self._drain()
+
+    def _finish(self) -> bytes:
+        self._proc.stdin.close()
+        for t in self._threads:
+            t.join()
+        if self._proc.wait() != 0:
+            raise ffmpeg.Error("ffmpeg", b"", b"".join(self._errors))
+        return self._drain()
+
+    def close(self) -> None:
+        if self._proc.poll() is None:
+            self._proc.kill()
+        self._proc.wait()
+
+
+def make_stream_encoder(name: str, sr: int, bitrate_kbps: Optional[float] = None) -> StreamEncoder:
+    fmt = check_output_format(name)
+    if name in ("wav", "pcm"):
+        return _PcmStreamEncoder(name, sr, wav_header=name == "wav")
+    if fmt.ffmpeg_codec is not None:
+        return _FfmpegStreamEncoder(name, sr, bitrate_kbps)
+    return _SoundFileStreamEncoder(name, sr, bitrate_kbps)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+import threading
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from math import gcd
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from ..config import settings
+
+# Quality/speed knob shared by every backend; "high" matches librosa's default (soxr_hq)
+QUALITIES = ("fast", "balanced", "high")
+
+_SOXR_QUALITY = {"fast": "LQ", "balanced": "MQ", "high": "HQ"}
+# Polyphase FIR: taps per phase on each side of the centre, and Kaiser window beta
+_POLY_FILTER = {"fast": (8, 5.0), "balanced": (16, 7.0), "high": (32, 9.0)}
+# ffmpeg swresample filter length per quality
+_FFMPEG_FILTER_SIZE = {"fast": 8, "balanced": 16, "high": 32}
+
+
+def _check_quality(quality: str) -> None:
+    if quality not in QUALITIES:
+        raise ValueError(f"Unknown resample quality: {quality}")
+
+
+class Resampler(ABC):
+    """Mono float32 sample-rate conversion; resample() is a no-op when the rates already match."""
+
+    name = ""
+
+    def __init__(self, quality: str = "high"):
+        _check_quality(quality)
+        self.quality = quality
+
+    def resample(self, y: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+        y = np.asarray(y, dtype=np.float32)
+        if orig_sr == target_sr or len(y) == 0:
+            return y
+        return np.ascontiguousarray(self._resample(y, int(orig_sr), int(target_sr)), dtype=np.float32)
+
+    @abstractmethod
+    def _resample(self, y: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+        raise NotImplementedError
+
+
+class SoxrResampler(Resampler):
+    """libsoxr. One ResampleStream per rate pair and thread is kept and cleared between calls,
+    so the filter is designed once per pair instead of on every call."""
+
+    name = "soxr"
+
+    def __init__(self, quality: str = "high"):
+        super().__init__(quality)
+        self._local = threading.local()
+
+    def stream(self, orig_sr: int, target_sr: int):
+        """A fresh soxr.ResampleStream for chunked input (see iter_audio_blocks)."""
+        import soxr
+
+        return soxr.ResampleStream(orig_sr, target_sr, 1, dtype="float32", quality=_SOXR_QUALITY[self.quality])
+
+    def _resample(self, y: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+        streams: Dict[Tuple[int, int], object] = getattr(self._local, "streams", None) or {}
+        self._local.streams = streams
+        stream = streams.get((orig_sr, target_sr))
+        if stream is None:
+            stream = streams[(orig_sr, target_sr)] = self.stream(orig_sr, target_sr)
+        else:
+            stream.clear()  # type: ignore[attr-defined]
+        return stream.resample_chunk(y, last=True)  # type: ignore[attr-defined]
+
+
+@lru_cache(maxsize=64)
+def _polyphase_filter(up: int, down: int, quality: str) -> np.ndarray:
+    from scipy.signal import firwin
+
+    taps, beta = _POLY_FILTER[quality]
+    max_rate = max(up, down)
+    half_len = taps * max_rate
+    h = firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", beta)).astype(np.float32)
+    h.setflags(write=False)
+    return h
+
+
+class ScipyResampler(Resampler):
+    """scipy.signal.resample_poly with the anti-aliasing FIR designed once per rate pair and cached."""
+
+    name = "scipy"
+
+    def _resample(self, y: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+        from scipy.signal import resample_poly
+
+        g = gcd(orig_sr, target_sr)
+        up, down = target_sr // g, orig_sr // g
+        return resample_poly(y, up, down, window=_polyphase_filter(up, down, self.quality))
+
+
+class FFmpegResampler(Resampler):
+    """ffmpeg's swresample over raw f32le pipes; useful where ffmpeg is already the decoder."""
+
+    name = "ffmpeg"
+
+    def _resample(self, y: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+        import ffmpeg
+
+        out, _ = (
+            ffmpeg
+            .input("pipe:", f="f32le", ar=orig_sr, ac=1)
+            .output("pipe:", f="f32le", ar=target_sr, ac=1, af=f"aresample=filter_size={_FFMPEG_FILTER_SIZE[self.quality]}")
+            .run(input=y.astype("<f4").tobytes(), capture_stdout=True, capture_stderr=True)
+        )
+        return np.frombuffer(out, dtype="<f4")
+
+
+class LibrosaResampler(Resampler):
+    """librosa.resample; the fallback when no faster backend is available."""
+
+    name = "librosa"
+
+    def _resample(self, y: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+        import librosa
+
+        res_type = {"fast": "soxr_lq", "balanced": "soxr_mq", "high": "soxr_hq"}[self.quality]
+        return librosa.resample(y, orig_sr=orig_sr, target_sr=target_sr, res_type=res_type)
+
+
+BACKENDS = {
+    "soxr": SoxrResampler,
+    "scipy": ScipyResampler,
+    "ffmpeg": FFmpegResampler,
+    "librosa": LibrosaResampler,
+}
+
+
+def make_resampler(backend: str, quality: str = "high") -> Resampler:
+    cls = BACKENDS.get(backend)
+    if cls is None:
+        raise ValueError(f"Unknown resample backend: {backend}")
+    return cls(quality)
+
+
+_resampler: Optional[Resampler] = None
+_resampler_lock = threading.Lock()
+
+
+def get_resampler() -> Resampler:
+    global _resampler
+    if _resampler is None:
+        with _resampler_lock:
+            if _resampler is None:
+                _resampler = make_resampler(settings.resample_backend, settings.resample_quality)
+    return _resampler
+
+
+def resample(y: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    return get_resampler().resample(y, orig_sr, target_sr)
+
+
+def resample_stream(orig_sr: int, target_sr: int):
+    """Stateful chunk resampler (soxr) at the configured quality, for block-wise decoding."""
+    res = get_resampler()
+    return SoxrResampler(res.quality).stream(orig_sr, target_sr)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+from typing import Tuple
+
+import numpy as np
+
+STRETCH_METHODS = ("wsola", "phase_vocoder")
+
+
+def _periodic_hann(n: int) -> np.ndarray:
+    # Overlap-added at 50% these sum to exactly 1, so unstretched frames come back unchanged
+    return (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n) / n)).astype(np.float32)
+
+
+def wsola(y: np.ndarray, rate: float, sr: int, frame_s: float = 0.03, search_s: float = 0.01) -> np.ndarray:
+    """
+    Time-stretch by `rate` (> 1 shortens) without changing pitch, by waveform-similarity overlap-add.
+    Output frames are taken from near their nominal input position, shifted by up to search_s to
+    the offset that best continues the previous frame; the candidates for a frame are scored with
+    one matrix-vector product.
+    """
+    y = np.asarray(y, dtype=np.float32)
+    frame = max(2, int(frame_s * sr) // 2 * 2)
+    if len(y) < 2 * frame or rate <= 0:
+        return y
+    hop_out = frame // 2
+    hop_in = hop_out * rate
+    search = int(search_s * sr)
+    out_len = int(round(len(y) / rate))
+    n_frames = out_len // hop_out + 1
+
+    # Padded so every candidate window is in bounds; positions below are indices into ypad
+    ypad = np.concatenate((np.zeros(search, np.float32), y, np.zeros(2 * frame + 2 * search + int(hop_in) + 1, np.float32)))
+    windows = np.lib.stride_tricks.sliding_window_view(ypad, frame)
+    window = _periodic_hann(frame)
+    first = window.copy()
+    first[:hop_out] = 1.0  # nothing overlaps the start of the first frame
+    # Similarity is scored on every 4th sample, which is plenty to line up speech waveforms
+    step = 4 if sr >= 16000 else 1
+    out = np.zeros(n_frames * hop_out + frame, dtype=np.float32)
+
+    pos = search
+    for k in range(n_frames):
+        nominal = int(k * hop_in)  # ypad index of (input position - search)
+        if k:
+            natural = windows[pos + hop_out, ::step]
+            candidates = windows[nominal:nominal + 2 * search + 1, ::step]
+            pos = nominal + int(np.argmax(candidates @ natural))
+        out[k * hop_out:k * hop_out + frame] += (window if k else first) * windows[pos]
+    return out[:out_len]
+
+
+def time_stretch(y: np.ndarray, rate: float, sr: int, method: str = "wsola") -> np.ndarray:
+    if method == "wsola":
+        return wsola(y, rate, sr)
+    if method == "phase_vocoder":
+        import librosa
+
+        return librosa.effects.time_stretch(np.asarray(y, dtype=np.float32), rate=rate).astype(np.float32)
+    raise ValueError(f"Unknown time-stretch method: {method}")
+
+
+class TimeAligner:
+    """
+    Fits synthesized segments to the timing of the source so the output stays in sync with it.
+    Each segment starts at its source start (or right after the previous one if that overran)
+    and is time-stretched toward its source length: left alone within `tolerance`, otherwise
+    stretched by at most max_stretch either way. A segment may overrun into the following
+    pause, up to min_gap_s before the next segment's source start; whatever still doesn't fit
+    delays the next segment, which shortens the pause after it. The output is as long as the
+    source unless the last segments can't be compressed enough.
+    Segments are fitted in order through fit(); positions are in samples at `sr`.
+    """
+
+    def __init__(
+        self,
+        starts_s: np.ndarray,
+        ends_s: np.ndarray,
+        total_s: float,
+        sr: int,
+        tolerance: float = 0.1,
+        max_stretch: float = 1.5,
+        min_gap_s: float = 0.05,
+        method: str = "wsola",
+    ):
+        if method not in STRETCH_METHODS:
+            raise ValueError(f"Unknown time-stretch method: {method}")
+        self.sr = sr
+        self.starts = np.rint(np.asarray(starts_s) * sr).astype(np.int64)
+        self.ends = np.rint(np.asarray(ends_s) * sr).astype(np.int64)
+        self.total = int(round(total_s * sr))
+        self.tolerance = tolerance
+        self.max_stretch = max(1.0, max_stretch)
+        self.min_gap = int(min_gap_s * sr)
+        self.method = method
+        self.cursor = 0  # end of the last placed segment
+
+    def fit(self, index: int, wav: np.ndarray) -> Tuple[int, np.ndarray]:
+        """Output position and the (possibly stretched) samples of segment `index`."""
+        start = max(int(self.starts[index]), self.cursor)
+        limit = int(self.starts[index + 1]) - self.min_gap if index + 1 < len(self.starts) else self.total
+        slot = max(1, int(self.ends[index] - self.starts[index]))
+        target = float(np.clip(len(wav), slot * (1 - self.tolerance), slot * (1 + self.tolerance)))
+        target = max(1.0, min(target, limit - start))
+        rate = float(np.clip(len(wav) / target, 1 / self.max_stretch, self.max_stretch))
+        if len(wav) and abs(rate - 1.0) > 0.01:
+            wav = time_stretch(wav, rate, self.sr, self.method)
+        self.cursor = start + len(wav)
+        return start, wav
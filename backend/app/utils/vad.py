@@ -0,0 +1,344 @@
+from __future__ import annotations
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+Segments = List[Tuple[int, int]]
+
+
+def _block_power(y: np.ndarray, hop_length: int) -> np.ndarray:
+    """Sum of squares of each complete hop-sized block (no squared temporary is allocated)."""
+    n = len(y) // hop_length
+    blocks = y[: n * hop_length].reshape(n, hop_length)
+    return np.einsum("ij,ij->i", blocks, blocks, dtype=np.float64)
+
+
+def frame_power(y: np.ndarray, frame_length: int = 2048, hop_length: int = 512) -> np.ndarray:
+    """
+    Mean power of centered, zero-padded frames, matching librosa.feature.rms(center=True) ** 2.
+    Computed from hop-block sums, so memory stays O(n / hop_length).
+    """
+    if frame_length % (2 * hop_length):
+        raise ValueError("frame_length must be a multiple of 2 * hop_length")
+    y = np.asarray(y, dtype=np.float32)
+    k = frame_length // hop_length
+    full = len(y) // hop_length
+    tail = y[full * hop_length:]
+    pad = np.zeros(k // 2)
+    blocks = np.concatenate((pad, _block_power(y, hop_length), [float(np.dot(tail, tail))], pad))
+    sums = np.convolve(blocks, np.ones(k), mode="valid")
+    return sums[: 1 + len(y) // hop_length] / frame_length
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start (inclusive) and end (exclusive) indices of the True runs in mask."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return edges[::2], edges[1::2]
+
+
+def _hysteresis(hi: np.ndarray, lo: np.ndarray, active_at_start: bool = False) -> np.ndarray:
+    """
+    Frames are voiced inside every run of `lo` that contains at least one `hi` frame.
+    active_at_start marks the first run as voiced when it continues an already voiced run.
+    """
+    starts, ends = _runs(lo)
+    if len(starts) == 0:
+        return lo.copy()
+    has_hi = np.maximum.reduceat(hi.astype(np.int8), starts) > 0
+    if active_at_start and starts[0] == 0:
+        has_hi[0] = True
+    marks = np.zeros(len(lo) + 1, dtype=np.int32)
+    np.add.at(marks, starts[has_hi], 1)
+    np.add.at(marks, ends[has_hi], -1)
+    return np.cumsum(marks[:-1]) > 0
+
+
+def _thresholds(ref: np.ndarray | float, top_db: float, hysteresis_db: float):
+    hi = ref * 10.0 ** (-top_db / 10.0)
+    lo = ref * 10.0 ** (-(top_db + max(0.0, hysteresis_db)) / 10.0)
+    return hi, lo
+
+
+def _split_long(starts: np.ndarray, ends: np.ndarray, power: np.ndarray, hop_length: int, max_len: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Split segments longer than max_len at the quietest frame in the last quarter of each window."""
+    if not ((ends - starts) > max_len).any():
+        return starts, ends
+    out_s: List[int] = []
+    out_e: List[int] = []
+    for s, e in zip(starts.tolist(), ends.tolist()):
+        while e - s > max_len:
+            f0 = (s + (max_len * 3) // 4) // hop_length
+            f1 = max(f0 + 1, (s + max_len) // hop_length)
+            cut = (f0 + int(np.argmin(power[f0:f1]))) * hop_length
+            cut = min(max(cut, s + 1), s + max_len)
+            out_s.append(s)
+            out_e.append(cut)
+            s = cut
+        out_s.append(s)
+        out_e.append(e)
+    return np.asarray(out_s, dtype=np.int64), np.asarray(out_e, dtype=np.int64)
+
+
+def segment_vad(
+    y: np.ndarray,
+    sr: int,
+    top_db: float = 30.0,
+    min_gap_s: float = 0.25,
+    frame_length: int = 2048,
+    hop_length: int = 512,
+    hysteresis_db: float = 0.0,
+    max_segment_s: Optional[float] = None,
+) -> Tuple[Segments, List[float]]:
+    """
+    Vectorized energy VAD with the segment_audio_vad contract:
+    - segments: list of (start_sample, end_sample)
+    - gaps_seconds: [leading_silence, gap1, ..., trailing_silence], len(segments) + 1
+    Frames louder than top_db below the loudest frame are voiced; with hysteresis_db > 0 a
+    voiced region only ends once energy drops a further hysteresis_db. Regions separated by
+    less than min_gap_s are merged, and with max_segment_s longer regions are split.
+    """
+    n = len(y)
+    power = frame_power(y, frame_length, hop_length)
+    hi_th, lo_th = _thresholds(power.max() if len(power) else 0.0, top_db, hysteresis_db)
+    hi = power > hi_th
+    voiced = _hysteresis(hi, power > lo_th) if hysteresis_db > 0 else hi
+
+    starts, ends = _runs(voiced)
+    starts = np.minimum(starts * hop_length, n)
+    ends = np.minimum(ends * hop_length, n)
+    if len(starts) == 0:
+        # Treat whole audio as one segment
+        starts, ends = np.array([0]), np.array([n])
+
+    # Merge regions separated by gaps shorter than min_gap_s
+    keep = (starts[1:] - ends[:-1]) >= min_gap_s * sr
+    starts = starts[np.concatenate(([True], keep))]
+    ends = ends[np.concatenate((keep, [True]))]
+
+    if max_segment_s:
+        starts, ends = _split_long(starts, ends, power, hop_length, int(max_segment_s * sr))
+
+    gaps = np.concatenate(([starts[0]], starts[1:] - ends[:-1], [n - ends[-1]])) / sr
+    segments = list(zip(starts.tolist(), ends.tolist()))
+    return segments, np.maximum(gaps, 0.0).tolist()
+
+
+class FramePower:
+    """
+    Incremental frame_power: feed() returns the frames whose window is complete so far and
+    finish() the rest, padding the end like the batch version. Concatenated, the output
+    equals frame_power() of the whole signal; only the last frame_length samples are kept.
+    """
+
+    def __init__(self, frame_length: int = 2048, hop_length: int = 512):
+        if frame_length % (2 * hop_length):
+            raise ValueError("frame_length must be a multiple of 2 * hop_length")
+        self.frame_length = frame_length
+        self.hop = hop_length
+        self._k = frame_length // hop_length
+        # Hop-block powers not yet covered by a complete frame, starting with the leading pad
+        self._blocks = np.zeros(self._k // 2)
+        self._tail = np.zeros(0, dtype=np.float32)
+        self.samples = 0
+        self.frames = 0
+
+    def feed(self, chunk: np.ndarray) -> np.ndarray:
+        chunk = np.asarray(chunk, dtype=np.float32)
+        self.samples += len(chunk)
+        y = np.concatenate((self._tail, chunk))
+        n = len(y) // self.hop
+        self._tail = y[n * self.hop:].copy()
+        if n == 0:
+            return np.zeros(0)
+        return self._emit(np.concatenate((self._blocks, _block_power(y, self.hop))))
+
+    def finish(self) -> np.ndarray:
+        tail = float(np.dot(self._tail, self._tail))
+        done = self.frames
+        out = self._emit(np.concatenate((self._blocks, [tail], np.zeros(self._k // 2))))
+        # frame_power has 1 + n // hop frames; the padding yields one more
+        total = 1 + self.samples // self.hop
+        self.frames = total
+        return out[: total - done]
+
+    def _emit(self, blocks: np.ndarray) -> np.ndarray:
+        m = len(blocks) - self._k + 1
+        if m <= 0:
+            self._blocks = blocks
+            return np.zeros(0)
+        sums = np.convolve(blocks, np.ones(self._k), mode="valid")
+        self._blocks = blocks[m:]
+        self.frames += m
+        return sums / self.frame_length
+
+
+def peak_frame_power(blocks: Iterable[np.ndarray], frame_length: int = 2048, hop_length: int = 512) -> float:
+    """Loudest frame_power of a signal given block by block: segment_vad's reference level."""
+    power = FramePower(frame_length, hop_length)
+    peak = 0.0
+    for block in blocks:
+        frames = power.feed(block)
+        if len(frames):
+            peak = max(peak, float(frames.max()))
+    frames = power.finish()
+    return max(peak, float(frames.max())) if len(frames) else peak
+
+
+class StreamingVAD:
+    """
+    Stateful counterpart of segment_vad for audio arriving in chunks.
+    feed() returns the segments finalized so far as (segments, gaps) with absolute sample
+    offsets and gaps[i] the silence before segments[i]; finish() returns the rest plus the
+    trailing silence, so the concatenated output follows the (segments, gaps_seconds) contract.
+    Given `ref`, the reference power segment_vad takes from the whole signal (see
+    peak_frame_power, a first pass over the input), the result is exactly segment_vad's:
+    same frames, merging and splitting. Without it (live audio) the reference is the running
+    peak, never below ref_floor, so early boundaries may differ from the batch result.
+    """
+
+    def __init__(
+        self,
+        sr: int,
+        top_db: float = 30.0,
+        min_gap_s: float = 0.25,
+        frame_length: int = 2048,
+        hop_length: int = 512,
+        hysteresis_db: float = 0.0,
+        max_segment_s: Optional[float] = None,
+        ref: Optional[float] = None,
+        ref_floor: float = 0.05,
+    ):
+        self.sr = sr
+        self.top_db = top_db
+        self.hysteresis_db = hysteresis_db
+        self.hop = hop_length
+        self.min_gap = min_gap_s * sr
+        self.max_segment = int(max_segment_s * sr) if max_segment_s else None
+        self._power = FramePower(frame_length, hop_length)
+        self._ref = ref
+        self._peak = ref_floor * ref_floor
+        # A run of frames above the low threshold that reaches the end of the analysed audio:
+        # (start sample, whether it has a frame above the high threshold yet)
+        self._held: Optional[Tuple[int, bool]] = None
+        self._seg_start: Optional[int] = None
+        self._last_voiced_end = 0
+        self._prev_end = 0
+        self._emitted = 0
+        # Frame powers of the open segment, where long segments are split
+        self._history = np.zeros(0)
+        self._history_start = 0
+
+    @property
+    def analysed(self) -> int:
+        """Samples covered by the frames classified so far."""
+        return self._power.frames * self.hop
+
+    @property
+    def open_start(self) -> Optional[int]:
+        """
+        Start of the segment still being extended, or of a run not yet classified. Segments
+        still to come start here or at `analysed`, never earlier.
+        """
+        if self._seg_start is not None:
+            return self._seg_start
+        return self._held[0] if self._held is not None else None
+
+    def feed(self, chunk: np.ndarray) -> Tuple[Segments, List[float]]:
+        segments: Segments = []
+        gaps: List[float] = []
+        self._classify(self._power.feed(chunk), segments, gaps)
+        return segments, gaps
+
+    def finish(self) -> Tuple[Segments, List[float]]:
+        segments: Segments = []
+        gaps: List[float] = []
+        total = self._power.samples
+        self._classify(self._power.finish(), segments, gaps, total=total)
+        if self._seg_start is not None:
+            self._finalize(segments, gaps)
+        if not self._emitted:
+            # No voiced frame at all: the whole audio is one segment, as in segment_vad
+            self._seg_start, self._last_voiced_end = 0, total
+            self._split_open(segments, gaps)
+            self._finalize(segments, gaps)
+        gaps.append(max(0.0, (total - self._prev_end) / self.sr))
+        return segments, gaps
+
+    def _classify(self, power: np.ndarray, segments: Segments, gaps: List[float], total: Optional[int] = None) -> None:
+        # total is set on the last call: runs then end with the audio, clipped to its length
+        base = self._power.frames - len(power)
+        if self.max_segment is not None:
+            self._history = np.concatenate((self._history, power))
+        if self._ref is not None:
+            ref: np.ndarray | float = self._ref
+        else:
+            ref = np.maximum.accumulate(np.concatenate(([self._peak], power)))[1:]
+            if len(power):
+                self._peak = float(ref[-1])  # type: ignore[index]
+        hi_th, lo_th = _thresholds(ref, self.top_db, self.hysteresis_db)
+        hi = power > hi_th
+        lo = power > lo_th if self.hysteresis_db > 0 else hi
+
+        starts, ends = _runs(lo)
+        has_hi = np.maximum.reduceat(hi.astype(np.int8), starts) > 0 if len(starts) else np.zeros(0, dtype=bool)
+        if self._held is not None and (len(starts) == 0 or starts[0] > 0):
+            # The held run ended exactly where the previous frames did
+            held_start, held_hi = self._held
+            self._held = None
+            if held_hi:
+                self._voiced(held_start, base * self.hop, segments, gaps)
+        for s, e, voiced in zip(starts.tolist(), ends.tolist(), has_hi.tolist()):
+            start, end = (base + s) * self.hop, (base + e) * self.hop
+            if s == 0 and self._held is not None:
+                start, voiced = self._held[0], voiced or self._held[1]
+                self._held = None
+            if total is not None:
+                start, end = min(start, total), min(end, total)
+            elif e == len(lo):
+                # May continue into the next chunk; a voiced one is extended as far as it goes
+                self._held = (start, voiced)
+            if voiced:
+                self._voiced(start, end, segments, gaps)
+
+        # The next segment can start no earlier than a held run or the next frame
+        earliest = self._held[0] if self._held is not None else self.analysed
+        if self._seg_start is not None and earliest - self._last_voiced_end >= self.min_gap:
+            self._finalize(segments, gaps)
+        if self.max_segment is not None:
+            # Until something is voiced the whole input may end up as one segment to split
+            keep = self.open_start if self.open_start is not None else self.analysed if self._emitted else 0
+            drop = min(len(self._history), max(0, keep // self.hop - self._history_start))
+            self._history = self._history[drop:]
+            self._history_start += drop
+
+    def _voiced(self, start: int, end: int, segments: Segments, gaps: List[float]) -> None:
+        if self._seg_start is not None and start - self._last_voiced_end >= self.min_gap:
+            self._finalize(segments, gaps)
+        if self._seg_start is None:
+            self._seg_start = start
+        self._last_voiced_end = max(self._last_voiced_end, end)
+        self._split_open(segments, gaps)
+
+    def _finalize(self, segments: Segments, gaps: List[float], end: Optional[int] = None) -> None:
+        start = int(self._seg_start)  # type: ignore[arg-type]
+        end = self._last_voiced_end if end is None else end
+        segments.append((start, end))
+        gaps.append(max(0.0, (start - self._prev_end) / self.sr))
+        self._prev_end = end
+        self._seg_start = None
+        self._emitted += 1
+
+    def _split_open(self, segments: Segments, gaps: List[float]) -> None:
+        # _split_long on the open segment: its final end is at least _last_voiced_end
+        if self.max_segment is None:
+            return
+        max_len = self.max_segment
+        while self._seg_start is not None and self._last_voiced_end - self._seg_start > max_len:
+            s = self._seg_start
+            f0 = (s + (max_len * 3) // 4) // self.hop
+            f1 = max(f0 + 1, (s + max_len) // self.hop)
+            window = self._history[f0 - self._history_start:f1 - self._history_start]
+            cut = (f0 + int(np.argmin(window))) * self.hop
+            cut = min(max(cut, s + 1), s + max_len)
+            self._finalize(segments, gaps, end=cut)
+            self._seg_start = cut
@@ -0,0 +1,188 @@
+from __future__ import annotations
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import numpy as np
+import soundfile as sf
+
+from .config import settings
+from .utils.audio import AudioSource, decode_audio, iter_audio_blocks, segment_audio_vad
+
+# XTTS computes its conditioning latents from 22.05 kHz audio
+REFERENCE_SR = 22050
+
+_VOICE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _frame_rms(y: np.ndarray, frame: int) -> np.ndarray:
+    n = len(y) // frame
+    frames = y[: n * frame].reshape(n, frame)
+    return np.sqrt(np.mean(frames * frames, axis=1, dtype=np.float64))
+
+
+def select_reference(
+    y: np.ndarray, sr: int, bounds: np.ndarray, target_s: float, min_segment_s: float = 0.5, pause_s: float = 0.15
+) -> np.ndarray:
+    """
+    A clean speaker reference from the voiced segments `bounds` ((n, 2) samples) of y.
+    Clipped or near-silent segments and ones shorter than min_segment_s are skipped; the rest
+    are ranked by a rough SNR (loud over quiet 25 ms frames within the segment, the quiet ones
+    being the noise floor between words) and the best are taken until target_s is reached.
+    They are joined in their original order with short pauses and peak-normalized. Empty if
+    no segment is usable.
+    """
+    frame = max(1, int(0.025 * sr))
+    candidates = []
+    for start, end in np.asarray(bounds, dtype=np.int64).reshape(-1, 2):
+        seg = y[start:end]
+        peak = np.max(np.abs(seg)) if len(seg) else 0.0
+        # Too short, (near) silent or clipped
+        if len(seg) < max(min_segment_s * sr, 4 * frame) or peak < 0.01 or np.mean(np.abs(seg) >= 0.99) > 0.001:
+            continue
+        rms = _frame_rms(seg, frame)
+        snr_db = 20 * np.log10((np.percentile(rms, 90) + 1e-8) / (np.percentile(rms, 10) + 1e-8))
+        candidates.append((snr_db, int(start), int(end)))
+    chosen, total = [], 0
+    for _, start, end in sorted(candidates, reverse=True):
+        if total >= target_s * sr:
+            break
+        chosen.append((start, end))
+        total += end - start
+    if not chosen:
+        return np.zeros(0, dtype=np.float32)
+    pause = np.zeros(int(pause_s * sr), dtype=np.float32)
+    pieces = []
+    for start, end in sorted(chosen):
+        pieces += [y[start:end], pause]
+    ref = np.concatenate(pieces[:-1]).astype(np.float32)
+    peak = float(np.max(np.abs(ref)))
+    return ref * (0.9 / peak) if peak > 0 else ref
+
+
+def decode_head(source: AudioSource, sr: int, seconds: float) -> np.ndarray:
+    """The first `seconds` of an input, decoded block by block (the rest is never read)."""
+    if not isinstance(source, (str, bytes)):
+        source.seek(0)
+    blocks, total, limit = [], 0, int(seconds * sr)
+    for block in iter_audio_blocks(source, sr, block_s=min(30.0, seconds)):
+        blocks.append(block[: limit - total])
+        total += len(blocks[-1])
+        if total >= limit:
+            break
+    if not isinstance(source, (str, bytes)):
+        source.seek(0)
+    return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+
+
+class VoiceStore:
+    """
+    Voice profiles on disk, one directory per voice: the preprocessed reference clip
+    (reference.wav) and meta.json. The TTS model's conditioning latents for the reference are
+    computed once when the voice is created and stored next to it (reference.latents.npz, see
+    CoquiTTS.prepare_speaker), so conversions with the voice skip the speaker encoder.
+    """
+
+    def __init__(self, root: str):
+        # Absolute, since reference paths are handed to the TTS server process
+        self.root = os.path.abspath(root)
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _dir(self, voice_id: str) -> Optional[str]:
+        # Ids are generated here, so anything else (e.g. a path) is simply unknown
+        return os.path.join(self.root, voice_id) if _VOICE_ID.match(voice_id) else None
+
+    def create(self, reference: np.ndarray, sr: int, name: Optional[str] = None) -> Dict[str, object]:
+        voice_id = uuid.uuid4().hex
+        path = os.path.join(self.root, voice_id)
+        os.makedirs(path)
+        sf.write(os.path.join(path, "reference.wav"), reference, sr, subtype="PCM_16")
+        meta = {
+            "id": voice_id,
+            "name": name or voice_id[:8],
+            "duration_s": round(len(reference) / sr, 3),
+            "created": time.time(),
+        }
+        self._write_meta(voice_id, meta)
+        return meta
+
+    def _write_meta(self, voice_id: str, meta: Dict[str, object]) -> None:
+        path = os.path.join(self.root, voice_id, "meta.json")
+        with self._lock:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(path + ".tmp", path)
+
+    def update(self, voice_id: str, **fields: object) -> Optional[Dict[str, object]]:
+        meta = self.get(voice_id)
+        if meta is not None:
+            meta.update(fields)
+            self._write_meta(voice_id, meta)
+        return meta
+
+    def get(self, voice_id: str) -> Optional[Dict[str, object]]:
+        path = self._dir(voice_id)
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:  # type: ignore[arg-type]
+                return json.load(f)
+        except (OSError, TypeError, ValueError):
+            return None
+
+    def reference_path(self, voice_id: str) -> Optional[str]:
+        path = self._dir(voice_id)
+        ref = os.path.join(path, "reference.wav") if path else None
+        return ref if ref and os.path.exists(ref) else None
+
+    def list(self) -> List[Dict[str, object]]:
+        voices = [self.get(name) for name in os.listdir(self.root)]
+        return sorted((v for v in voices if v is not None), key=lambda v: v["created"])  # type: ignore[arg-type,return-value]
+
+    def delete(self, voice_id: str) -> bool:
+        path = self._dir(voice_id)
+        if path is None or not os.path.isdir(path):
+            return False
+        shutil.rmtree(path, ignore_errors=True)
+        return True
+
+
+def create_voice(source: AudioSource, name: Optional[str] = None) -> Dict[str, object]:
+    """
+    A voice profile from a reference recording: its cleanest speech (select_reference) is
+    stored, then the TTS backend computes and stores the conditioning latents once. ValueError
+    if the recording has no usable speech.
+    """
+    from .tts.scheduler import get_tts_scheduler
+
+    y = decode_audio(source, target_sr=REFERENCE_SR)
+    segments, _ = segment_audio_vad(y, REFERENCE_SR)
+    reference = select_reference(y, REFERENCE_SR, np.asarray(segments, dtype=np.int64), settings.voice_reference_s)
+    if not len(reference):
+        raise ValueError("no usable speech in the reference recording")
+    store = get_voice_store()
+    voice = store.create(reference, REFERENCE_SR, name)
+    voice_id: str = voice["id"]  # type: ignore[assignment]
+    try:
+        latents = get_tts_scheduler().prepare_speaker(os.path.join(store.root, voice_id, "reference.wav"))
+    except Exception:
+        store.delete(voice_id)
+        raise
+    return store.update(voice_id, latents=latents) or voice
+
+
+_store: Optional[VoiceStore] = None
+_store_lock = threading.Lock()
+
+
+def get_voice_store() -> VoiceStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = VoiceStore(settings.voices_dir)
+    return _store
@@ -0,0 +1,68 @@
+from __future__ import annotations
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_state: Dict[str, object] = {"status": "pending", "detail": None, "duration_s": None}
+_state_lock = threading.Lock()
+
+
+def _set_state(status: str, detail: Optional[str] = None, duration_s: Optional[float] = None) -> None:
+    with _state_lock:
+        _state.update({"status": status, "detail": detail, "duration_s": duration_s})
+
+
+def readiness() -> Dict[str, object]:
+    with _state_lock:
+        return dict(_state)
+
+
+def is_ready() -> bool:
+    return readiness()["status"] == "ready"
+
+
+def mark_ready() -> None:
+    _set_state("ready")
+
+
+def warmup() -> None:
+    """
+    Pay the one-off startup costs before taking traffic: the VAD, resampler and decode paths
+    and, unless disabled, loading the TTS model(s) plus one short synthesis.
+    """
+    from .utils.audio import decode_audio, encode_wav_bytes, segment_audio_vad
+    from .utils.resample import resample
+
+    started = time.monotonic()
+    _set_state("warming_up")
+    try:
+        sr = 16000
+        t = np.arange(sr * 2, dtype=np.float32) / sr
+        # One second of tone followed by one second of silence gives the splitter both paths
+        y = np.where(t < 1.0, 0.3 * np.sin(2 * np.pi * 220.0 * t), 0.0).astype(np.float32)
+        segment_audio_vad(y, sr)
+        resample(y, sr, 24000)
+        decode_audio(encode_wav_bytes(y, 22050), target_sr=sr)
+
+        if settings.warmup_tts:
+            from .tts.scheduler import get_tts_scheduler
+
+            get_tts_scheduler().warm_up(speaker_wav=settings.warmup_speaker_wav)
+    except Exception as e:
+        logger.exception("Warm-up failed")
+        _set_state("failed", detail=str(e), duration_s=time.monotonic() - started)
+        return
+    _set_state("ready", duration_s=time.monotonic() - started)
+
+
+def start_background_warmup() -> threading.Thread:
+    thread = threading.Thread(target=warmup, name="dovashi-warmup", daemon=True)
+    thread.start()
+    return thread
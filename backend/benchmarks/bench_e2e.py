@@ -0,0 +1,322 @@
+"""
+End-to-end benchmark of the conversion pipeline on synthetic speech-like audio, with the fake
+provider and fake TTS from benchmarks.fake_provider (no network or models; the cache is disabled).
+Each scenario is a mode, an input length and a concurrency level. It reports throughput,
+request latency percentiles, peak RSS and time per pipeline stage, and saves everything as
+JSON for comparing commits.
+
+Modes: "text" (convert_audio_to_text), "audio" (convert_audio), and "http-text" / "http-audio",
+which post to /api/convert-text and /api/convert through an in-process ASGI client.
+
+    cd backend
+    python -m benchmarks.bench_e2e --durations 10 60 600 --concurrency 1 4 16
+    python -m benchmarks.bench_e2e --durations 7200 --concurrency 1 --modes text   # 2 h input
+    python -m benchmarks.bench_e2e --compare .cache/benchmarks/a.json .cache/benchmarks/b.json
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from benchmarks.fake_provider import FakeProvider, FakeTTS
+from benchmarks.synthetic import write_speech_like
+
+MODES = ("text", "audio", "http-text", "http-audio")
+PROVIDER = "fake"
+TARGET_LANG = "fr"
+
+
+class RSSSampler:
+    """Peak resident set size while running, sampled from /proc every `interval_s`."""
+
+    def __init__(self, interval_s: float = 0.02):
+        self.interval_s = interval_s
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current() -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            # ru_maxrss is the process-lifetime peak (KiB on Linux), the best available elsewhere
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            self._stop.wait(self.interval_s)
+
+    def __enter__(self) -> "RSSSampler":
+        self.peak = self.current()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+def _stage_totals() -> Dict[str, Tuple[float, int]]:
+    """(seconds, calls) per stage so far, from the dovashi_stage_seconds histogram."""
+    from app.metrics import STAGE_SECONDS
+
+    with STAGE_SECONDS._lock:
+        rows = {key[0]: list(row) for key, row in STAGE_SECONDS._values.items()}
+    return {stage: (row[-1], int(sum(row[:-1]))) for stage, row in rows.items()}
+
+
+def _stage_delta(before: Dict[str, Tuple[float, int]], after: Dict[str, Tuple[float, int]]) -> Dict[str, Dict[str, float]]:
+    out = {}
+    for stage, (s, n) in sorted(after.items()):
+        s0, n0 = before.get(stage, (0.0, 0))
+        if n > n0:
+            out[stage] = {"s": round(s - s0, 4), "n": n - n0}
+    return out
+
+
+def _latency_ms(latencies: List[float]) -> Dict[str, Optional[float]]:
+    if not latencies:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    ms = np.array(latencies) * 1000.0
+    return {
+        "p50": round(float(np.percentile(ms, 50)), 2),
+        "p95": round(float(np.percentile(ms, 95)), 2),
+        "p99": round(float(np.percentile(ms, 99)), 2),
+        "max": round(float(ms.max()), 2),
+    }
+
+
+def _pipeline_request(mode: str) -> Callable[[str], None]:
+    from app.pipeline import convert_audio, convert_audio_to_text
+
+    def text(path: str) -> None:
+        convert_audio_to_text(path, TARGET_LANG, provider=PROVIDER)  # type: ignore[arg-type]
+
+    def audio(path: str) -> None:
+        os.remove(convert_audio(path, TARGET_LANG, provider=PROVIDER))  # type: ignore[arg-type]
+
+    return text if mode == "text" else audio
+
+
+def run_pipeline(mode: str, path: str, concurrency: int, requests: int) -> Tuple[List[float], int]:
+    request = _pipeline_request(mode)
+
+    def one(_: int) -> Optional[float]:
+        start = time.perf_counter()
+        try:
+            request(path)
+        except Exception:
+            return None
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    ok = [r for r in results if r is not None]
+    return ok, len(results) - len(ok)
+
+
+def run_http(mode: str, path: str, concurrency: int, requests: int) -> Tuple[List[float], int]:
+    import httpx
+
+    from app.main import app
+
+    url = "/api/convert-text" if mode == "http-text" else "/api/convert"
+
+    async def main() -> List[Optional[float]]:
+        limit = asyncio.Semaphore(concurrency)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+            async def one() -> Optional[float]:
+                async with limit:
+                    start = time.perf_counter()
+                    with open(path, "rb") as f:
+                        res = await client.post(
+                            url,
+                            files={"file": ("input.wav", f, "audio/wav")},
+                            data={"target_lang": TARGET_LANG, "provider": PROVIDER},
+                        )
+                    if res.status_code != 200:
+                        return None
+                    return time.perf_counter() - start
+
+            return list(await asyncio.gather(*[one() for _ in range(requests)]))
+
+    results = asyncio.run(main())
+    ok = [r for r in results if r is not None]
+    return ok, len(results) - len(ok)
+
+
+def run_scenario(mode: str, path: str, duration_s: float, concurrency: int, requests: int) -> Dict[str, object]:
+    runner = run_http if mode.startswith("http") else run_pipeline
+    stages_before = _stage_totals()
+    with RSSSampler() as rss:
+        start = time.perf_counter()
+        latencies, failed = runner(mode, path, concurrency, requests)
+        wall = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "duration_s": duration_s,
+        "concurrency": concurrency,
+        "requests": requests,
+        "failed": failed,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 4),
+        "audio_x_realtime": round(len(latencies) * duration_s / wall, 2),
+        "latency_ms": _latency_ms(latencies),
+        "peak_rss_mb": round(rss.peak / 2**20, 1),
+        "stages": _stage_delta(stages_before, _stage_totals()),
+    }
+
+
+def _git_revision() -> Dict[str, object]:
+    def git(*cmd: str) -> str:
+        return subprocess.run(["git", *cmd], capture_output=True, text=True, check=True).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def setup(args: argparse.Namespace) -> None:
+    """Route the app to the fakes: fake provider under the name "fake", fake TTS replicas, no cache."""
+    from app.providers.registry import register_provider
+    from app.tts.scheduler import TTSScheduler
+
+    settings.cache_backend = "none"
+    settings.tts_workers = args.tts_workers
+    setattr(settings, f"{PROVIDER}_max_concurrency", args.provider_concurrency)
+    register_provider(
+        PROVIDER,
+        lambda key: FakeProvider(
+            latency_s=args.asr_latency,
+            translate_latency_s=args.mt_latency,
+            tail_rate=args.tail_rate,
+            error_rate=args.error_rate,
+            seed=args.seed,
+        ),
+    )
+    TTSScheduler._make_backend = lambda self, index: FakeTTS(  # type: ignore[method-assign]
+        base_s=args.tts_base, per_char_s=args.tts_per_char, cpu=args.tts_cpu
+    )
+
+
+def print_result(r: Dict[str, object]) -> None:
+    lat = r["latency_ms"]
+    stages = ", ".join(f"{k}={v['s']:.2f}" for k, v in r["stages"].items())  # type: ignore[union-attr]
+    print(
+        f"{r['mode']:>10} {r['duration_s']:>7g}s x{r['concurrency']:<3} "
+        f"p50={lat['p50']}ms p95={lat['p95']}ms p99={lat['p99']}ms "  # type: ignore[index]
+        f"{r['throughput_rps']} req/s {r['audio_x_realtime']}x rt rss={r['peak_rss_mb']}MB failed={r['failed']}\n"
+        f"{'':>10} stages: {stages}"
+    )
+
+
+def compare(old_path: str, new_path: str) -> None:
+    """Print the relative change of the headline numbers for scenarios present in both files."""
+    with open(old_path) as f:
+        old = {(r["mode"], r["duration_s"], r["concurrency"]): r for r in json.load(f)["results"]}
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+
+    def change(a: Optional[float], b: Optional[float]) -> str:
+        if not a or b is None:
+            return "n/a"
+        return f"{(b - a) / a * 100:+.1f}%"
+
+    print(f"{'scenario':>24} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'rss':>8}")
+    for r in new:
+        base = old.get((r["mode"], r["duration_s"], r["concurrency"]))
+        if base is None:
+            continue
+        print(
+            f"{r['mode']:>10} {r['duration_s']:>7g}s x{r['concurrency']:<3} "
+            + " ".join(f"{change(base['latency_ms'][q], r['latency_ms'][q]):>8}" for q in ("p50", "p95", "p99"))
+            + f" {change(base['throughput_rps'], r['throughput_rps']):>8} {change(base['peak_rss_mb'], r['peak_rss_mb']):>8}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=[10, 60, 600], help="input lengths in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4], help="concurrent requests to sweep")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--requests", type=int, default=4, help="requests per scenario (at least the concurrency)")
+    parser.add_argument("--sr", type=int, default=16000, help="input sample rate")
+    parser.add_argument("--utterance-s", type=float, nargs=2, default=[0.3, 4.0], help="utterance length range")
+    parser.add_argument("--pause-s", type=float, nargs=2, default=[0.1, 1.5], help="pause length range")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--asr-latency", type=float, default=0.2, help="median fake transcription latency (s)")
+    parser.add_argument("--mt-latency", type=float, default=0.1, help="median fake translation latency (s)")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="share of 10x straggler provider calls")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of retryable provider 429s")
+    parser.add_argument("--provider-concurrency", type=int, default=8)
+    parser.add_argument("--tts-workers", type=int, default=1)
+    parser.add_argument("--tts-base", type=float, default=0.02, help="fake TTS seconds per batch")
+    parser.add_argument("--tts-per-char", type=float, default=0.002, help="fake TTS seconds per character")
+    parser.add_argument("--tts-cpu", action="store_true", help="fake TTS spins a core instead of sleeping")
+    parser.add_argument("--out", help="JSON output path (default .cache/benchmarks/e2e-<commit>-<time>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    setup(args)
+    revision = _git_revision()
+    started = datetime.now(timezone.utc)
+    results: List[Dict[str, object]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for duration in args.durations:
+            path = os.path.join(tmp, f"input-{duration:g}s.wav")
+            write_speech_like(path, duration, args.sr, args.seed, tuple(args.utterance_s), tuple(args.pause_s))
+            for mode in args.modes:
+                for concurrency in args.concurrency:
+                    result = run_scenario(mode, path, duration, concurrency, max(concurrency, args.requests))
+                    print_result(result)
+                    results.append(result)
+
+    out = args.out or os.path.join(
+        ".cache", "benchmarks", f"e2e-{(revision['commit'] or 'unknown')[:8]}-{started:%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(
+            {
+                "meta": {
+                    **revision,
+                    "started": started.isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpus": os.cpu_count(),
+                    "args": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+                },
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"saved {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compare resampler backends and qualities on the rate pairs the pipeline uses
+(16 kHz ASR input, 22.05 kHz / 24 kHz TTS output).
+
+    cd backend
+    python -m benchmarks.bench_resample --seconds 60
+"""
+from __future__ import annotations
+import argparse
+import shutil
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from app.utils.resample import BACKENDS, QUALITIES, make_resampler
+
+PAIRS: List[Tuple[int, int]] = [
+    (16000, 22050),
+    (22050, 16000),
+    (16000, 24000),
+    (24000, 16000),
+    (22050, 24000),
+    (24000, 22050),
+]
+
+
+def test_signal(seconds: float, sr: int) -> np.ndarray:
+    """Tones well inside every pair's passband, so the SNR measures fidelity rather than
+    where each backend places its transition band."""
+    t = np.arange(int(seconds * sr), dtype=np.float64) / sr
+    return sum(0.2 * np.sin(2 * np.pi * f * t) for f in (220.0, 1000.0, 3100.0, 6000.0)).astype(np.float32)
+
+
+def snr_db(reference: np.ndarray, y: np.ndarray) -> float:
+    n = min(len(reference), len(y))
+    # Ignore the filter edges, where backends legitimately differ
+    edge = n // 100
+    ref, out = reference[edge:n - edge], y[edge:n - edge]
+    noise = float(np.mean((ref - out) ** 2))
+    return float("inf") if noise == 0 else 10.0 * np.log10(float(np.mean(ref ** 2)) / noise)
+
+
+def timed(fn, repeat: int) -> float:
+    fn()  # first call designs/caches the filter
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60.0, help="length of the test signal")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--backends", nargs="*", default=list(BACKENDS))
+    args = parser.parse_args()
+
+    backends = [b for b in args.backends if b != "ffmpeg" or shutil.which("ffmpeg")]
+    reference = make_resampler("soxr", "high")
+    print(f"{'pair':>13} {'backend':>8} {'quality':>8} {'ms':>9} {'x realtime':>11} {'SNR dB':>7}")
+    for orig_sr, target_sr in PAIRS:
+        y = test_signal(args.seconds, orig_sr)
+        ref = reference.resample(y, orig_sr, target_sr)
+        for backend in backends:
+            for quality in QUALITIES:
+                res = make_resampler(backend, quality)
+                elapsed = timed(lambda: res.resample(y, orig_sr, target_sr), args.repeat)
+                out = res.resample(y, orig_sr, target_sr)
+                print(
+                    f"{orig_sr:>6}>{target_sr:<6} {backend:>8} {quality:>8} {elapsed * 1000:>9.1f} "
+                    f"{args.seconds / elapsed:>11.0f} {snr_db(ref, out):>7.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Tail latency of provider calls under load, with and without retries and hedging, against the
+in-process fake provider (log-normal latency, a share of slow stragglers and 429s).
+
+    cd backend
+    python -m benchmarks.bench_resilience --calls 2000 --concurrency 16 --tail-rate 0.03 --error-rate 0.05
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+
+from app import resilience
+from app.config import settings
+from app.metrics import PROVIDER_HEDGES, PROVIDER_RETRIES
+from benchmarks.fake_provider import FakeProvider
+
+SCENARIOS: Dict[str, Dict[str, object]] = {
+    "no retries": {"segment_max_retries": 0, "provider_hedging": False},
+    "retries": {"segment_max_retries": 3, "provider_hedging": False},
+    "retries + hedging": {"segment_max_retries": 3, "provider_hedging": True},
+}
+
+
+def _counter_total(counter) -> float:
+    return sum(counter._values.values())
+
+
+def _reset() -> None:
+    # Fresh latency history per scenario so hedge thresholds don't leak between runs
+    resilience._latency.clear()
+
+
+def run_sync(prov: FakeProvider, calls: int, concurrency: int, slots_n: int) -> List[float]:
+    slots = threading.BoundedSemaphore(slots_n)
+
+    def one(i: int) -> float:
+        start = time.perf_counter()
+        try:
+            resilience.call_provider(slots, prov.translate, f"text {i}", "fr")
+        except Exception:
+            return float("nan")
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(calls)))
+
+
+def run_async(prov: FakeProvider, calls: int, concurrency: int, slots_n: int) -> List[float]:
+    async def main() -> List[float]:
+        slots = asyncio.Semaphore(slots_n)
+        clients = asyncio.Semaphore(concurrency)
+
+        async def one(i: int) -> float:
+            async with clients:
+                start = time.perf_counter()
+                try:
+                    await resilience.acall_provider(slots, prov.atranslate, f"text {i}", "fr")
+                except Exception:
+                    return float("nan")
+                return time.perf_counter() - start
+
+        return list(await asyncio.gather(*[one(i) for i in range(calls)]))
+
+    return asyncio.run(main())
+
+
+def report(name: str, latencies: List[float], elapsed: float, hedges: float, retries: float) -> None:
+    ok = np.array([x for x in latencies if x == x])
+    failed = len(latencies) - len(ok)
+    p50, p95, p99 = (np.percentile(ok, q) * 1000 for q in (50, 95, 99)) if len(ok) else (np.nan,) * 3
+    print(
+        f"{name:>20} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {ok.max() * 1000 if len(ok) else np.nan:>9.1f} "
+        f"{failed:>7} {int(retries):>8} {int(hedges):>7} {len(latencies) / elapsed:>8.0f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16, help="calls in flight from clients")
+    parser.add_argument("--slots", type=int, default=32, help="provider concurrency limit; hedges need spare slots")
+    parser.add_argument("--latency", type=float, default=0.05, help="median call latency (s)")
+    parser.add_argument("--tail-rate", type=float, default=0.03, help="share of straggler calls")
+    parser.add_argument("--tail-factor", type=float, default=10.0, help="straggler slowdown")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="share of retryable 429s")
+    parser.add_argument("--mode", choices=("sync", "async"), default="sync")
+    args = parser.parse_args()
+
+    settings.retry_base_s = min(settings.retry_base_s, args.latency)
+    run = run_sync if args.mode == "sync" else run_async
+    print(f"{args.calls} {args.mode} calls, concurrency {args.concurrency}, {args.slots} provider slots; times in ms")
+    print(f"{'scenario':>20} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>9} {'failed':>7} {'retries':>8} {'hedges':>7} {'calls/s':>8}")
+    for name, overrides in SCENARIOS.items():
+        for key, value in overrides.items():
+            setattr(settings, key, value)
+        _reset()
+        prov = FakeProvider(args.latency, tail_rate=args.tail_rate, tail_factor=args.tail_factor, error_rate=args.error_rate, seed=1)
+        hedges, retries = _counter_total(PROVIDER_HEDGES), _counter_total(PROVIDER_RETRIES)
+        start = time.perf_counter()
+        latencies = run(prov, args.calls, args.concurrency, args.slots)
+        elapsed = time.perf_counter() - start
+        report(name, latencies, elapsed, _counter_total(PROVIDER_HEDGES) - hedges, _counter_total(PROVIDER_RETRIES) - retries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compare the original librosa + Python-loop segmenter with the vectorized and streaming VAD.
+
+    cd backend
+    python -m benchmarks.bench_vad --minutes 60
+"""
+from __future__ import annotations
+import argparse
+import time
+from typing import List, Tuple
+
+import librosa
+import numpy as np
+
+from app.utils.vad import StreamingVAD, peak_frame_power, segment_vad
+from benchmarks.synthetic import speech_like
+
+
+def legacy_segment_audio_vad(y: np.ndarray, sr: int, top_db: float = 30.0, min_gap_s: float = 0.25) -> Tuple[List[Tuple[int, int]], List[float]]:
+    """segment_audio_vad as it was before the vectorized engine, kept as the baseline."""
+    intervals = librosa.effects.split(y, top_db=top_db)
+    if len(intervals) == 0:
+        intervals = np.array([[0, len(y)]])
+    merged = []
+    for start, end in intervals:
+        if not merged:
+            merged.append([int(start), int(end)])
+        else:
+            prev_start, prev_end = merged[-1]
+            gap = (start - prev_end) / sr
+            if gap < min_gap_s:
+                merged[-1][1] = int(end)
+            else:
+                merged.append([int(start), int(end)])
+    segments = [(s, e) for s, e in merged]
+    gaps_seconds: List[float] = [max(0.0, float(segments[0][0] / sr))]
+    for i in range(len(segments) - 1):
+        gaps_seconds.append(max(0.0, float((segments[i + 1][0] - segments[i][1]) / sr)))
+    gaps_seconds.append(max(0.0, float((len(y) - segments[-1][1]) / sr)))
+    return segments, gaps_seconds
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    res = fn(*args, **kwargs)
+    return res, time.perf_counter() - start
+
+
+def run_streaming(y: np.ndarray, sr: int, chunk_s: float) -> Tuple[List[Tuple[int, int]], List[float]]:
+    # Two passes like the windowed pipeline: the peak level first, then segmentation against it
+    chunk = int(chunk_s * sr)
+    vad = StreamingVAD(sr, ref=peak_frame_power(y[i:i + chunk] for i in range(0, len(y), chunk)))
+    segments: List[Tuple[int, int]] = []
+    gaps: List[float] = []
+    for i in range(0, len(y), chunk):
+        s, g = vad.feed(y[i:i + chunk])
+        segments += s
+        gaps += g
+    s, g = vad.finish()
+    return segments + s, gaps + g
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=60.0)
+    parser.add_argument("--sr", type=int, default=16000)
+    parser.add_argument("--chunk-s", type=float, default=0.5, help="chunk size for the streaming VAD")
+    args = parser.parse_args()
+
+    y = speech_like(args.minutes * 60.0, args.sr)
+    print(f"input: {args.minutes:g} min @ {args.sr} Hz ({y.nbytes / 1e6:.0f} MB float32)")
+
+    # Warm up librosa's numba JIT so the baseline isn't charged for compilation
+    legacy_segment_audio_vad(y[: args.sr * 5], args.sr)
+
+    (legacy, _), t_legacy = timed(legacy_segment_audio_vad, y, args.sr)
+    (vec, _), t_vec = timed(segment_vad, y, args.sr)
+    (stream, _), t_stream = timed(run_streaming, y, args.sr, args.chunk_s)
+
+    audio_s = len(y) / args.sr
+    for name, segs, t in (("legacy", legacy, t_legacy), ("vectorized", vec, t_vec), ("streaming", stream, t_stream)):
+        print(f"{name:>10}: {t:7.3f}s  {audio_s / t:9.0f}x realtime  {len(segs)} segments")
+    print(f"vectorized matches legacy: {vec == legacy}")
+    print(f"streaming matches vectorized: {stream == vec}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+In-process stand-ins for the ASR/translation provider and the TTS model, with configurable
+latency and failures. They let the resilience layer and the whole pipeline be exercised
+without network calls, API keys or model downloads. Latencies and failures are drawn from a
+generator seeded with the call's input, so a run is reproducible regardless of thread timing.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import random
+import threading
+import time
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.providers.base import ASRTranslateProvider, AudioInput, ProviderError, TimedText, read_audio_bytes
+
+# Bytes per second of the 16 kHz PCM_16 WAV segments the pipeline sends
+_WAV_BYTES_PER_S = 32000
+# Speaking rate used to size fake transcripts and fake speech
+_WORDS_PER_S = 2.5
+_CHARS_PER_S = 15.0
+_WORDS = "the quick brown fox jumps over a lazy dog while seven bright stars shine above".split()
+
+
+def _words(n: int, seed: int) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(_WORDS) for _ in range(max(1, n)))
+
+
+class FakeProvider(ASRTranslateProvider):
+    """
+    Every call sleeps for a log-normal latency around `latency_s` (`translate_latency_s` for
+    translations). With probability `tail_rate` the call is a straggler and takes `tail_factor`
+    times longer. With probability `error_rate` it fails with a retryable 429, or with a
+    non-retryable 400 when `fatal_rate` hits. Transcripts have about 2.5 words per second of audio.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_s: float = 0.05,
+        sigma: float = 0.25,
+        tail_rate: float = 0.0,
+        tail_factor: float = 10.0,
+        error_rate: float = 0.0,
+        fatal_rate: float = 0.0,
+        seed: int = 0,
+        translate_latency_s: Optional[float] = None,
+    ):
+        self.latency_s = latency_s
+        self.translate_latency_s = latency_s if translate_latency_s is None else translate_latency_s
+        self.sigma = sigma
+        self.tail_rate = tail_rate
+        self.tail_factor = tail_factor
+        self.error_rate = error_rate
+        self.fatal_rate = fatal_rate
+        self.seed = seed
+        self.calls = 0
+        self._attempts: dict = {}
+        self._lock = threading.Lock()
+
+    def _draw(self, key: bytes, latency_s: float) -> float:
+        # Seeded by input and attempt number: retries of the same input draw fresh outcomes
+        with self._lock:
+            self.calls += 1
+            attempt = self._attempts[key] = self._attempts.get(key, 0) + 1
+        rng = random.Random(zlib.crc32(key, self.seed) * 31 + attempt)
+        delay = latency_s * rng.lognormvariate(0.0, self.sigma)
+        if rng.random() < self.tail_rate:
+            delay *= self.tail_factor
+        failure = rng.random()
+        if failure < self.fatal_rate:
+            raise ProviderError("Fake provider rejected the request", retryable=False, status=400)
+        if failure < self.fatal_rate + self.error_rate:
+            raise ProviderError("Fake provider rate limited", retryable=True, status=429)
+        return delay
+
+    @staticmethod
+    def _transcript(data: bytes) -> str:
+        return _words(round(len(data) / _WAV_BYTES_PER_S * _WORDS_PER_S), zlib.crc32(data))
+
+    @staticmethod
+    def _translation(text: str, target_lang: str) -> str:
+        return f"[{target_lang}] {text}"
+
+    def transcribe(self, audio: AudioInput, source_lang: Optional[str] = None) -> str:
+        data = read_audio_bytes(audio)
+        time.sleep(self._draw(data, self.latency_s))
+        return self._transcript(data)
+
+    def translate(self, text: str, target_lang: str) -> str:
+        time.sleep(self._draw(text.encode(), self.translate_latency_s))
+        return self._translation(text, target_lang)
+
+    def _translate_batch_call(self, texts: List[str], target_lang: str) -> Optional[str]:
+        # One request for the whole batch; generation time grows with the output
+        key = json.dumps(texts).encode()
+        time.sleep(self._draw(key, self.translate_latency_s) * (1.0 + 0.1 * len(texts)))
+        return json.dumps([self._translation(t, target_lang) for t in texts])
+
+    def transcribe_timestamped(self, audio: AudioInput, source_lang: Optional[str] = None) -> List[TimedText]:
+        data = read_audio_bytes(audio)
+        time.sleep(self._draw(data, self.latency_s))
+        seconds = len(data) / _WAV_BYTES_PER_S
+        # One span per 5 s of audio
+        return [
+            (start, min(seconds, start + 5.0), _words(int(5.0 * _WORDS_PER_S), zlib.crc32(data) + i))
+            for i, start in enumerate(np.arange(0.0, seconds, 5.0).tolist())
+        ]
+
+    async def atranscribe(self, audio: AudioInput, source_lang: Optional[str] = None) -> str:
+        data = read_audio_bytes(audio)
+        await asyncio.sleep(self._draw(data, self.latency_s))
+        return self._transcript(data)
+
+    async def atranslate(self, text: str, target_lang: str) -> str:
+        await asyncio.sleep(self._draw(text.encode(), self.translate_latency_s))
+        return self._translation(text, target_lang)
+
+    async def _atranslate_batch_call(self, texts: List[str], target_lang: str) -> Optional[str]:
+        key = json.dumps(texts).encode()
+        await asyncio.sleep(self._draw(key, self.translate_latency_s) * (1.0 + 0.1 * len(texts)))
+        return json.dumps([self._translation(t, target_lang) for t in texts])
+
+
+class FakeTTS:
+    """
+    TTS worker backend (see TTSScheduler._make_backend) returning a quiet tone about as long as
+    the text would take to say. Each batch sleeps `base_s` plus `per_char_s` per character, and
+    with `cpu=True` it spins instead of sleeping, to mimic a CPU-bound model holding a core.
+    """
+
+    def __init__(self, base_s: float = 0.02, per_char_s: float = 0.002, sample_rate: int = 24000, cpu: bool = False):
+        self.base_s = base_s
+        self.per_char_s = per_char_s
+        self.sample_rate = sample_rate
+        self.cpu = cpu
+
+    def _wait(self, seconds: float) -> None:
+        if not self.cpu:
+            time.sleep(seconds)
+            return
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            pass
+
+    def synthesize_batch(self, items: List[Tuple[str, str, Optional[str]]]) -> List[Tuple[np.ndarray, int]]:
+        self._wait(self.base_s + self.per_char_s * sum(len(text) for text, _, _ in items))
+        out = []
+        for text, _, _ in items:
+            n = int(max(0.2, len(text) / _CHARS_PER_S) * self.sample_rate)
+            t = np.arange(n, dtype=np.float32) / self.sample_rate
+            out.append(((0.1 * np.sin(2 * np.pi * 180.0 * t)).astype(np.float32), self.sample_rate))
+        return out
@@ -0,0 +1,50 @@
+"""Synthetic speech-like test audio with configurable utterance and pause lengths."""
+from __future__ import annotations
+from typing import Tuple
+
+import numpy as np
+import soundfile as sf
+
+
+def speech_like(
+    seconds: float,
+    sr: int = 16000,
+    seed: int = 0,
+    utterance_s: Tuple[float, float] = (0.3, 4.0),
+    pause_s: Tuple[float, float] = (0.1, 1.5),
+) -> np.ndarray:
+    """Alternating noisy 'utterances' and low-level pauses, with lengths drawn uniformly from the given ranges."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sr)
+    y = (0.002 * rng.standard_normal(n)).astype(np.float32)
+    pos = 0
+    while pos < n:
+        pos += int(rng.uniform(*pause_s) * sr)
+        length = min(int(rng.uniform(*utterance_s) * sr), n - pos)
+        if length <= 0:
+            break
+        t = np.arange(length, dtype=np.float32) / sr
+        envelope = np.abs(np.sin(np.pi * t * rng.uniform(2.0, 5.0))).astype(np.float32)
+        y[pos:pos + length] += 0.3 * envelope * rng.standard_normal(length).astype(np.float32)
+        pos += length
+    return y
+
+
+def write_speech_like(
+    path: str,
+    seconds: float,
+    sr: int = 16000,
+    seed: int = 0,
+    utterance_s: Tuple[float, float] = (0.3, 4.0),
+    pause_s: Tuple[float, float] = (0.1, 1.5),
+    block_s: float = 60.0,
+) -> None:
+    """Write speech_like() audio as a PCM_16 WAV one block at a time, so hours of audio don't need to fit in memory."""
+    with sf.SoundFile(path, "w", samplerate=sr, channels=1, subtype="PCM_16", format="WAV") as f:
+        done = 0.0
+        block = 0
+        while done < seconds:
+            length = min(block_s, seconds - done)
+            f.write(speech_like(length, sr, seed * 100003 + block, utterance_s, pause_s))
+            done += length
+            block += 1
@@ -0,0 +1,80 @@
+"""
+CoquiTTS (app.tts.coqui_tts) synthesis with cached speaker latents, against a stand-in for the
+XTTS model so no weights are loaded.
+"""
+from __future__ import annotations
+import re
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app import pipeline
+from app.cache import NullCache
+from app.tts.coqui_tts import CoquiTTS
+from app.tts.scheduler import TTSScheduler, _ThreadBackend
+
+# XTTS asserts on inputs past its per-call limit (400 tokens, ~250 characters of English)
+MAX_CHARS = 250
+
+
+class FakeXtts:
+    """XTTS's inference() signature and defaults, with the text-length assertion of the real model."""
+
+    config = SimpleNamespace(temperature=0.85, length_penalty=1.0, repetition_penalty=2.0, top_k=50, top_p=0.85)
+
+    def __init__(self):
+        self.calls = []
+
+    def get_conditioning_latents(self, audio_path):
+        return "gpt_cond_latent", "speaker_embedding"
+
+    def inference(
+        self, text, language, gpt_cond_latent, speaker_embedding, temperature=0.75, length_penalty=1.0,
+        repetition_penalty=10.0, top_k=50, top_p=0.85, do_sample=True, num_beams=1, speed=1.0,
+        enable_text_splitting=False,
+    ):
+        self.calls.append(dict(temperature=temperature, repetition_penalty=repetition_penalty, top_p=top_p))
+        sentences = re.split(r"(?<=\.) ", text) if enable_text_splitting else [text]
+        for sentence in sentences:
+            assert len(sentence) <= MAX_CHARS, "input text exceeds the model's token limit"
+        return {"wav": np.full(10 * len(text), 0.1, dtype=np.float32)}
+
+
+@pytest.fixture
+def tts():
+    # A CoquiTTS around the stand-in model, bypassing the process-wide singleton and model load
+    instance = object.__new__(CoquiTTS)
+    instance.model = FakeXtts()
+    instance.tts = SimpleNamespace(synthesizer=SimpleNamespace(tts_model=instance.model))
+    instance.sample_rate = 24000
+    instance._synth_lock = threading.Lock()
+    instance._latents = OrderedDict()
+    return instance
+
+
+@pytest.fixture
+def speaker_wav(tmp_path):
+    path = tmp_path / "reference.wav"
+    path.write_bytes(b"RIFF reference clip")
+    return str(path)
+
+
+LONG_TEXT = " ".join(f"This is sentence number {i} of a long translated segment." for i in range(12))
+
+
+def test_cached_latents_use_the_config_sampling_settings(tts, speaker_wav):
+    tts.synthesize("Hello there.", speaker_wav=speaker_wav)
+    assert tts.model.calls == [dict(temperature=0.85, repetition_penalty=2.0, top_p=0.85)]
+
+
+def test_long_text_with_cached_latents_is_synthesized_not_silenced(tts, speaker_wav, monkeypatch):
+    assert len(LONG_TEXT) > MAX_CHARS
+    monkeypatch.setattr(TTSScheduler, "_make_backend", lambda self, index: _ThreadBackend(tts))
+    monkeypatch.setattr(pipeline, "get_tts_scheduler", lambda: TTSScheduler(workers=1))
+    monkeypatch.setattr(pipeline, "get_cache", NullCache)
+    [(wav, sr)] = pipeline._synthesize_segments([LONG_TEXT], "en", speaker_wav)
+    # The fallback for a failed segment is 0.2 s of silence
+    assert sr == 24000 and len(wav) == 10 * len(LONG_TEXT) and np.all(wav > 0)
@@ -0,0 +1,353 @@
+"""
+Resilience layer (app.resilience) against the in-process fake provider: retries and backoff,
+rate limiting, deadlines and hedging.
+"""
+from __future__ import annotations
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app import resilience
+from app.config import settings
+from app.metrics import PROVIDER_HEDGES, PROVIDER_RETRIES, in_context
+from app.providers.base import ProviderError
+from app.resilience import DeadlineExceeded, TokenBucket, call_provider, acall_provider, deadline
+from benchmarks.fake_provider import FakeProvider
+
+
+class ScriptedProvider(FakeProvider):
+    """FakeProvider with a fixed latency whose first `failures` calls fail and `slow_calls` (1-based) straggle."""
+
+    def __init__(self, latency_s: float = 0.01, failures: int = 0, fatal: bool = False, slow_calls=(), slow_s: float = 1.0):
+        super().__init__(latency_s, sigma=0.0)
+        self.failures = failures
+        self.fatal = fatal
+        self.slow_calls = set(slow_calls)
+        self.slow_s = slow_s
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _draw(self, key: bytes, latency_s: float) -> float:
+        delay = super()._draw(key, latency_s)
+        if self.calls <= self.failures:
+            raise ProviderError("Fake provider failed", retryable=not self.fatal, status=400 if self.fatal else 429)
+        return self.slow_s if self.calls in self.slow_calls else delay
+
+    def translate(self, text: str, target_lang: str) -> str:
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return super().translate(text, target_lang)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _limit(prov: ScriptedProvider, rate: float, burst: float) -> TokenBucket:
+    # Install a rate limiter for the fake provider, which has none configured
+    provider, _, model = resilience.call_labels(prov.translate)
+    bucket = resilience._buckets[(provider, model)] = TokenBucket(rate, burst)
+    return bucket
+
+
+def _count(counter) -> float:
+    return counter._values.get(("fake", "translate"), 0.0)
+
+
+@pytest.fixture(autouse=True)
+def _isolated(monkeypatch):
+    # Fast backoff, no hedging unless a test turns it on, and fresh limiter / latency state
+    monkeypatch.setattr(settings, "segment_max_retries", 2)
+    monkeypatch.setattr(settings, "retry_base_s", 0.01)
+    monkeypatch.setattr(settings, "retry_max_s", 0.05)
+    monkeypatch.setattr(settings, "provider_hedging", False)
+    monkeypatch.setattr(settings, "hedge_min_samples", 20)
+    monkeypatch.setattr(settings, "hedge_quantile", 0.95)
+    monkeypatch.setattr(resilience, "_buckets", {})
+    monkeypatch.setattr(resilience, "_latency", {})
+
+
+def _wait_for_slots(slots: threading.BoundedSemaphore, n: int, timeout: float = 2.0) -> bool:
+    # Background calls release their slots when they finish; True once all n are free again
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        held = [slots.acquire(blocking=False) for _ in range(n)]
+        for _ in range(sum(held)):
+            slots.release()
+        if all(held):
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _warm_up(prov: ScriptedProvider, slots: threading.BoundedSemaphore, calls: int = 20) -> None:
+    for i in range(calls):
+        call_provider(slots, prov.translate, f"warm {i}", "fr")
+
+
+# Retries
+
+def test_retryable_errors_are_retried_with_backoff(monkeypatch):
+    delays = []
+    real_delay = resilience.retry_delay
+
+    def recorded(attempt, error):
+        delays.append((attempt, real_delay(attempt, error)))
+        return delays[-1][1]
+
+    monkeypatch.setattr(resilience, "retry_delay", recorded)
+    prov = ScriptedProvider(failures=2)
+    retries = _count(PROVIDER_RETRIES)
+
+    assert call_provider(threading.BoundedSemaphore(1), prov.translate, "hello", "fr") == "[fr] hello"
+    assert prov.calls == 3
+    assert [attempt for attempt, _ in delays] == [0, 1]
+    assert all(0.0 <= delay <= settings.retry_max_s for _, delay in delays)
+    assert _count(PROVIDER_RETRIES) - retries == 2
+
+
+def test_retries_give_up_after_the_configured_attempts():
+    prov = ScriptedProvider(failures=10)
+    with pytest.raises(ProviderError) as info:
+        call_provider(threading.BoundedSemaphore(1), prov.translate, "hello", "fr")
+    assert info.value.retryable
+    assert prov.calls == settings.segment_max_retries + 1
+
+
+def test_fatal_errors_are_not_retried():
+    prov = ScriptedProvider(failures=1, fatal=True)
+    with pytest.raises(ProviderError) as info:
+        call_provider(threading.BoundedSemaphore(1), prov.translate, "hello", "fr")
+    assert not info.value.retryable
+    assert prov.calls == 1
+
+
+def test_retry_delay_grows_exponentially_and_honours_retry_after(monkeypatch):
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: high)
+    monkeypatch.setattr(settings, "retry_base_s", 0.5)
+    monkeypatch.setattr(settings, "retry_max_s", 8.0)
+    error = ProviderError("busy", retryable=True, status=429)
+    assert [resilience.retry_delay(a, error) for a in range(6)] == [0.5, 1.0, 2.0, 4.0, 8.0, 8.0]
+    error.retry_after = 3.0
+    assert resilience.retry_delay(0, error) == 3.0
+
+
+def test_async_retries_match_sync():
+    prov = ScriptedProvider(failures=2)
+    result = asyncio.run(acall_provider(asyncio.Semaphore(1), prov.atranslate, "hello", "fr"))
+    assert result == "[fr] hello"
+    assert prov.calls == 3
+
+
+# Rate limiting
+
+def test_token_bucket_allows_a_burst_then_throttles():
+    bucket = TokenBucket(rate=20.0, burst=2)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert not bucket.try_acquire()
+    start = time.monotonic()
+    waited = bucket.acquire()
+    assert waited == pytest.approx(0.05, abs=0.02)
+    assert time.monotonic() - start >= 0.04
+
+
+def test_token_bucket_refunds_a_token_it_cannot_wait_for():
+    bucket = TokenBucket(rate=1.0, burst=1)
+    bucket.acquire()
+    with pytest.raises(DeadlineExceeded):
+        bucket.acquire(timeout=0.1)
+    # The refused reservation didn't push the next token further out
+    assert bucket._reserve() == pytest.approx(1.0, abs=0.05)
+
+
+def test_token_bucket_backs_off_on_429_and_recovers():
+    bucket = TokenBucket(rate=16.0, burst=1)
+    for _ in range(10):
+        bucket.throttled()
+    assert bucket.rate == 1.0
+    for _ in range(30):
+        bucket.succeeded()
+    assert bucket.rate == 16.0
+
+
+def test_provider_calls_share_the_rate_limit():
+    prov = ScriptedProvider(latency_s=0.0)
+    _limit(prov, rate=50.0, burst=1)
+    slots = threading.BoundedSemaphore(4)
+    start = time.monotonic()
+    for i in range(6):
+        call_provider(slots, prov.translate, f"text {i}", "fr")
+    # One token up front, then 50 per second
+    assert time.monotonic() - start >= 5 / 50 * 0.9
+
+
+def test_429_slows_the_bucket_down():
+    prov = ScriptedProvider(failures=1)
+    bucket = _limit(prov, rate=10.0, burst=4)
+    call_provider(threading.BoundedSemaphore(1), prov.translate, "hello", "fr")
+    assert bucket.rate < 10.0
+
+
+# Deadlines
+
+def test_expired_deadline_skips_the_call():
+    prov = ScriptedProvider()
+    with deadline(0.01):
+        time.sleep(0.02)
+        with pytest.raises(DeadlineExceeded):
+            call_provider(threading.BoundedSemaphore(1), prov.translate, "hello", "fr")
+    assert prov.calls == 0
+
+
+def test_deadline_stops_retries_that_cannot_finish_in_time(monkeypatch):
+    monkeypatch.setattr(settings, "retry_base_s", 1.0)
+    monkeypatch.setattr(settings, "retry_max_s", 1.0)
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: high)
+    prov = ScriptedProvider(failures=1)
+    with deadline(0.2):
+        with pytest.raises(DeadlineExceeded) as info:
+            call_provider(threading.BoundedSemaphore(1), prov.translate, "hello", "fr")
+    assert isinstance(info.value.__cause__, ProviderError)
+    assert prov.calls == 1
+
+
+def test_deadline_bounds_the_wait_for_a_slot():
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    start = time.monotonic()
+    with deadline(0.05):
+        with pytest.raises(DeadlineExceeded):
+            call_provider(slots, ScriptedProvider().translate, "hello", "fr")
+    assert time.monotonic() - start < 0.5
+
+
+def test_deadline_bounds_the_wait_for_a_rate_limit_token():
+    prov = ScriptedProvider()
+    _limit(prov, rate=1.0, burst=1).acquire()
+    with deadline(0.05):
+        with pytest.raises(DeadlineExceeded):
+            call_provider(threading.BoundedSemaphore(1), prov.translate, "hello", "fr")
+    assert prov.calls == 0
+
+
+def test_deadline_propagates_to_worker_threads_and_only_shrinks():
+    assert resilience.remaining() is None
+    seen = []
+    with deadline(10.0):
+        with deadline(60.0):
+            assert resilience.remaining() <= 10.0
+        thread = threading.Thread(target=in_context(lambda: seen.append(resilience.remaining())))
+        thread.start()
+        thread.join()
+    assert seen[0] is not None and 0 < seen[0] <= 10.0
+    assert resilience.remaining() is None
+
+
+def test_deadline_caps_the_sdk_timeout():
+    assert resilience.call_timeout(30.0) == 30.0
+    with deadline(1.0):
+        assert resilience.call_timeout(30.0) <= 1.0
+        assert resilience.call_timeout(None) <= 1.0
+
+
+def test_deadline_interrupts_a_hedged_call(monkeypatch):
+    monkeypatch.setattr(settings, "provider_hedging", True)
+    slots = threading.BoundedSemaphore(1)
+    prov = ScriptedProvider(slow_calls={21}, slow_s=1.0)
+    _warm_up(prov, slots)
+    start = time.monotonic()
+    with deadline(0.1):
+        with pytest.raises(DeadlineExceeded):
+            call_provider(slots, prov.translate, "slow", "fr")
+    assert time.monotonic() - start < 0.5
+
+
+# Hedging
+
+def test_no_hedge_without_enough_latency_history(monkeypatch):
+    monkeypatch.setattr(settings, "provider_hedging", True)
+    prov = ScriptedProvider(slow_calls={1}, slow_s=0.1)
+    hedges = _count(PROVIDER_HEDGES)
+    call_provider(threading.BoundedSemaphore(2), prov.translate, "hello", "fr")
+    assert _count(PROVIDER_HEDGES) == hedges
+    assert prov.calls == 1
+
+
+def test_hedge_fires_once_p95_is_exceeded(monkeypatch):
+    monkeypatch.setattr(settings, "provider_hedging", True)
+    slots = threading.BoundedSemaphore(2)
+    # Call 21 straggles; its hedge (call 22) comes back at the usual latency
+    prov = ScriptedProvider(latency_s=0.01, slow_calls={21}, slow_s=1.0)
+    _warm_up(prov, slots)
+    threshold = resilience._latency[("fake", "translate")].threshold()
+    assert threshold is not None and threshold < 0.1
+    hedges = _count(PROVIDER_HEDGES)
+
+    start = time.monotonic()
+    assert call_provider(slots, prov.translate, "slow", "fr") == "[fr] slow"
+    assert time.monotonic() - start < 0.5
+    assert _count(PROVIDER_HEDGES) - hedges == 1
+    assert prov.calls == 22
+
+
+def test_fast_calls_are_not_hedged(monkeypatch):
+    monkeypatch.setattr(settings, "provider_hedging", True)
+    slots = threading.BoundedSemaphore(2)
+    prov = ScriptedProvider(latency_s=0.05)
+    _warm_up(prov, slots)
+    # Well under the recent p95, so scheduling jitter can't push them past it
+    prov.translate_latency_s = 0.01
+    hedges = _count(PROVIDER_HEDGES)
+    _warm_up(prov, slots, calls=10)
+    assert _count(PROVIDER_HEDGES) == hedges
+
+
+def test_hedge_needs_a_free_slot_and_calls_stay_within_the_cap(monkeypatch):
+    monkeypatch.setattr(settings, "provider_hedging", True)
+    slots = threading.BoundedSemaphore(1)
+    prov = ScriptedProvider(latency_s=0.01, slow_calls={21}, slow_s=0.2)
+    _warm_up(prov, slots)
+    hedges = _count(PROVIDER_HEDGES)
+    call_provider(slots, prov.translate, "slow", "fr")
+    assert _count(PROVIDER_HEDGES) == hedges
+    assert prov.max_in_flight == 1
+
+
+def test_losing_call_keeps_its_slot_until_it_finishes(monkeypatch):
+    monkeypatch.setattr(settings, "provider_hedging", True)
+    slots = threading.BoundedSemaphore(2)
+    prov = ScriptedProvider(latency_s=0.01, slow_calls={21}, slow_s=0.3)
+    _warm_up(prov, slots)
+    call_provider(slots, prov.translate, "slow", "fr")
+    # The hedge's slot comes back once its done callback has run, but the straggler's does not
+    assert _wait_for_slots(slots, 1)
+    assert slots.acquire(blocking=False)
+    assert not slots.acquire(blocking=False)
+    slots.release()
+    assert _wait_for_slots(slots, 2)
+    assert prov.max_in_flight <= 2
+
+
+def test_async_hedge_fires_and_releases_its_slots(monkeypatch):
+    monkeypatch.setattr(settings, "provider_hedging", True)
+    prov = ScriptedProvider(latency_s=0.01, slow_calls={21}, slow_s=1.0)
+    hedges = _count(PROVIDER_HEDGES)
+
+    async def run() -> str:
+        slots = asyncio.Semaphore(2)
+        for i in range(20):
+            await acall_provider(slots, prov.atranslate, f"warm {i}", "fr")
+        result = await acall_provider(slots, prov.atranslate, "slow", "fr")
+        # The losing call is cancelled; its slot comes back once it has stopped
+        await asyncio.sleep(0.05)
+        assert not slots.locked() and slots._value == 2
+        return result
+
+    start = time.monotonic()
+    assert asyncio.run(run()) == "[fr] slow"
+    assert time.monotonic() - start < 1.0
+    assert _count(PROVIDER_HEDGES) - hedges == 1
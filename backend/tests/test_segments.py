@@ -0,0 +1,66 @@
+"""SegmentTable (app.segments) serialization and the text payload built from it."""
+from __future__ import annotations
+import builtins
+import json
+
+import numpy as np
+import pytest
+
+from app.pipeline import text_result
+from app.segments import SegmentTable, segment_rows
+
+
+@pytest.fixture
+def table():
+    segments = [(1103, 52919), (61001, 99999), (120000, 441000)]
+    gaps = [1103 / 44100, 8082 / 44100, 20001 / 44100, 0.75]
+    table = SegmentTable.from_vad(segments, gaps, 44100, wave=np.zeros(441000, dtype=np.float32))
+    table.transcripts = ["Hallo.", "", "Wie geht's?"]
+    table.translations = ["Hello.", "", "How are you?"]
+    return table
+
+
+def _same(a: SegmentTable, b: SegmentTable) -> None:
+    assert a.sample_rate == b.sample_rate and a.trailing_gap == b.trailing_gap
+    assert np.array_equal(a.rows["start"], b.rows["start"]) and np.array_equal(a.rows["end"], b.rows["end"])
+    assert np.allclose(a.rows["gap"], b.rows["gap"], rtol=0, atol=1e-6)
+    assert a.transcripts == b.transcripts and a.translations == b.translations
+
+
+def test_dict_round_trips_through_json_without_the_wave(table):
+    data = json.loads(json.dumps(table.to_dict()))
+    restored = SegmentTable.from_dict(data)
+    _same(restored, table)
+    assert restored.wave is None
+
+
+def test_empty_table_round_trips():
+    empty = SegmentTable.from_vad([], [1.5], 16000)
+    _same(SegmentTable.from_dict(empty.to_dict()), empty)
+    assert text_result(empty.to_dict()) == {"translation": "", "transcript": "", "segments": []}
+
+
+def test_text_result_keeps_the_api_fields(table):
+    result = text_result(table.to_dict())
+    assert result["translation"] == "Hello. How are you?"
+    assert result["transcript"] == "Hallo. Wie geht's?"
+    assert result["segments"] == segment_rows(table.to_dict())
+    assert result["segments"][0] == {"start": 0.025, "end": 1.2, "transcript": "Hallo.", "translation": "Hello."}
+
+
+def test_msgpack_round_trips(table):
+    pytest.importorskip("msgpack")
+    _same(SegmentTable.from_msgpack(table.to_msgpack()), table)
+
+
+def test_msgpack_missing_is_a_clear_error(table, monkeypatch):
+    real_import = builtins.__import__
+
+    def no_msgpack(name, *args, **kwargs):
+        if name == "msgpack":
+            raise ImportError("No module named 'msgpack'")
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_msgpack)
+    with pytest.raises(RuntimeError, match="requirements-msgpack.txt"):
+        table.to_msgpack()
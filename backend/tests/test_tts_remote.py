@@ -0,0 +1,111 @@
+"""
+RemoteTTSScheduler (app.tts.remote) against a stub server on a Unix socket: replies, reply
+timeouts and the request deadline, also for the queued segments of a conversion.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from concurrent.futures import wait
+from multiprocessing.connection import Listener
+
+import numpy as np
+import pytest
+
+from app import pipeline
+from app.cache import NullCache
+from app.resilience import deadline
+from app.tts.remote import RemoteTTSScheduler
+
+
+class StubServer:
+    """Answers every call at once, except the ops in `silent`, which it never replies to."""
+
+    def __init__(self, address: str, silent=()):
+        self.silent = set(silent)
+        self.listener = Listener(address, family="AF_UNIX")
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self) -> None:
+        conn = self.listener.accept()
+        try:
+            while True:
+                call_id, op, args = conn.recv()
+                if op in self.silent:
+                    continue
+                if op == "submit":
+                    conn.send((call_id, True, (np.zeros(240, dtype=np.float32), 24000)))
+                elif op == "backlog":
+                    conn.send((call_id, True, 0))
+                else:
+                    conn.send((call_id, True, True))
+        except (EOFError, OSError):
+            conn.close()
+
+
+@pytest.fixture
+def address():
+    # Unix socket paths are limited to ~100 bytes, which pytest's tmp_path can exceed; the
+    # Listener removes its socket file when it is collected
+    return f"/tmp/dovashi-test-{os.getpid()}-{time.monotonic_ns()}.sock"
+
+
+def test_replies_resolve_the_blocking_calls(address):
+    StubServer(address)
+    client = RemoteTTSScheduler(address, call_timeout_s=5)
+    wav, sr = client.synthesize("hi")
+    assert sr == 24000 and len(wav) == 240
+    assert client.prepare_speaker("/tmp/ref.wav") is True
+    assert client.backlog() == 0
+
+
+def test_missing_reply_times_out_and_is_dropped(address):
+    StubServer(address, silent={"submit"})
+    client = RemoteTTSScheduler(address, call_timeout_s=0.2)
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        client.synthesize("hi")
+    assert time.monotonic() - start < 2
+    assert client._link is not None and client._link.pending == {}
+    # The connection is still usable for the calls that do get a reply
+    assert client.backlog() == 0
+
+
+def test_submitted_calls_expire_on_their_own(address):
+    StubServer(address, silent={"submit"})
+    client = RemoteTTSScheduler(address, call_timeout_s=0.2)
+    futures = [client.submit(f"segment {i}") for i in range(5)]
+    _, not_done = wait(futures, timeout=2)
+    assert not not_done
+    for future in futures:
+        with pytest.raises(TimeoutError):
+            future.result()
+    assert client._link is not None and client._link.pending == {}
+
+
+def test_request_deadline_shortens_the_timeout(address):
+    StubServer(address, silent={"warm_up"})
+    client = RemoteTTSScheduler(address, call_timeout_s=30)
+    start = time.monotonic()
+    with deadline(0.2), pytest.raises(TimeoutError):
+        client.warm_up()
+    assert time.monotonic() - start < 2
+
+
+def test_conversion_does_not_hang_on_a_silent_server(address, monkeypatch):
+    StubServer(address, silent={"submit"})
+    client = RemoteTTSScheduler(address, call_timeout_s=30)
+    monkeypatch.setattr(pipeline, "get_tts_scheduler", lambda: client)
+    monkeypatch.setattr(pipeline, "get_cache", NullCache)
+    start = time.monotonic()
+    with deadline(0.3):
+        pieces = pipeline._synthesize_segments(["one", "two", "three"], "fr", None)
+    # Each segment falls back to silence once the deadline passes, without an English retry
+    assert time.monotonic() - start < 2
+    assert all(sr == 24000 and not np.any(wav) for wav, sr in pieces)
+
+
+def test_unreachable_server_is_a_connection_error(address):
+    client = RemoteTTSScheduler(address, call_timeout_s=1)
+    with pytest.raises(ConnectionError):
+        client.prepare_speaker("/tmp/ref.wav")
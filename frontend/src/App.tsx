@@ -93,7 +93,7 @@ export default function App() {
           </div>
         </div>
         <div className="flex items-center gap-3">
-          <ProviderToggle value={provider} onChange={setProvider} />
+          <ProviderToggle value={provider} onChange={setProvider} options={providers} />
         </div>
       </header>
 
@@ -1,11 +1,13 @@
 export const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8000'
 
-export type Provider = 'gemini' | 'openai'
+export type Provider = 'gemini' | 'openai' | 'local'
 
 export interface TextConversionResult {
   translation: string
   transcript: string
   segments: Array<{
+    start: number
+    end: number
     transcript: string
     translation: string
   }>
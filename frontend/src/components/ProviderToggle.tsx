@@ -4,10 +4,10 @@ import type { Provider } from '../api'
 interface Props {
   value: Provider
   onChange: (p: Provider) => void
+  options?: Provider[]
 }
 
-export default function ProviderToggle({ value, onChange }: Props) {
-  const options: Provider[] = ['gemini', 'openai']
+export default function ProviderToggle({ value, onChange, options = ['gemini', 'openai'] }: Props) {
   return (
     <div className="inline-flex bg-white/5 border border-white/10 rounded-lg overflow-hidden">
       {options.map((opt) => (